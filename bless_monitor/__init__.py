@@ -0,0 +1,3 @@
+"""Bless 网络节点监控：定时获取各 token 的节点状态，检测变化并通过多个渠道发送通知"""
+
+__version__ = '0.1.0'
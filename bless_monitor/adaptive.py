@@ -0,0 +1,57 @@
+"""自适应轮询周期：根据每轮观测到的变化调整单个 token 的下一次检查间隔
+
+- 有节点上线/下线（isConnected 翻转、节点新增/消失）：立即缩短到 min_interval
+- 最近 flap_window 秒内翻转达到 flap_threshold 次（节点抖动）：保持 min_interval
+- 快照未变化：每轮乘以 backoff，逐步放宽到 max_interval；仍有节点离线时最多放宽到基础周期，以便及时发现恢复
+- 只有奖励等其他字段变化：回到基础周期 interval（低于基础周期时按 backoff 逐步恢复）
+"""
+from collections import deque
+
+from .node_diff import ADDED, REMOVED
+
+
+def is_connectivity_change(change):
+    return change.kind in (ADDED, REMOVED) or change.field == 'is_connected'
+
+
+class AdaptiveInterval:
+    """单个 token 的轮询周期状态"""
+
+    def __init__(self, interval, min_interval=None, max_interval=None, backoff=1.5,
+                 flap_window=None, flap_threshold=2):
+        self.base = interval
+        self.min_interval = min(interval, min_interval or interval)
+        self.max_interval = max(interval, max_interval or interval)
+        self.backoff = backoff
+        # 默认以基础周期的 4 倍作为抖动统计窗口
+        self.flap_window = flap_window or 4 * interval
+        self.flap_threshold = flap_threshold
+        self.current = interval
+        self._flips = deque()
+
+    @property
+    def fixed(self):
+        """上下限与基础周期相同时周期固定不变"""
+        return self.min_interval == self.max_interval
+
+    def flapping(self, now):
+        while self._flips and self._flips[0] <= now - self.flap_window:
+            self._flips.popleft()
+        return len(self._flips) >= self.flap_threshold
+
+    def update(self, changes, unchanged, now, offline=False):
+        """记录一轮的观测结果，返回下一轮的周期（秒）
+
+        changes 为 NodeChange 列表，unchanged 表示快照与上一轮完全相同（含网关 304/响应体未变），
+        offline 表示当前仍有离线节点。
+        """
+        flips = sum(1 for change in changes if is_connectivity_change(change))
+        if flips:
+            self._flips.append(now)
+        if flips or self.flapping(now):
+            self.current = self.min_interval
+        elif (unchanged or not changes) and not offline:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        else:
+            self.current = min(self.base, self.current * self.backoff)
+        return self.current
@@ -0,0 +1,239 @@
+"""本地查询接口：从内存中各 token 的最新快照提供汇总和节点列表（JSON），看板和脚本不必再直接请求网关
+
+GET /api/tokens                              各 token 的汇总（节点数、在线数、奖励、收益速率、检查时间等）
+GET /api/nodes?token=名称&offline=1          节点列表，可按 token 名称和离线状态过滤，不带 token 时返回全部 token
+
+响应体按快照缓存：同一快照、同一过滤条件只序列化一次，按 Accept-Encoding 压缩（zstd 优先，其次 gzip）的结果
+也一并缓存，之后的请求直接返回缓存的字节；每个响应带 ETag，客户端带 If-None-Match 再次请求时快照未变则返回 304。
+序列化和压缩在线程池中执行（快照生成后不再修改，可以安全地在线程中读取），上万节点的首次请求不会卡住检查。
+节点字段沿用网关的命名（_id、pubKey、isConnected、totalReward、todayReward），便于原有脚本切换过来。
+"""
+import asyncio
+import gzip
+import itertools
+import json
+import time
+
+from .fetch import _import_zstd
+from .logs import logger
+
+CONTENT_TYPE = 'application/json'
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# ETag 带上启动时间，重启后计数从头开始也不会与客户端手里的旧 ETag 相同
+_etags = (f'"{int(time.time()):x}-{n}"' for n in itertools.count())
+
+
+def _compress(body, encoding):
+    if encoding == 'zstd':
+        # ZstdCompressor 不能在多个线程中同时使用，每次新建（相对压缩本身开销很小）
+        return _import_zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encoding):
+    """按 Accept-Encoding 选择响应编码：zstd > gzip > identity（q=0 表示不接受）"""
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().lower().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.strip())
+    for encoding in ('zstd', 'gzip'):
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return 'identity'
+
+
+class _Entry:
+    """一个缓存的响应：生成它的数据来源、ETag 和各编码的响应体"""
+    __slots__ = ('sources', 'etag', 'bodies')
+
+    def __init__(self, sources, body):
+        self.sources = sources
+        self.etag = next(_etags)
+        self.bodies = {'identity': body}
+
+    def encoding(self, accepted):
+        """实际使用的编码：响应体太小时不压缩"""
+        return 'identity' if len(self.bodies['identity']) < MIN_COMPRESS_SIZE else accepted
+
+    def tag(self, encoding):
+        """各编码的响应体是不同的表示，ETag 也各不相同"""
+        return self.etag if encoding == 'identity' else f'{self.etag[:-1]}-{encoding}"'
+
+    async def body(self, encoding):
+        """该编码的响应体，第一次被请求时在线程池中压缩"""
+        body = self.bodies.get(encoding)
+        if body is None:
+            body = await asyncio.get_running_loop().run_in_executor(None, _compress, self.bodies['identity'], encoding)
+            self.bodies[encoding] = body
+        return body
+
+
+def _node_json(node, token):
+    return {
+        '_id': node.node_id,
+        'token': token,
+        'pubKey': node.pub_key,
+        'isConnected': node.is_connected,
+        'totalReward': node.total_reward,
+        'todayReward': node.today_reward,
+        'sessionCount': node.session_count,
+        'sessionStart': node.session_start,
+    }
+
+
+def _token_json(state):
+    stats = state.stats
+    summary = {
+        'name': state.name,
+        'checkedAt': state.checked_at,
+        'interval': state.interval.current,
+        'circuit': state.breaker.state,
+    }
+    if stats is not None:
+        summary.update(
+            nodes=stats.nodes, online=stats.online, offline=len(stats.offline),
+            totalReward=stats.total_reward, todayReward=stats.today_reward, rewardDelta=stats.reward_delta,
+        )
+        earnings = stats.earnings
+        if earnings is not None and earnings.median is not None:
+            summary.update(rewardRate=earnings.rate, projectedTodayReward=earnings.projected,
+                           medianRate=earnings.median, underperforming=earnings.underperforming)
+    return summary
+
+
+class QueryApi:
+    """按 Monitor 中各 token 的状态生成、缓存响应体"""
+    __slots__ = ('monitor', '_cache', '_building')
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self._cache = {}
+        self._building = {}  # key -> (sources, 进行中的序列化 Future)，同时到达的相同请求只序列化一次
+
+    async def _cached(self, key, sources, build):
+        """sources 为生成响应所依据的对象元组，与缓存的相同时直接复用
+
+        快照和 FleetStats 没有定义 __eq__，元组比较时按对象身份判断，不会逐个比较节点。
+        """
+        entry = self._cache.get(key)
+        if entry is not None and entry.sources == sources:
+            return entry
+        building = self._building.get(key)
+        if building is None or building[0] != sources:
+            future = asyncio.get_running_loop().run_in_executor(
+                None, lambda: json.dumps(build(), ensure_ascii=False).encode()
+            )
+            building = self._building[key] = (sources, future)
+        try:
+            body = await building[1]
+        finally:
+            if self._building.get(key) is building:
+                del self._building[key]
+        # 同一次序列化的多个等待者共用一个缓存项（同一个 ETag）
+        entry = self._cache.get(key)
+        if entry is None or entry.sources != sources:
+            entry = self._cache[key] = _Entry(sources, body)
+        return entry
+
+    async def tokens(self):
+        """全部 token 的汇总；每轮检查都会生成新的 stats，熔断状态和周期变化时也重新生成"""
+        states = list(self.monitor.tokens.values())
+        sources = tuple((state.name, state.stats, state.breaker.state, state.interval.current) for state in states)
+        return await self._cached(('tokens',), sources, lambda: [_token_json(state) for state in states])
+
+    async def nodes(self, token=None, offline=False):
+        """节点列表，token 为空时包含全部 token；token 不存在时返回 None"""
+        tokens = self.monitor.tokens
+        if token is not None and token not in tokens:
+            return None
+        states = [tokens[token]] if token is not None else list(tokens.values())
+
+        def build():
+            nodes = []
+            for state in states:
+                if state.stats is None:
+                    continue
+                source = state.stats.offline if offline else state.stats.snapshot.values()
+                nodes.extend(_node_json(node, state.name) for node in source)
+            return nodes
+
+        # 离线节点列表和快照在同一轮生成，快照未变即结果未变
+        sources = tuple((state.name, state.stats and state.stats.snapshot) for state in states)
+        return await self._cached(('nodes', token, offline), sources, build)
+
+    def drop(self, token):
+        """移除 token 后丢弃与它相关的缓存"""
+        for key in [key for key in self._cache if key[0] == 'tokens' or key[1] in (token, None)]:
+            del self._cache[key]
+
+
+def _truthy(value):
+    return value is not None and value.lower() in ('1', 'true', 'yes')
+
+
+async def _respond(request, entry):
+    from aiohttp import web
+
+    encoding = entry.encoding(negotiate_encoding(request.headers.get('Accept-Encoding')))
+    headers = {'ETag': entry.tag(encoding), 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if request.headers.get('If-None-Match') == headers['ETag']:
+        return web.Response(status=304, headers=headers)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    body = await entry.body(encoding)
+    return web.Response(body=body, content_type=CONTENT_TYPE, charset='utf-8', headers=headers)
+
+
+async def _handle_tokens(request):
+    return await _respond(request, await request.app['api'].tokens())
+
+
+async def _handle_nodes(request):
+    from aiohttp import web
+
+    token = request.query.get('token')
+    entry = await request.app['api'].nodes(token, _truthy(request.query.get('offline')))
+    if entry is None:
+        return web.json_response({'error': f"未知的 token: {token}"}, status=404,
+                                 dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+    return await _respond(request, entry)
+
+
+_runner = None
+_api = None
+
+
+def get_query_api():
+    """运行中的 QueryApi，未启动查询接口时为 None"""
+    return _api
+
+
+async def start_api_server(monitor, host, port):
+    """在 host:port 上启动查询接口，port 为空时不启动"""
+    global _runner, _api
+    if not port or _runner is not None:
+        return
+    from aiohttp import web  # 只在启用查询接口时导入
+
+    _api = QueryApi(monitor)
+    app = web.Application()
+    app['api'] = _api
+    app.router.add_get('/api/tokens', _handle_tokens)
+    app.router.add_get('/api/nodes', _handle_nodes)
+    _runner = web.AppRunner(app, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    logger.info("查询接口已启动: http://%s:%d/api/tokens", host, port)
+
+
+async def stop_api_server():
+    global _runner, _api
+    if _runner is not None:
+        await _runner.cleanup()
+    _runner = None
+    _api = None
@@ -0,0 +1 @@
+"""基准测试与模拟脚本，通过 bless-monitor bench <名称> [参数] 运行"""
@@ -0,0 +1,216 @@
+"""自适应轮询模拟：回放快照序列，对比固定周期与自适应周期的检测延迟和请求数
+
+快照序列可以来自合成数据（活跃账户、奖励几乎不动的账户、节点抖动的账户），
+也可以来自 history 目录中记录的原始采样（--history history/<token>）。
+每种策略都在虚拟时钟下驱动真实的 TokenScheduler，统计每次 isConnected 翻转
+从发生到被某一轮检查观测到的延迟，以及因两次检查之间翻转又恢复而漏掉的次数。
+运行: bless-monitor bench adaptive [--tokens 20] [--hours 48] [--history DIR]
+"""
+import argparse
+import asyncio
+import bisect
+import os
+import random
+
+from .simclock import run_simulated
+from ..adaptive import AdaptiveInterval
+from ..history import LEVELS, TokenHistory
+from ..node_diff import diff_states
+from ..scheduler import TokenScheduler
+from ..snapshot import NodeSnapshot
+
+REQUEST_LATENCY = 0.3  # 模拟一次请求的耗时（秒）
+
+
+class Timeline:
+    """单个 token 的快照序列：snapshots[i] 从 times[i] 起生效，直到下一个时间点"""
+
+    def __init__(self, times, snapshots):
+        self.times = times
+        self.snapshots = snapshots
+        self.flips = []  # (时间, 节点, 新的在线状态)
+        for i in range(1, len(snapshots)):
+            for change in diff_states(snapshots[i - 1], snapshots[i]):
+                if change.field == 'is_connected':
+                    self.flips.append((times[i], change.node_id, change.new))
+
+    def at(self, ts):
+        return self.snapshots[max(0, bisect.bisect_right(self.times, ts) - 1)]
+
+    @classmethod
+    def from_history(cls, directory):
+        """从 history 目录的原始采样层读取快照序列，时间平移到从 0 开始"""
+        history = TokenHistory(directory)
+        times, snapshots = [], []
+        for bucket in history.buckets(LEVELS[0], 0, float('inf')):
+            snapshot = {}
+            for slot, samples in enumerate(bucket.samples):
+                if samples:
+                    node_id = history._node_ids[slot]
+                    snapshot[node_id] = NodeSnapshot(
+                        node_id, node_id, bucket.online[slot] > 0, bucket.last_total[slot],
+                        bucket.last_today[slot]
+                    )
+            times.append(bucket.start)
+            snapshots.append(snapshot)
+        if not times:
+            raise SystemExit(f"{directory} 中没有原始采样数据")
+        origin = times[0]
+        return cls([ts - origin for ts in times], snapshots), times[-1] - origin
+
+
+def synthetic_timeline(rng, kind, nodes, duration):
+    """生成一个 token 的事件序列
+
+    active: 每个节点约 5 分钟奖励增长一次；quiet: 奖励约 3 小时变化一次；
+    两者的节点每天约掉线一次（2 分钟~2 小时）。flappy: 额外有一个节点每天数次成串地上下线。
+    """
+    events = []  # (时间, 节点序号, 字段, 值)
+    reward_every = 300 if kind == 'active' else 3 * 3600
+    for node in range(nodes):
+        t = rng.uniform(0, reward_every)
+        while t < duration:
+            events.append((t, node, 'reward', rng.randint(1, 5)))
+            t += rng.expovariate(1 / reward_every)
+        t = rng.expovariate(1 / 86400)
+        while t < duration:
+            down = min(7200, max(120, rng.lognormvariate(6.5, 1.0)))
+            events.append((t, node, 'is_connected', False))
+            events.append((t + down, node, 'is_connected', True))
+            t += down + rng.expovariate(1 / 86400)
+    if kind == 'flappy':
+        t = rng.expovariate(1 / 21600)
+        while t < duration:
+            for _ in range(rng.randint(2, 4)):
+                t += rng.uniform(60, 300)
+                events.append((t, 0, 'is_connected', False))
+                t += rng.uniform(60, 300)
+                events.append((t, 0, 'is_connected', True))
+            t += rng.expovariate(1 / 21600)
+    events.sort()
+
+    state = [[True, 10000 * node, 0] for node in range(nodes)]
+
+    def snapshot():
+        return {
+            f"{node:024x}": NodeSnapshot(f"{node:024x}", f"node{node}", connected, total, today)
+            for node, (connected, total, today) in enumerate(state)
+        }
+
+    times, snapshots = [0.0], [snapshot()]
+    for t, node, field, value in events:
+        if t >= duration:
+            break
+        if field == 'reward':
+            state[node][1] += value
+            state[node][2] += value
+        else:
+            state[node][0] = value
+        times.append(t)
+        snapshots.append(snapshot())
+    return Timeline(times, snapshots)
+
+
+async def simulate(timelines, duration, policy, interval, min_interval, max_interval):
+    """在虚拟时钟下按策略轮询所有 token，返回 {token: 检查时间列表}"""
+    loop = asyncio.get_running_loop()
+    scheduler = TokenScheduler(interval, max_concurrency=10, requests_per_second=None, jitter=0.1)
+    polls = {name: [] for name in timelines}
+
+    def make_job(name, timeline):
+        adaptive = AdaptiveInterval(interval, min_interval, max_interval)
+        previous = None
+
+        async def job():
+            nonlocal previous
+            now = loop.time() - origin
+            polls[name].append(now)
+            current = timeline.at(now)
+            await asyncio.sleep(REQUEST_LATENCY)
+            if policy == 'adaptive' and previous is not None:
+                changes = [] if current is previous else diff_states(previous, current)
+                offline = any(not node.is_connected for node in current.values())
+                scheduler.set_interval(name, adaptive.update(changes, current is previous, loop.time(), offline))
+            previous = current
+        return job
+
+    for name, timeline in timelines.items():
+        scheduler.add(name, make_job(name, timeline))
+    origin = loop.time()
+    runner = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(duration)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    return polls
+
+
+def detection(timelines, polls):
+    """返回 (各次翻转的检测延迟列表, 漏检次数)"""
+    latencies, missed = [], 0
+    for name, timeline in timelines.items():
+        times = polls[name]
+        for ts, node_id, value in timeline.flips:
+            i = bisect.bisect_left(times, ts)
+            if i == len(times):
+                continue  # 模拟结束前没有再检查
+            if timeline.at(times[i])[node_id].is_connected == value:
+                latencies.append(times[i] - ts)
+            else:
+                missed += 1
+    return latencies, missed
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--nodes', type=int, default=10, help='每个 token 的节点数')
+    parser.add_argument('--hours', type=float, default=48)
+    parser.add_argument('--interval', type=float, default=300)
+    parser.add_argument('--min-interval', type=float, default=60)
+    parser.add_argument('--max-interval', type=float, default=900)
+    parser.add_argument('--history', nargs='*', help='改为回放这些 history/<token> 目录中的原始采样')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.history:
+        timelines, duration = {}, 0
+        for directory in args.history:
+            timelines[os.path.basename(directory.rstrip('/'))], span = Timeline.from_history(directory)
+            duration = max(duration, span)
+        source = f"{len(timelines)} 个 token 的历史采样, {duration / 3600:.1f}h"
+    else:
+        rng = random.Random(args.seed)
+        duration = args.hours * 3600
+        kinds = ('active', 'quiet', 'flappy')
+        timelines = {
+            f"Token{i}-{kinds[i % 3]}": synthetic_timeline(rng, kinds[i % 3], args.nodes, duration)
+            for i in range(args.tokens)
+        }
+        source = f"{args.tokens} 个合成 token × {args.nodes} 节点, {args.hours:g}h"
+
+    flips = sum(len(timeline.flips) for timeline in timelines.values())
+    print(f"{source}，共 {flips} 次上下线翻转")
+    print(f"{'策略':<28} {'请求数':>8} {'请求/token/h':>12} {'平均延迟s':>10} {'p50':>7} {'p95':>7} {'最大':>7} {'漏检':>5}")
+    hours = duration / 3600
+    policies = (
+        (f"固定 {args.interval:g}s", 'fixed', args.interval),
+        (f"固定 {args.min_interval:g}s", 'fixed', args.min_interval),
+        (f"自适应 {args.min_interval:g}~{args.max_interval:g}s", 'adaptive', args.interval),
+    )
+    for label, policy, interval in policies:
+        polls = run_simulated(simulate(timelines, duration, policy, interval, args.min_interval, args.max_interval))
+        requests = sum(len(times) for times in polls.values())
+        latencies, missed = detection(timelines, polls)
+        latencies.sort()
+        mean = sum(latencies) / len(latencies) if latencies else float('nan')
+        print(f"{label:<28} {requests:>8} {requests / len(timelines) / hours:>12.1f} {mean:>10.1f} "
+              f"{percentile(latencies, 0.5):>7.0f} {percentile(latencies, 0.95):>7.0f} "
+              f"{latencies[-1] if latencies else float('nan'):>7.0f} {missed:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""查询接口的响应开销：首次请求（序列化+压缩）vs 之后命中缓存 vs If-None-Match 返回 304，以及各编码的响应大小
+
+监控先对本地桩网关完成一轮检查，再启动查询接口；客户端按不同的 Accept-Encoding 请求 /api/tokens 和 /api/nodes。
+运行: bless-monitor bench api [--tokens 10] [--nodes 10000] [--requests 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import aiohttp
+
+from . import stubs
+from .synthetic import make_nodes
+from .. import api
+from ..config import validate
+from ..engine import Monitor
+
+API_PORT = 19180
+
+
+async def timed_get(session, url, encoding, etag=None):
+    headers = {'Accept-Encoding': encoding}
+    if etag:
+        headers['If-None-Match'] = etag
+    start = time.perf_counter()
+    async with session.get(url, headers=headers, auto_decompress=False) as response:
+        body = await response.read()
+    return time.perf_counter() - start, response.status, len(body), response.headers.get('ETag')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=10)
+    parser.add_argument('--nodes', type=int, default=10000, help='每个 token 的节点数')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    gateway = await stubs.GatewayStub(make_nodes(args.nodes)).start()
+    config = validate({
+        'api_url': gateway.url,
+        'tokens': [{'name': f"Token{i}", 'token': f"token{i}"} for i in range(args.tokens)],
+        'state_db_path': '', 'history_dir': '', 'metrics_port': 0, 'api_port': API_PORT,
+        'always_notify': False,
+    })
+    monitor = Monitor(config)
+    base = f"http://127.0.0.1:{API_PORT}"
+    paths = ('/api/tokens', '/api/nodes?token=Token0&offline=1', '/api/nodes?token=Token0', '/api/nodes')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await monitor.start()
+            await monitor.run_once()
+        print(f"{args.tokens} token × {args.nodes} 节点")
+        print(f"{'路径':<36} {'编码':<9} {'大小KB':>9} {'首次ms':>8} {'缓存ms':>8} {'304ms':>7}")
+        async with aiohttp.ClientSession() as session:
+            for path in paths:
+                for encoding in ('identity', 'gzip', 'zstd'):
+                    api.get_query_api()._cache.clear()
+                    first, status, size, etag = await timed_get(session, base + path, encoding)
+                    cached = [(await timed_get(session, base + path, encoding))[0] for _ in range(args.requests)]
+                    revalidated = [(await timed_get(session, base + path, encoding, etag))[0]
+                                   for _ in range(args.requests)]
+                    print(f"{path:<36} {encoding:<9} {size / 1024:>9.1f} {first * 1000:>8.2f} "
+                          f"{sum(cached) / len(cached) * 1000:>8.2f} {sum(revalidated) / len(revalidated) * 1000:>7.2f}")
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await monitor.close()
+        await gateway.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
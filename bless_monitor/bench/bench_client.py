@@ -0,0 +1,77 @@
+"""长期请求会话与解压上下文复用：每轮新建会话和 ZstdDecompressor（旧版 monitor_nodes 的做法）vs 整个运行期间复用
+
+多轮请求本地桩网关（每个 token 的快照逐轮变化），统计桩网关累计接受的连接数（对真实网关即 TCP/TLS 握手次数）、
+每轮平均耗时和每轮的缺页次数（ru_minflt，反映每轮新分配、释放大块内存的频繁程度）。
+运行: bless-monitor bench client [--tokens 10] [--nodes 2000] [--cycles 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import resource
+import time
+
+from . import stubs
+from .synthetic import make_nodes
+from .. import fetch
+from ..fetch import FetchCache, create_fetch_session, fetch_nodes_data
+
+
+def minor_faults():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+
+
+async def fetch_all(session, url, tokens, caches, fresh_decoder):
+    for token in tokens:
+        if fresh_decoder:
+            fetch._zstd_pool.clear()
+        await fetch_nodes_data(session, url, token, caches[token])
+
+
+async def run_case(gateway, tokens, cycles, persistent):
+    caches = {token: FetchCache() for token in tokens}
+    fetch._zstd_pool.clear()
+    connections = gateway.connections
+    elapsed = faults = 0
+    session = create_fetch_session() if persistent else None
+    try:
+        for _ in range(cycles):
+            start, start_faults = time.perf_counter(), minor_faults()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if persistent:
+                    await fetch_all(session, gateway.url, tokens, caches, fresh_decoder=False)
+                else:
+                    async with create_fetch_session() as cycle_session:
+                        await fetch_all(cycle_session, gateway.url, tokens, caches, fresh_decoder=True)
+            elapsed += time.perf_counter() - start
+            faults += minor_faults() - start_faults
+    finally:
+        if session is not None:
+            await session.close()
+    return gateway.connections - connections, elapsed / cycles, faults / cycles
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=10)
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--cycles', type=int, default=50)
+    args = parser.parse_args()
+
+    tokens = [f"token{i}" for i in range(args.tokens)]
+    gateway = await stubs.ReplayGatewayStub(make_nodes(args.nodes), versions=args.cycles).start()
+    print(f"{args.tokens} token × {args.nodes} 节点，{args.cycles} 轮，每轮数据都有变化")
+    print(f"{'方式':<26} {'新建连接':>8} {'每轮耗时ms':>10} {'每轮缺页':>8}")
+    try:
+        # 先各跑一次预热，避免首次导入和分配计入结果
+        for label, persistent in (('每轮新建会话和解压上下文', False), ('长期会话 + 复用解压上下文', True)):
+            await run_case(gateway, tokens, 2, persistent)
+            gateway.requests_by_token.clear()
+            connections, per_cycle, faults = await run_case(gateway, tokens, args.cycles, persistent)
+            print(f"{label:<26} {connections:>8} {per_cycle * 1000:>10.1f} {faults:>8.0f}")
+    finally:
+        await gateway.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""compare_states 微基准：旧版线性查找 vs 按 _id 索引的 diff_states
+
+运行: bless-monitor bench diff [--legacy-max 10000]
+"""
+import argparse
+import time
+
+from .synthetic import make_nodes, mutate_nodes
+from ..node_diff import diff_states
+from ..snapshot import take_snapshot
+
+
+def legacy_compare_states(previous, current):
+    """旧版 compare_states（每个节点都线性扫描 previous，O(n²)）"""
+    changes = []
+    for node in current:
+        node_id = node['_id']
+        prev_node = next((n for n in previous if n['_id'] == node_id), None)
+        if not prev_node:
+            changes.append(f"新增节点: {node['pubKey']}")
+            continue
+        if node['isConnected'] != prev_node['isConnected']:
+            changes.append(f"节点 {node['pubKey']} {'上线' if node['isConnected'] else '离线'}")
+        if node['totalReward'] != prev_node['totalReward']:
+            changes.append(f"节点 {node['pubKey']} 总奖励变化: +{node['totalReward'] - prev_node['totalReward']}")
+        if node['todayReward'] != prev_node['todayReward']:
+            changes.append(f"节点 {node['pubKey']} 今日奖励变化: +{node['todayReward'] - prev_node['todayReward']}")
+        if len(node['sessions']) != len(prev_node['sessions']):
+            changes.append(f"节点 {node['pubKey']} sessions数量变化: {len(prev_node['sessions'])} -> {len(node['sessions'])}")
+    return changes
+
+
+def best_of(func, previous, current, repeat):
+    """返回 repeat 次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(previous, current)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='100,10000,100000')
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='超过该节点数时不再实际运行旧版，按 O(n²) 外推耗时')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'节点数':>8} {'旧版(ms)':>14} {'新版(ms)':>10} {'加速比':>10}")
+    legacy_ref = None
+    for size in (int(s) for s in args.sizes.split(',')):
+        previous = make_nodes(size)
+        current = mutate_nodes(previous)
+
+        # 新版每轮的开销 = 为本次数据建快照 + 与上一轮快照比较
+        previous_snapshot = take_snapshot(previous)
+        new_time = best_of(lambda prev, cur: diff_states(prev, take_snapshot(cur)),
+                           previous_snapshot, current, args.repeat)
+        if size <= args.legacy_max:
+            legacy_time = best_of(legacy_compare_states, previous, current, 1 if size > 1000 else args.repeat)
+            legacy_ref = (size, legacy_time)
+            legacy_label = f"{legacy_time * 1000:.2f}"
+        elif legacy_ref:
+            ref_size, ref_time = legacy_ref
+            legacy_time = ref_time * (size / ref_size) ** 2
+            legacy_label = f"~{legacy_time * 1000:.0f}(外推)"
+        else:
+            legacy_time = None
+            legacy_label = "跳过"
+
+        speedup = f"{legacy_time / new_time:.0f}x" if legacy_time else "-"
+        print(f"{size:>8} {legacy_label:>14} {new_time * 1000:>10.2f} {speedup:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""通知分发基准：一个慢渠道、一个故障渠道和一个正常的企业微信渠道
+
+对比逐个渠道串行发送与 NotificationDispatcher 并行分发时，正常渠道收到消息的延迟。
+运行: bless-monitor bench fanout [--messages 5] [--slow 3]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from .stubs import WebhookStub
+from ..notifiers import JsonWebhookNotifier, SlackNotifier, WeChatNotifier
+from ..notify_queue import NotificationDispatcher
+from ..webhook import RetryableSendError
+
+
+async def start_sinks(slow):
+    return (
+        await WebhookStub(delay=slow).start(),  # 慢渠道
+        await WebhookStub(status=500).start(),  # 持续 5xx 的渠道
+        await WebhookStub().start(),  # 企业微信
+    )
+
+
+def make_notifiers(sinks):
+    slow, broken, wechat = sinks
+    return [
+        JsonWebhookNotifier(slow.url, timeout=30),
+        SlackNotifier(broken.url),
+        WeChatNotifier(wechat.url),
+    ]
+
+
+async def run_serial(args):
+    """旧方式：每条消息依次发给每个渠道，失败不重试"""
+    sinks = await start_sinks(args.slow)
+    notifiers = make_notifiers(sinks)
+    sent_at = []
+    for i in range(args.messages):
+        sent_at.append(time.perf_counter())
+        for notifier in notifiers:
+            try:
+                await notifier.send(f"告警 {i}")
+            except RetryableSendError:
+                pass
+    for notifier in notifiers:
+        await notifier.close()
+    return sinks, sent_at
+
+
+async def run_dispatched(args):
+    sinks = await start_sinks(args.slow)
+    dispatcher = NotificationDispatcher(make_notifiers(sinks), linger=0.05)
+    for queue in dispatcher.queues:
+        queue.max_retries = 2
+        queue.backoff_base = 0.5
+    dispatcher.start()
+    sent_at = []
+    for i in range(args.messages):
+        sent_at.append(time.perf_counter())
+        dispatcher.submit(f"告警 {i}")
+        # 等企业微信渠道收到后再提交下一条，模拟逐轮告警
+        while len(sinks[2].received_at) <= i:
+            await asyncio.sleep(0.005)
+    await dispatcher.close()
+    return sinks, sent_at, dispatcher.stats
+
+
+def latency(sink, sent_at):
+    delays = [received - sent for received, sent in zip(sink.received_at, sent_at)]
+    return sum(delays) / len(delays) * 1000 if delays else float('nan')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--slow', type=float, default=3.0, help='慢渠道的响应延迟（秒）')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial_sinks, serial_sent = await run_serial(args)
+        dispatched_sinks, dispatched_sent, stats = await run_dispatched(args)
+
+    print(f"{args.messages} 条告警，慢渠道延迟 {args.slow} 秒，另一渠道持续返回 500")
+    print(f"串行发送: 企业微信平均延迟 {latency(serial_sinks[2], serial_sent):.1f} ms")
+    print(f"并行分发: 企业微信平均延迟 {latency(dispatched_sinks[2], dispatched_sent):.1f} ms")
+    for name, channel_stats in stats.items():
+        print(f"  {name:<8} {channel_stats}")
+    for sink in serial_sinks + dispatched_sinks:
+        await sink.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""故障注入验证：一组正常 token 与卡死、半截响应、断连、503、429、401 的 token 一起运行
+
+驱动真实的 Monitor（调度器、超时、重试、熔断），检查：
+- 正常 token 每轮耗时不受故障 token 影响，且每个周期都完成检查
+- 卡死/半截响应的请求在超时后放弃，不会一直占用并发名额
+- 503/429 经重试后恢复；401 的 token 熔断后不再请求
+不满足时以非 0 状态退出。
+运行: bless-monitor bench faults [--seconds 12] [--good 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from .stubs import FaultyGatewayStub, WebhookStub
+from .synthetic import make_nodes
+from ..config import validate
+from ..engine import Monitor
+
+FAULTS = {
+    'hang': 'hang',
+    'stall': 'stall',
+    'reset': 'reset',
+    'flaky': 'flaky',
+    'ratelimit': 'ratelimit',
+    'auth': 'auth',
+}
+
+
+async def main(args):
+    gateway = await FaultyGatewayStub(make_nodes(200), FAULTS).start()
+    webhook = await WebhookStub().start()
+    good = [f"good{i}" for i in range(args.good)]
+    config = validate({
+        'api_url': gateway.url,
+        'tokens': [{'name': name, 'token': name} for name in good + list(FAULTS)],
+        'webhook_url': webhook.url,
+        'interval': args.interval, 'min_interval': args.interval, 'max_interval': args.interval,
+        'jitter': 0, 'requests_per_second': 0, 'max_concurrency': args.max_concurrency,
+        'connect_timeout': 1, 'read_timeout': 1, 'request_timeout': 2,
+        'fetch_retries': 2, 'retry_base_delay': 0.2, 'retry_max_delay': 1,
+        'breaker_threshold': 3, 'state_db_path': '', 'history_dir': '', 'metrics_port': 0,
+    })
+
+    monitor = Monitor(config)
+    durations = {name: [] for name in monitor.tokens}
+    succeeded = {name: 0 for name in monitor.tokens}
+    check = monitor.check
+
+    async def timed_check(state):
+        start = time.perf_counter()
+        await check(state)
+        durations[state.name].append(time.perf_counter() - start)
+        if state.breaker.failures == 0 and state.previous:
+            succeeded[state.name] += 1
+
+    monitor.check = timed_check
+    with contextlib.redirect_stdout(io.StringIO()):
+        await monitor.start(serve_metrics=False)
+        runner = asyncio.create_task(monitor.run())
+        await asyncio.sleep(args.seconds)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        await monitor.close()
+    await gateway.stop()
+    await webhook.stop()
+
+    cycles = int(args.seconds // args.interval)
+    print(f"{args.good} 个正常 token + {len(FAULTS)} 个故障 token，周期 {args.interval}s，运行 {args.seconds}s（约 {cycles} 轮）")
+    print(f"{'token':<10} {'检查次数':>8} {'成功':>6} {'最长耗时s':>10} {'网关请求':>8} {'熔断':>6}")
+    for name, state in monitor.tokens.items():
+        times = durations[name]
+        print(f"{name:<10} {len(times):>8} {succeeded[name]:>6} {max(times, default=0):>10.2f} "
+              f"{gateway.requests_by_token.get(name, 0):>8} {state.breaker.state:>6}")
+
+    failures = []
+    good_max = max(max(durations[name]) for name in good)
+    if good_max > 0.5:
+        failures.append(f"正常 token 单轮最长耗时 {good_max:.2f}s，受到了故障 token 的影响")
+    if min(succeeded[name] for name in good) < cycles - 1:
+        failures.append("正常 token 有周期未完成检查")
+    for name in ('hang', 'stall'):
+        # 每轮最多 (重试次数 + 1) 次超时加退避等待
+        if max(durations[name], default=0) > 3 * config.request_timeout + 2:
+            failures.append(f"{name} 的单轮耗时超过超时上限")
+    for name in ('flaky', 'ratelimit'):
+        if not succeeded[name]:
+            failures.append(f"{name} 重试后仍未成功")
+    if gateway.requests_by_token.get('auth', 0) != 1 or monitor.tokens['auth'].breaker.state != 'open':
+        failures.append("401 的 token 没有在第一次失败后熔断")
+    alerts = [m['text']['content'] for m in webhook.messages if '请求暂停' in m['text']['content']]
+    if not alerts:
+        failures.append("熔断没有发送通知")
+
+    print("结论:", "通过" if not failures else "未通过")
+    for failure in failures:
+        print(f"  - {failure}")
+    return not failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=12)
+    parser.add_argument('--interval', type=float, default=2)
+    parser.add_argument('--good', type=int, default=5)
+    parser.add_argument('--max-concurrency', type=int, default=10)
+    raise SystemExit(0 if asyncio.run(main(parser.parse_args())) else 1)
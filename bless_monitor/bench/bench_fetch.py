@@ -0,0 +1,62 @@
+"""fetch_nodes_data 峰值内存与耗时：整体读取+解压+json.loads vs 流式解压+增量解析
+
+运行: bless-monitor bench fetch [--nodes 50000] [--encoding zstd]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+import tracemalloc
+
+import zstandard as zstd
+
+from .stubs import GatewayStub
+from .synthetic import make_nodes
+from ..fetch import create_fetch_session, fetch_nodes_data
+from ..snapshot import take_snapshot
+
+
+async def legacy_fetch(session, api_url, api_token):
+    """旧版流程：读取完整响应体，整体解压，再整体 json.loads"""
+    async with session.get(api_url) as response:
+        compressed_data = await response.read()
+        with zstd.ZstdDecompressor().stream_reader(compressed_data) as reader:
+            decompressed_data = reader.read()
+        return take_snapshot(json.loads(decompressed_data))
+
+
+async def run_case(fetch, url):
+    async with create_fetch_session() as session:
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            snapshot = await fetch(session, url, 'bench')
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return len(snapshot), elapsed, peak
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=50000)
+    parser.add_argument('--encoding', default='zstd', choices=('zstd', 'gzip', 'identity'))
+    args = parser.parse_args()
+
+    stub = await GatewayStub(make_nodes(args.nodes, sessions=3), args.encoding).start()
+    cases = [('流式解压+增量解析', fetch_nodes_data)]
+    if args.encoding == 'zstd':
+        cases.insert(0, ('整体读取+json.loads', legacy_fetch))
+    try:
+        print(f"{'方式':<24} {'节点数':>8} {'耗时(ms)':>10} {'峰值(MiB)':>10}")
+        for label, fetch in cases:
+            count, elapsed, peak = await run_case(fetch, stub.url)
+            print(f"{label:<24} {count:>8} {elapsed * 1000:>10.1f} {peak / 2**20:>10.1f}")
+    finally:
+        await stub.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
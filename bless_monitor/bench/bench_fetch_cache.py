@@ -0,0 +1,56 @@
+"""条件请求/响应缓存基准：多轮请求本地桩网关，部分轮次数据有变化
+
+分别测试 不使用缓存、网关不支持 ETag（仅比较响应体哈希）、网关支持 ETag 三种情况，
+统计跳过解析的轮次、每轮平均耗时，并校验命中缓存时返回的快照与实际数据一致。
+运行: bless-monitor bench fetch_cache [--nodes 20000] [--cycles 20] [--change-every 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from .stubs import GatewayStub
+from .synthetic import make_nodes, mutate_nodes
+from ..fetch import FetchCache, create_fetch_session, fetch_nodes_data
+
+
+async def run_case(nodes, cycles, change_every, use_cache, etag):
+    stub = await GatewayStub(nodes, etag=etag).start()
+    cache = FetchCache() if use_cache else None
+    elapsed = 0.0
+    try:
+        async with create_fetch_session() as session:
+            for cycle in range(cycles):
+                if cycle and cycle % change_every == 0:
+                    stub.set_nodes(mutate_nodes(stub.nodes, seed=cycle))
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    snapshot = await fetch_nodes_data(session, stub.url, 'bench', cache)
+                elapsed += time.perf_counter() - start
+                expected = stub.nodes[-1]
+                assert snapshot[expected['_id']].total_reward == expected['totalReward']
+                assert len(snapshot) == len(stub.nodes)
+    finally:
+        await stub.stop()
+    return elapsed / cycles, cache, stub
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=20000)
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--change-every', type=int, default=5)
+    args = parser.parse_args()
+
+    nodes = make_nodes(args.nodes, sessions=3)
+    print(f"{args.nodes} 节点, {args.cycles} 轮, 每 {args.change_every} 轮数据变化一次")
+    print(f"{'方式':<22} {'平均耗时(ms)':>12} {'跳过解析':>8} {'304':>5}")
+    for label, use_cache, etag in (('无缓存', False, False), ('响应体哈希', True, False), ('ETag + 哈希', True, True)):
+        per_cycle, cache, stub = await run_case(nodes, args.cycles, args.change_every, use_cache, etag)
+        skipped = cache.short_circuited if cache else 0
+        print(f"{label:<22} {per_cycle * 1000:>12.1f} {skipped:>8} {stub.not_modified:>5}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""上下线迟滞确认和抖动检测的效果：回放原始采样，对比逐次采样告警与确认后告警的告警量和真实离线的检测延迟
+
+采样来自 history 目录的原始采样层（--history history/<token>）；不指定时生成合成数据（稳定节点、
+偶发单次掉线的节点、成段频繁上下线的节点，均会有持续的真实离线）先写入临时 history 目录再回放。
+两种方式都驱动真实的 Monitor.confirm_changes/build_notification，按通知分发的去重规则统计实际发出的消息：
+- 旧逻辑：offline_confirm_samples=online_confirm_samples=1、flap_start_score=0，即原来每次翻转都告警；
+- 新逻辑：配置中的确认次数和抖动阈值。
+告警条目为告知的节点状态变化：变化消息中的上下线/抖动条目，加上离线告警中新列出或不再列出的节点。
+连续离线达到 --outage 次采样视为真实离线，统计它从开始到出现在离线告警中的延迟（采样数）和漏报；
+更短的离线视为短暂掉线，统计其中被告警的次数。
+运行: bless-monitor bench flaps [--nodes 20] [--samples 5000] [--history DIR ...]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from .bench_adaptive import Timeline
+from ..config import validate
+from ..engine import Monitor
+from ..fleet import FleetStats
+from ..history import TokenHistory
+from ..node_diff import diff_states
+from ..snapshot import NodeSnapshot
+
+
+def synthetic_series(rng, nodes, samples):
+    """各节点每次采样的在线状态 [[bool] * samples]
+
+    所有节点约每 500 次采样出现一次真实离线（持续 3~60 次采样）；15% 的节点另有约 3% 的采样单次掉线，
+    另 15% 的节点约每 300 次采样出现一段 30~120 次采样的频繁上下线（每次采样 40% 概率翻转）。
+    """
+    series = []
+    for node in range(nodes):
+        kind = node % 20
+        states = [True] * samples
+        i = 0
+        while i < samples:
+            if rng.random() < 1 / 500:
+                for j in range(i, min(samples, i + rng.randint(3, 60))):
+                    states[j] = False
+                i = j + 1
+                continue
+            if kind < 3 and rng.random() < 0.03:
+                states[i] = False
+            elif 3 <= kind < 6 and rng.random() < 1 / 300:
+                connected = True
+                for j in range(i, min(samples, i + rng.randint(30, 120))):
+                    if rng.random() < 0.4:
+                        connected = not connected
+                    states[j] = connected
+                i = j
+            i += 1
+        series.append(states)
+    return series
+
+
+def record_synthetic(directory, series, spacing=60.0):
+    """把合成采样写入 history 目录（原始层保留两天，采样间隔按总时长缩小）"""
+    history = TokenHistory(directory)
+    samples = len(series[0])
+    spacing = min(spacing, 150000 / samples)
+    origin = 1.7e9
+    for i in range(samples):
+        history.record({
+            f"{node:024x}": NodeSnapshot(f"{node:024x}", f"node{node}", states[i], 10000 * node, 0)
+            for node, states in enumerate(series)
+        }, origin + i * spacing)
+    history.close()
+
+
+def replay(snapshots, options, outage):
+    """按一组配置回放快照序列，返回统计字典"""
+    config = validate({
+        'tokens': [{'name': 'Token', 'token': 'token'}],
+        'state_db_path': '', 'history_dir': '', 'always_notify': False, **options,
+    })
+    monitor = Monitor(config)
+    state = monitor.tokens['Token']
+    sent_fingerprint = None
+    listed = frozenset()  # 上一条发出的离线告警中列出的节点
+    result = {'offline_messages': 0, 'change_messages': 0, 'lines': 0, 'flapping': 0,
+              'delays': [], 'missed': 0, 'short': 0, 'short_alerted': 0}
+    runs = {}  # 离线中的节点 -> [开始的采样序号, 首次出现在离线告警中的采样序号]
+    previous = {}
+    for index, snapshot in enumerate(snapshots):
+        changes = diff_states(previous, snapshot) if previous else []
+        stats = FleetStats(snapshot, changes)
+        state.previous = previous
+        alerts = monitor.confirm_changes(state, snapshot, changes)
+        result['flapping'] += sum(1 for change in alerts if change.field == 'flapping')
+        message, fingerprint, extra = monitor.build_notification(state, stats, alerts)
+        result['change_messages'] += extra is not None
+        # 与 NotificationDispatcher.submit 相同的去重规则
+        if message and (fingerprint is None or fingerprint != sent_fingerprint):
+            sent_fingerprint = fingerprint
+            if fingerprint is None:
+                result['change_messages'] += 1
+                result['lines'] += sum(1 for change in alerts if change.field in ('is_connected', 'flapping'))
+                listed = frozenset()
+            else:
+                result['offline_messages'] += 1
+                result['lines'] += len(fingerprint[0] ^ listed)
+                listed = fingerprint[0]
+
+        alerting = state.flaps.alerting_offline()
+        for node in stats.offline:
+            run = runs.setdefault(node.node_id, [index, None])
+            if run[1] is None and node.node_id in alerting:
+                run[1] = index
+        for node_id in [node_id for node_id in runs if snapshot[node_id].is_connected]:
+            finish(result, runs.pop(node_id), index, outage)
+        previous = snapshot
+    for run in runs.values():
+        finish(result, run, len(snapshots), outage)
+    return result
+
+
+def finish(result, run, end, outage):
+    start, alerted = run
+    if end - start >= outage:
+        if alerted is None:
+            result['missed'] += 1
+        else:
+            result['delays'].append(alerted - start)
+    else:
+        result['short'] += 1
+        result['short_alerted'] += alerted is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--history', nargs='*', help='改为回放这些 history/<token> 目录中的原始采样')
+    parser.add_argument('--outage', type=int, default=5, help='连续离线达到该采样数视为真实离线')
+    parser.add_argument('--offline-confirm', type=int, default=2)
+    parser.add_argument('--online-confirm', type=int, default=2)
+    parser.add_argument('--decay', type=float, default=0.9)
+    parser.add_argument('--start-score', type=float, default=4)
+    parser.add_argument('--stop-score', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.history:
+        sources = {os.path.basename(directory.rstrip('/')): Timeline.from_history(directory)[0].snapshots
+                   for directory in args.history}
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            record_synthetic(directory, synthetic_series(random.Random(args.seed), args.nodes, args.samples))
+            sources = {'合成': Timeline.from_history(directory)[0].snapshots}
+
+    policies = (
+        ('逐次采样告警（旧）', {'offline_confirm_samples': 1, 'online_confirm_samples': 1, 'flap_start_score': 0}),
+        (f"确认 {args.offline_confirm}/{args.online_confirm} 次", {
+            'offline_confirm_samples': args.offline_confirm, 'online_confirm_samples': args.online_confirm,
+            'flap_start_score': 0,
+        }),
+        (f"确认+抖动检测 {args.start_score:g}/{args.stop_score:g}", {
+            'offline_confirm_samples': args.offline_confirm, 'online_confirm_samples': args.online_confirm,
+            'flap_decay': args.decay, 'flap_start_score': args.start_score, 'flap_stop_score': args.stop_score,
+        }),
+    )
+    for name, snapshots in sources.items():
+        flips = sum(1 for i in range(1, len(snapshots)) for change in diff_states(snapshots[i - 1], snapshots[i])
+                    if change.field == 'is_connected')
+        print(f"\n{name}: {len(snapshots[0])} 节点 × {len(snapshots)} 次采样，共 {flips} 次上下线翻转")
+        print(f"{'方式':<26} {'离线告警':>8} {'变化消息':>8} {'告警条目':>8} {'抖动条目':>8} "
+              f"{'平均延迟':>8} {'最大延迟':>8} {'真实离线漏报':>12} {'短暂掉线告警':>12}")
+        for label, options in policies:
+            result = replay(snapshots, options, args.outage)
+            delays = result['delays']
+            average = sum(delays) / len(delays) if delays else float('nan')
+            print(f"{label:<26} {result['offline_messages']:>8} {result['change_messages']:>8} {result['lines']:>8} "
+                  f"{result['flapping']:>8} {average:>8.2f} {max(delays, default=0):>8} "
+                  f"{result['missed']:>5}/{result['missed'] + len(delays):<6} "
+                  f"{result['short_alerted']:>5}/{result['short']:<6}")
+
+
+if __name__ == '__main__':
+    main()
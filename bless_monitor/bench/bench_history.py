@@ -0,0 +1,71 @@
+"""时序存储基准：写入若干天的 5 分钟采样，测量写入开销、磁盘占用和各时间范围的查询耗时
+
+运行: bless-monitor bench history [--nodes 1000] [--days 30]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from ..history import HistoryStore
+from ..snapshot import NodeSnapshot, pack_sessions
+
+ONE_SESSION = pack_sessions([{'_id': 'bench', 'startAt': '2024-11-01T00:00:00.000Z'}])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', type=int, default=300)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bless-history-')
+    rng = random.Random(0)
+    nodes = {
+        f"{i:024x}": NodeSnapshot(f"{i:024x}", f"pub{i}", True, 0, 0, ONE_SESSION)
+        for i in range(args.nodes)
+    }
+    rates = {node_id: rng.uniform(0, 20) for node_id in nodes}
+    flaky = {node_id: rng.uniform(0, 0.3) for node_id in nodes}
+
+    store = HistoryStore(directory)
+    now = 1_700_000_000 - 1_700_000_000 % 86400
+    start = now - args.days * 86400
+    samples = args.days * 86400 // args.interval
+    write_start = time.perf_counter()
+    for i in range(samples):
+        ts = start + i * args.interval
+        for node_id, node in nodes.items():
+            node.total_reward += rates[node_id] * args.interval / 3600
+            node.is_connected = rng.random() > flaky[node_id]
+        store.record('bench', nodes, ts)
+    write_elapsed = time.perf_counter() - write_start
+    store.close()
+
+    size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(directory) for f in files)
+    print(f"{args.nodes} 节点 × {samples} 次采样（{args.days} 天，每 {args.interval}s）")
+    print(f"写入: 平均每次采样 {write_elapsed / samples * 1000:.2f} ms, 磁盘占用 {size / 2**20:.1f} MiB")
+
+    history = HistoryStore(directory).token('bench')
+    end = start + samples * args.interval
+    for label, hours in (('1小时', 1), ('24小时', 24), ('7天', 24 * 7), (f'{args.days}天', 24 * args.days)):
+        query_start = end - hours * 3600
+        level = history.select_level(query_start, end, now=end)[0]
+        t0 = time.perf_counter()
+        uptime = history.uptime(query_start, end, now=end)
+        t1 = time.perf_counter()
+        rate = history.reward_rate(query_start, end, now=end)
+        t2 = time.perf_counter()
+        error = max(abs(rate[node_id] - rates[node_id]) for node_id in rate)
+        print(f"{label:>6} 层级={level:<4} 在线率 {(t1 - t0) * 1000:7.1f} ms, "
+              f"奖励速率 {(t2 - t1) * 1000:7.1f} ms, 速率最大误差 {error:.4f}, "
+              f"平均在线率 {sum(uptime.values()) / len(uptime):.3f}")
+
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""日志开销：旧版在事件循环中同步 print vs 经队列由后台线程写出的结构化日志，每轮 10k 节点
+
+每轮模拟一次检查的全部日志：常规模式约 10 行（响应头、统计、变化数、发送结果），
+逐节点模式（debug_output）另有每个节点一条（旧版每个节点 5 行 print）。
+输出目标：普通文件、/dev/null，以及读取很慢的管道（模拟 stdout 被重定向到慢速磁盘或管道，读端默认 4MB/s）。
+「事件循环阻塞」为日志调用本身在调用线程中的耗时，「写完」为全部内容实际写出的耗时（新版包括后台线程排空队列）。
+运行: bless-monitor bench logging [--nodes 10000] [--cycles 3] [--format json] [--pipe-rate 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from .synthetic import make_nodes
+from ..fleet import FleetStats
+from ..logs import logger, set_token, start_logging, stop_logging
+from ..messages import summary_fields
+from ..snapshot import take_snapshot
+
+
+def legacy_cycle(snapshot, stats, details):
+    """旧版一轮检查中的 print（fetch_nodes_data、统计、检查结果和发送结果）"""
+    print("响应状态码: 200")
+    print("Content-Type: application/json")
+    print("Server: cloudflare")
+    if details:
+        print("\n=== 各节点详情 ===")
+        for item in snapshot.values():
+            print(f"\n节点 {item.pub_key[:20]}...")
+            print(f"  状态: {'在线' if item.is_connected else '离线'}")
+            print(f"  总奖励: {item.total_reward}")
+            print(f"  今日奖励: {item.today_reward}")
+            print(f"  Sessions数量: {item.session_count}")
+    print(f"成功获取数据，节点数量: {stats.nodes}\n\n=== 节点统计信息 ===\n总节点数量: {stats.nodes}\n"
+          f"在线节点数量: {stats.online}\n总奖励: {stats.total_reward}\n今日总奖励: {stats.today_reward}")
+    print("\n=== 检查Token: Token0 ===")
+    print("检测到 0 个变化")
+    print("Message sent successfully!")
+
+
+def logger_cycle(snapshot, stats, details):
+    """新版同一轮检查中的日志调用"""
+    set_token('Token0')
+    logger.debug("响应状态码: %d", 200, content_type='application/json', server='cloudflare')
+    if details:
+        for item in snapshot.values():
+            logger.debug("节点详情", node=item.pub_key, connected=item.is_connected,
+                         total_reward=item.total_reward, today_reward=item.today_reward,
+                         sessions=item.session_count)
+    logger.info("节点统计", **summary_fields(stats))
+    logger.info("检测到 %d 个变化", 0, changes=0)
+    logger.info("[%s] Message sent successfully!", 'wechat')
+
+
+class SlowPipe:
+    """读端每次读 64KB、按 rate（字节/秒）限速的管道，写满 64KB 缓冲后写端阻塞"""
+
+    def __init__(self, rate):
+        self.read_fd, self.write_fd = os.pipe()
+        self.delay = 65536 / rate
+        self.received = 0
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            data = os.read(self.read_fd, 65536)
+            if not data:
+                break
+            self.received += len(data)
+            time.sleep(self.delay)
+
+    def open(self):
+        return open(self.write_fd, 'w', encoding='utf-8', closefd=False)
+
+    def close(self):
+        os.close(self.write_fd)
+        self._thread.join()
+        os.close(self.read_fd)
+
+
+def run_legacy(stream, snapshot, stats, details, cycles):
+    """返回 (每轮阻塞秒数, 每轮写完秒数)：print 的写入都发生在调用线程中，两者相同"""
+    saved, sys.stdout = sys.stdout, stream
+    try:
+        start = time.perf_counter()
+        for _ in range(cycles):
+            legacy_cycle(snapshot, stats, details)
+        stream.flush()
+        elapsed = (time.perf_counter() - start) / cycles
+    finally:
+        sys.stdout = saved
+    return elapsed, elapsed
+
+
+def run_logger(stream, path, snapshot, stats, details, cycles, fmt):
+    """返回 (每轮阻塞秒数, 每轮写完秒数)；stream 不为空时写到该流（作为 stdout），否则写到 path"""
+    saved = sys.stdout
+    if stream is not None:
+        sys.stdout = stream
+    try:
+        start_logging('debug' if details else 'info', path=path, fmt=fmt)
+        start = time.perf_counter()
+        for _ in range(cycles):
+            logger_cycle(snapshot, stats, details)
+        blocked = time.perf_counter() - start
+        stop_logging()
+        if stream is not None:
+            stream.flush()
+        total = time.perf_counter() - start
+    finally:
+        sys.stdout = saved
+    return blocked / cycles, total / cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--format', choices=('json', 'text'), default='json')
+    parser.add_argument('--pipe-rate', type=float, default=4, help='慢速管道读端的速率（MB/s）')
+    args = parser.parse_args()
+
+    snapshot = take_snapshot(make_nodes(args.nodes))
+    stats = FleetStats(snapshot)
+    print(f"{args.nodes} 节点，每种情况 {args.cycles} 轮取平均，新版格式 {args.format}")
+    print(f"{'模式':<10} {'输出':<10} {'方式':<8} {'阻塞ms/轮':>11} {'写完ms/轮':>11} {'KB/轮':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.log')
+        for details, mode in ((False, '常规'), (True, '逐节点详情')):
+            for sink in ('file', 'devnull', 'slowpipe'):
+                rows = []
+                for method in ('print', 'logger'):
+                    if os.path.exists(path):
+                        os.remove(path)
+                    pipe = None
+                    if sink == 'slowpipe':
+                        pipe = SlowPipe(args.pipe_rate * 1024 * 1024)
+                        stream = pipe.open()
+                    elif sink == 'devnull':
+                        stream = open(os.devnull, 'w', encoding='utf-8')
+                    else:
+                        stream = open(path, 'w', encoding='utf-8') if method == 'print' else None
+                    if method == 'print':
+                        blocked, total = run_legacy(stream, snapshot, stats, details, args.cycles)
+                    else:
+                        blocked, total = run_logger(stream, '' if stream else path, snapshot, stats, details,
+                                                    args.cycles, args.format)
+                    if stream is not None:
+                        stream.close()
+                    if pipe is not None:
+                        pipe.close()
+                        size = pipe.received
+                    else:
+                        size = os.path.getsize(path) if sink == 'file' else 0
+                    rows.append((method, blocked, total, size / args.cycles / 1024))
+                for method, blocked, total, size in rows:
+                    size_text = f"{size:>8.0f}" if size else f"{'-':>8}"
+                    print(f"{mode:<10} {sink:<10} {method:<8} {blocked * 1000:>11.2f} {total * 1000:>11.2f} "
+                          f"{size_text}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""通知队列模拟：多个 token 每轮各发一条消息，对比直接发送与经队列合并/限速/去重后的效果
+
+在虚拟时钟下运行，发送端模拟企业微信 20 条/分钟的频率限制（超限返回 45009）。
+运行: bless-monitor bench notify [--tokens 100] [--cycles 12]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+from collections import deque
+
+from .simclock import run_simulated
+from ..notify_queue import WECHAT_MAX_CONTENT_BYTES, NotificationQueue
+from ..webhook import RetryableSendError
+
+
+class RateLimitedSink:
+    """模拟 webhook：滑动 60 秒窗口内超过 limit 条即拒绝"""
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.accepted = deque()
+        self.delivered = 0
+        self.rejected = 0
+        self.oversized = 0
+
+    async def send(self, content):
+        now = asyncio.get_running_loop().time()
+        while self.accepted and self.accepted[0] <= now - 60:
+            self.accepted.popleft()
+        await asyncio.sleep(0.05)
+        if len(content.encode()) > WECHAT_MAX_CONTENT_BYTES:
+            self.oversized += 1
+            return False
+        if len(self.accepted) >= self.limit:
+            self.rejected += 1
+            raise RetryableSendError("api freq out of limit")
+        self.accepted.append(now)
+        self.delivered += 1
+        return True
+
+
+def token_message(rng, token, offline):
+    lines = [f"【Token{token}】", "⚠️ 【节点离线警告】⚠️" if offline else "📊 【节点状态报告】"]
+    lines += [f"  • 节点: ...{rng.getrandbits(24):06x}" for _ in range(rng.randint(3, 12))]
+    return "\n".join(lines)
+
+
+async def run_direct(tokens, cycles, interval, offline_tokens):
+    """旧方式：每个 token 每轮直接发送一条"""
+    sink = RateLimitedSink()
+    rng = random.Random(0)
+    for _ in range(cycles):
+        for token in range(tokens):
+            try:
+                await sink.send(token_message(rng, token, token in offline_tokens))
+            except RetryableSendError:
+                pass
+        await asyncio.sleep(interval)
+    return sink, tokens * cycles
+
+
+async def run_queued(tokens, cycles, interval, offline_tokens):
+    sink = RateLimitedSink()
+    queue = NotificationQueue(sink.send).start()
+    rng = random.Random(0)
+    for _ in range(cycles):
+        for token in range(tokens):
+            offline = token in offline_tokens
+            # 离线 token 的离线节点集合保持不变，只应告警一次
+            queue.submit(token_message(rng, token, offline), key=f"Token{token}",
+                         fingerprint=('offline',) if offline else None)
+        await asyncio.sleep(interval)
+    await queue.close()
+    return sink, queue.stats
+
+
+async def main(args):
+    offline_tokens = set(range(0, args.tokens, 5))
+    with contextlib.redirect_stdout(io.StringIO()):
+        direct, attempted = await run_direct(args.tokens, args.cycles, args.interval, offline_tokens)
+        queued, stats = await run_queued(args.tokens, args.cycles, args.interval, offline_tokens)
+
+    print(f"{args.tokens} 个 token × {args.cycles} 轮（其中 {len(offline_tokens)} 个 token 持续离线）")
+    print(f"直接发送: 尝试 {attempted} 条, 成功 {direct.delivered}, 被限流拒绝 {direct.rejected}")
+    print(f"通知队列: 提交 {stats['submitted']} 条, 去重丢弃 {stats['deduplicated']}, "
+          f"合并后发送 {stats['sent']} 条摘要, 重试 {stats['retried']}, "
+          f"被限流拒绝 {queued.rejected}, 超长 {queued.oversized}, 最终丢弃 {stats['dropped']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=100)
+    parser.add_argument('--cycles', type=int, default=12)
+    parser.add_argument('--interval', type=float, default=300)
+    run_simulated(main(parser.parse_args()))
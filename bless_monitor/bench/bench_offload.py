@@ -0,0 +1,84 @@
+"""进程池卸载基准：多个 token 的解压、解析、比较在事件循环内执行 vs 放到进程池
+
+同时统计事件循环的最大卡顿（一个每 10ms 唤醒一次的协程观察到的最大延迟）。
+运行: bless-monitor bench offload [--tokens 8] [--nodes 20000] [--workers 1,2,4,8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import zstandard as zstd
+
+from .synthetic import make_nodes, mutate_nodes
+from ..offload import process_payload
+from ..snapshot import take_snapshot
+
+
+async def watch_loop(stop, stalls):
+    """记录事件循环最大卡顿时间"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.01)
+        stalls.append(loop.time() - start - 0.01)
+
+
+async def run_inline(payloads):
+    for body, previous in payloads:
+        process_payload(body, 'zstd', previous)
+        await asyncio.sleep(0)
+
+
+async def run_pool(payloads, executor):
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, process_payload, body, 'zstd', previous)
+        for body, previous in payloads
+    ))
+
+
+async def measure(coro_factory):
+    stop = asyncio.Event()
+    stalls = []
+    watcher = asyncio.create_task(watch_loop(stop, stalls))
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await watcher
+    return elapsed, max(stalls, default=0.0)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=8)
+    parser.add_argument('--nodes', type=int, default=20000)
+    parser.add_argument('--workers', default='1,2,4,8')
+    args = parser.parse_args()
+
+    compressor = zstd.ZstdCompressor()
+    payloads = []
+    for i in range(args.tokens):
+        previous_nodes = make_nodes(args.nodes, sessions=3, seed=i)
+        body = compressor.compress(json.dumps(mutate_nodes(previous_nodes, seed=i)).encode())
+        payloads.append((body, take_snapshot(previous_nodes)))
+
+    print(f"{args.tokens} 个 token × {args.nodes} 节点, CPU 核数: {os.cpu_count()}")
+    print(f"{'方式':<16} {'耗时(s)':>8} {'加速比':>8} {'最大卡顿(ms)':>12}")
+    baseline, stall = await measure(lambda: run_inline(payloads))
+    print(f"{'事件循环内':<16} {baseline:>8.2f} {1:>7.2f}x {stall * 1000:>12.1f}")
+
+    for workers in (int(w) for w in args.workers.split(',')):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 预热子进程，避免把进程启动时间计入
+            await run_pool(payloads[:workers], executor)
+            elapsed, stall = await measure(lambda: run_pool(payloads, executor))
+        label = f"进程池 {workers} 进程"
+        print(f"{label:<16} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x {stall * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
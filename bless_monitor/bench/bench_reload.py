@@ -0,0 +1,96 @@
+"""配置热加载的开销：重启（重建全部 token 状态并从持久化存储恢复快照）vs 增量应用 tokens 的变化
+
+每个 token 在状态数据库中有一份快照。「重启」为新建 Monitor、恢复全部 token 的快照并注册到调度器，
+重启后各 token 的条件请求缓存、自适应周期、收益速率和上下线确认状态都从头开始；
+「热加载」为 Monitor.update_tokens 应用新的 tokens 列表（新增、移除、修改凭据、修改周期各 --changes 个），
+未变化的 token 保留原来的 TokenState。
+运行: bless-monitor bench reload [--tokens 2000] [--nodes 100] [--changes 10] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from .synthetic import make_nodes
+from ..config import validate
+from ..engine import Monitor
+from ..scheduler import TokenScheduler
+from ..snapshot import take_snapshot
+from ..state_store import close_state_store, get_state_store
+
+
+def make_config(state_db_path, tokens):
+    return validate({'tokens': tokens, 'state_db_path': state_db_path, 'history_dir': ''})
+
+
+def restart(config):
+    """重启时的 token 初始化：创建全部 TokenState，恢复快照并注册调度"""
+    monitor = Monitor(config)
+    store = get_state_store(config.state_db_path)
+    for state in monitor.tokens.values():
+        state.previous = store.load(state.name)
+    monitor.scheduler = TokenScheduler(config.interval)
+    for state in monitor.tokens.values():
+        monitor.scheduler.add(state.name, lambda: None, interval=state.interval.current)
+    return monitor
+
+
+def edited_tokens(items, changes, token_count):
+    """在 items 上新增、移除、修改凭据、修改周期各 changes 个 token，返回新的 tokens 配置列表"""
+    items = [dict(item) for item in items[changes:]]  # 移除前 changes 个
+    for item in items[:changes]:
+        item['token'] += '-new'
+    for item in items[changes:2 * changes]:
+        item['interval'] = item['min_interval'] = item['max_interval'] = 600
+    items += [{'name': f"Token{token_count + i}", 'token': f"token{token_count + i}"} for i in range(changes)]
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=2000)
+    parser.add_argument('--nodes', type=int, default=100)
+    parser.add_argument('--changes', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tokens = [{'name': f"Token{i}", 'token': f"token{i}"} for i in range(args.tokens + args.changes)]
+    snapshot = take_snapshot(make_nodes(args.nodes))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.db')
+        store = get_state_store(path)
+        for item in tokens:
+            store.save(item['name'], {}, snapshot)
+
+        config = make_config(path, tokens[:args.tokens])
+        edited = make_config(path, edited_tokens(config.tokens, args.changes, args.tokens)).tokens
+        restart_config = make_config(path, edited)
+        restart_seconds = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            restart(restart_config)
+            restart_seconds.append(time.perf_counter() - start)
+
+        noop_seconds, reload_seconds = [], []
+        for _ in range(args.repeat):
+            monitor = restart(config)
+            before = dict(monitor.tokens)
+            start = time.perf_counter()
+            monitor.update_tokens(config.tokens)
+            noop_seconds.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            added, removed, changed = monitor.update_tokens(edited)
+            reload_seconds.append(time.perf_counter() - start)
+            kept = sum(1 for name, state in monitor.tokens.items() if before.get(name) is state)
+        close_state_store()
+
+    print(f"{args.tokens} 个 token × {args.nodes} 节点，新增/移除/改凭据/改周期各 {args.changes} 个，"
+          f"每种取 {args.repeat} 次的中位数")
+    for label, seconds in (('重启', restart_seconds), ('热加载（tokens 未变化）', noop_seconds), ('热加载', reload_seconds)):
+        print(f"{label:<18} {sorted(seconds)[len(seconds) // 2] * 1000:>10.2f} ms")
+    print(f"热加载: 新增 {len(added)}、移除 {len(removed)}、修改 {len(changed)}，"
+          f"保留原状态的 token {kept}/{len(monitor.tokens)}（重启后为 0）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""端到端回放基准：真实的 Monitor 轮询本地桩网关，得到可重复的性能基线
+
+桩网关和 webhook 运行在子进程中，按 token 回放预先生成并压缩好的快照版本（节点数、每节点 session 数、
+每个版本的变化比例均可配置）。被测进程运行完整的调度→获取→比较→通知→持久化循环，结束后报告：
+各阶段耗时（平均/p50/p95）、每秒完成的检查轮数、峰值 RSS 和发出的通知数。
+运行: bless-monitor bench replay [--tokens 10] [--nodes 1000] [--change-rate 0.01] [--seconds 30]
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from .stubs import serve_stubs
+from ..config import validate
+from ..engine import Monitor
+from ..metrics import DECOMPRESS_SECONDS, DIFF_SECONDS, FETCH_SECONDS, PARSE_SECONDS, WEBHOOK_SEND_SECONDS
+from ..notify_queue import get_notification_queue
+
+
+def current_rss_mb():
+    """当前常驻内存（MB）"""
+    with open('/proc/self/statm') as fp:
+        return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def peak_rss_mb():
+    """进程启动以来的峰值常驻内存（MB）；Linux 上 ru_maxrss 单位为 KB，macOS 上为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float('nan')
+
+
+async def run(args, gateway_url, webhook_url, workdir):
+    config = validate({
+        'api_url': gateway_url,
+        'tokens': [{'name': f"Token{i}", 'token': f"token{i}"} for i in range(args.tokens)],
+        'webhook_url': webhook_url,
+        'webhook_rate_per_minute': 60000,
+        'interval': args.interval, 'min_interval': args.interval, 'max_interval': args.interval,
+        'jitter': 0, 'requests_per_second': 0, 'max_concurrency': args.max_concurrency,
+        'always_notify': args.always_notify,
+        'process_pool_workers': args.process_pool_workers,
+        'state_db_path': os.path.join(workdir, 'state.db') if workdir else '',
+        'history_dir': os.path.join(workdir, 'history') if workdir else '',
+    })
+    monitor = Monitor(config)
+    fetch_times, process_times = [], []
+    fetch_with_retry, check = monitor.fetch_with_retry, monitor.check
+
+    async def timed_fetch(state, now):
+        start = time.perf_counter()
+        try:
+            return await fetch_with_retry(state, now)
+        finally:
+            fetch_times.append(time.perf_counter() - start)
+
+    async def timed_check(state):
+        start = time.perf_counter()
+        await check(state)
+        process_times.append(time.perf_counter() - start - fetch_times[-1])
+
+    monitor.fetch_with_retry = timed_fetch
+    monitor.check = timed_check
+    await monitor.start(serve_metrics=False)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    runner = asyncio.create_task(monitor.run())
+    await asyncio.sleep(args.seconds)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    elapsed = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    dispatcher = get_notification_queue()
+    await monitor.close()
+    return {
+        'fetch': sorted(fetch_times),
+        'process': sorted(process_times),
+        'elapsed': elapsed,
+        'cpu': cpu,
+        'notify': dispatcher.stats['wechat'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=10)
+    parser.add_argument('--nodes', type=int, default=1000, help='每个 token 的节点数')
+    parser.add_argument('--sessions', type=int, default=2, help='每个节点的 session 数')
+    parser.add_argument('--change-rate', type=float, default=0.01, help='相邻版本之间被修改的节点比例')
+    parser.add_argument('--versions', type=int, default=20, help='预先生成的快照版本数')
+    parser.add_argument('--encoding', default='zstd', choices=('zstd', 'gzip', 'identity'))
+    parser.add_argument('--interval', type=float, default=1)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--max-concurrency', type=int, default=10)
+    parser.add_argument('--process-pool-workers', type=int, default=0)
+    parser.add_argument('--always-notify', action='store_true', help='每轮都发送状态报告')
+    parser.add_argument('--webhook-delay', type=float, default=0.05, help='webhook 每次响应的延迟（秒）')
+    parser.add_argument('--no-persist', action='store_true', help='不写状态数据库和历史数据')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    server = context.Process(target=serve_stubs, daemon=True, args=(
+        child_conn, args.nodes, args.sessions, args.versions, args.change_rate, args.encoding, args.webhook_delay
+    ))
+    server.start()
+    gateway_url, webhook_url, body_size = conn.recv()
+
+    baseline = current_rss_mb()
+    with contextlib.ExitStack() as stack:
+        workdir = None if args.no_persist else stack.enter_context(tempfile.TemporaryDirectory())
+        # 监控本身的逐轮输出写到 /dev/null，避免终端输出成为瓶颈
+        stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        result = asyncio.run(run(args, gateway_url, webhook_url, workdir))
+    conn.send('stop')
+    served = conn.recv()
+    server.join()
+
+    checks = len(result['process'])
+    print(f"{args.tokens} token × {args.nodes} 节点 × {args.sessions} session，变化比例 {args.change_rate:g}，"
+          f"{args.encoding} 响应 {body_size / 1024:.0f} KB，周期 {args.interval:g}s，运行 {result['elapsed']:.1f}s")
+    print(f"\n{'阶段':<16} {'次数':>6} {'平均ms':>9} {'p50ms':>9} {'p95ms':>9}")
+
+    def row(label, summary):
+        if summary:
+            count, mean, p50, p95 = summary
+            print(f"{label:<16} {count:>6} {mean * 1000:>9.2f} {p50 * 1000:>9.2f} {p95 * 1000:>9.2f}")
+
+    def measured(values):
+        return len(values), sum(values) / len(values), percentile(values, 0.5), percentile(values, 0.95)
+
+    # 直方图的分位数是分桶上界，fetch/process 两行为实测值
+    row('获取(含重试)', measured(result['fetch']) if result['fetch'] else None)
+    row('  请求+解压+解析*', FETCH_SECONDS.summary())
+    row('  解压*', DECOMPRESS_SECONDS.summary())
+    row('  解析*', PARSE_SECONDS.summary())
+    row('比较*', DIFF_SECONDS.summary())
+    row('汇总+通知+持久化', measured(result['process']) if result['process'] else None)
+    row('webhook 发送*', WEBHOOK_SEND_SECONDS.summary(backend='wechat'))
+    print("  * 来自运行指标直方图，分位数为所在分桶的上界")
+
+    print(f"\n完成检查: {checks} 轮，{checks / result['elapsed']:.1f} 轮/秒"
+          f"（目标 {args.tokens / args.interval:.1f} 轮/秒），CPU {result['cpu'] / result['elapsed']:.0%}")
+    notify = result['notify']
+    print(f"网关请求: {served['gateway_requests']}，通知: 提交 {notify['submitted'] + notify['deduplicated']} 条，"
+          f"去重 {notify['deduplicated']} 条，发出 {notify['sent']} 条（超长消息分段发送），webhook 收到 {served['alerts']} 条")
+    print(f"RSS: 启动前 {baseline:.1f} MB，峰值 {peak_rss_mb():.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""每轮汇总与消息生成的开销：旧版各处分别求和 vs fleet.FleetStats 单次遍历
+
+旧版每轮：打印统计 3 次遍历 + 指标 3 次 + 离线判断 2 次 + 报告 2~3 次，逐行拼接消息；
+新版每轮：FleetStats 遍历一次（奖励增量取自比较结果），日志、指标和消息都读取它，按模板渲染。
+运行: bless-monitor bench report [--sizes 1000,10000,100000]
+"""
+import argparse
+import time
+
+from .synthetic import make_nodes, mutate_nodes
+from ..fleet import FleetStats
+from ..node_diff import diff_states
+from ..messages import build_offline_status_message, build_status_message, summary_fields
+from ..snapshot import take_snapshot
+
+
+def legacy_cycle(current, changes, show_detail):
+    """旧版一轮中与汇总相关的全部遍历（print_summary、observe_snapshot、离线判断、消息）"""
+    lines = []
+    # print_summary
+    total_reward = sum(node.total_reward for node in current.values())
+    total_today_reward = sum(node.today_reward for node in current.values())
+    online_nodes = sum(1 for node in current.values() if node.is_connected)
+    lines.append(f"总节点数量: {len(current)} 在线: {online_nodes} 总奖励: {total_reward} 今日: {total_today_reward}")
+    # observe_snapshot
+    metrics = (
+        sum(1 for node in current.values() if node.is_connected),
+        sum(node.total_reward for node in current.values()),
+        sum(node.today_reward for node in current.values()),
+    )
+    # build_notification / adjust_interval
+    offline_nodes = [node for node in current.values() if not node.is_connected]
+    any(not node.is_connected for node in current.values())
+    # build_offline_status_message
+    message_lines = [
+        f"  • 节点总数: {len(current)}",
+        f"  • 总奖励: {sum(node.total_reward for node in current.values())}",
+        f"  • 今日奖励: {sum(node.today_reward for node in current.values())}",
+    ]
+    for node in offline_nodes:
+        message_lines.extend([
+            f"  • 节点: ...{node.pub_key[-6:]}",
+            f"    奖励: {node.total_reward} / 今日: {node.today_reward}"
+        ])
+    # build_status_message
+    status_lines = [
+        f"  • 总奖励: {sum(node.total_reward for node in current.values())}",
+        f"  • 今日奖励: {sum(node.today_reward for node in current.values())}",
+        f"  • 在线节点: {sum(1 for node in current.values() if node.is_connected)}",
+    ]
+    if show_detail:
+        for node in current.values():
+            status_lines.extend([
+                f"  • 节点: ...{node.pub_key[-6:]} {'✅' if node.is_connected else '❌'}",
+                f"    奖励: {node.total_reward} / 今日: {node.today_reward}"
+            ])
+    return metrics, "\n".join(message_lines), "\n".join(status_lines)
+
+
+def fleet_cycle(current, changes, show_detail):
+    """新版：一次汇总，日志、指标和消息共用"""
+    stats = FleetStats(current, changes)
+    summary = summary_fields(stats)
+    metrics = (stats.online, stats.total_reward, stats.today_reward)
+    offline = build_offline_status_message(stats, 8) if stats.offline else None
+    status = build_status_message(stats, 8, show_detail)
+    return metrics, summary, offline, status
+
+
+def best_of(func, repeat, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'节点数':>8} {'明细':>4} {'旧版(ms)':>10} {'新版(ms)':>10} {'加速比':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        nodes = make_nodes(size, sessions=0)
+        current = take_snapshot(mutate_nodes(nodes))
+        changes = diff_states(take_snapshot(nodes), current)
+        for show_detail in (False, True):
+            legacy = best_of(legacy_cycle, args.repeat, current, changes, show_detail)
+            fleet = best_of(fleet_cycle, args.repeat, current, changes, show_detail)
+            print(f"{size:>8} {'是' if show_detail else '否':>4} {legacy * 1000:>10.2f} {fleet * 1000:>10.2f} "
+                  f"{legacy / fleet:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""TokenScheduler 虚拟时钟模拟：数百个 token 长时间运行是否漂移、限流是否生效
+
+每个 token 的任务耗时随机（部分 token 明显偏慢），在虚拟时钟下运行若干小时，
+检查每个 token 的实际周期、相对计划时间的延迟是否随时间增长，以及并发/速率上限。
+运行: bless-monitor bench scheduler [--tokens 300] [--hours 24]
+"""
+import argparse
+import asyncio
+import random
+from collections import defaultdict
+
+from .simclock import run_simulated
+from ..scheduler import TokenScheduler, token_jitter
+
+
+async def simulate(tokens, hours, interval, max_concurrency, rps, slow_ratio):
+    scheduler = TokenScheduler(interval, max_concurrency=max_concurrency,
+                               requests_per_second=rps, jitter=0.1)
+    loop = asyncio.get_running_loop()
+    rng = random.Random(42)
+    starts = defaultdict(list)
+    in_flight = 0
+    peak_in_flight = 0
+    start_times = []
+
+    def make_job(name, slow):
+        async def job():
+            nonlocal in_flight, peak_in_flight
+            now = loop.time()
+            starts[name].append(now)
+            start_times.append(now)
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            try:
+                # 慢 token 的单次耗时达到周期的 20%~50%
+                await asyncio.sleep(rng.uniform(0.2, 0.5) * interval if slow else rng.uniform(0.2, 3.0))
+            finally:
+                in_flight -= 1
+        return job
+
+    for i in range(tokens):
+        name = f"Token{i}"
+        scheduler.add(name, make_job(name, rng.random() < slow_ratio))
+
+    runner = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(hours * 3600)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+    # 每个 token：实际启动时间相对计划时间的延迟（前 10% 轮次 vs 后 10% 轮次）
+    early, late, periods = [], [], []
+    for name, times in starts.items():
+        # 不含抖动的第 0 轮时间，用于从启动时间反推所属轮次
+        base = scheduler.due_time(name, 0) - token_jitter(name, 0, scheduler.jitter)
+        delays = []
+        for t in times:
+            cycle = int((t - base) // interval)
+            if cycle > 0 and scheduler.due_time(name, cycle) > t:
+                cycle -= 1
+            delays.append(t - scheduler.due_time(name, cycle))
+        tenth = max(1, len(delays) // 10)
+        early.append(max(delays[:tenth]))
+        late.append(max(delays[-tenth:]))
+        if len(times) > 1:
+            periods.append((times[-1] - times[0]) / (len(times) - 1))
+
+    start_times.sort()
+    worst_window = 0
+    j = 0
+    for i, t in enumerate(start_times):
+        while start_times[j] <= t - 1.0 + 1e-9:
+            j += 1
+        worst_window = max(worst_window, i - j + 1)
+
+    expected_cycles = hours * 3600 / interval
+    print(f"token 数: {tokens}, 模拟时长: {hours}h, 周期: {interval}s, 预期轮次: ~{expected_cycles:.0f}")
+    print(f"总执行次数: {len(start_times)}, 因上一轮未结束跳过: {scheduler.skipped}")
+    print(f"平均周期: min={min(periods):.3f}s max={max(periods):.3f}s（目标 {interval}s）")
+    print(f"最大启动延迟: 前10%轮次={max(early):.2f}s 后10%轮次={max(late):.2f}s")
+    print(f"并发峰值: {peak_in_flight}（上限 {max_concurrency}）, 任意1秒内最多启动: {worst_window}（上限 {rps}/s）")
+
+    drift_ok = max(late) <= max(early) + interval * 0.05
+    print("结论:", "无漂移" if drift_ok else "出现漂移")
+    return drift_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=300)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--interval', type=float, default=300)
+    parser.add_argument('--max-concurrency', type=int, default=10)
+    parser.add_argument('--rps', type=float, default=2)
+    parser.add_argument('--slow-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+    ok = run_simulated(simulate(args.tokens, args.hours, args.interval,
+                                args.max_concurrency, args.rps, args.slow_ratio))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""多进程分片的吞吐：同一批 token 分别由 1、2、4…个 worker 进程轮询本地桩网关，统计每秒完成的检查轮数
+
+桩网关和 webhook 运行在子进程中（stubs.serve_stubs，按 token 回放预先压缩好的快照版本）。检查周期设得很短，
+所有 token 的需求远超单个进程的处理能力，每秒完成的检查数即该 worker 数下的吞吐上限；
+理想情况下吞吐随 worker 数线性增长，直到用满 CPU 核数。
+最后杀掉一个 worker，报告它的 token 转给其余 worker 后恢复检查的耗时，以及重新拉起后 token 回到原 worker 的耗时。
+运行: bless-monitor bench shards [--tokens 200] [--nodes 1000] [--workers 1,2,4] [--seconds 10]
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from .stubs import serve_stubs
+from ..config import validate
+from ..supervisor import Supervisor
+
+
+@contextlib.contextmanager
+def silence_stdout():
+    """worker 子进程继承文件描述符 1，逐轮输出需要在描述符层面重定向到 /dev/null"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+async def wait_for(condition, timeout):
+    """等待 condition() 为真，返回耗时（秒），超时返回 None"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not condition():
+        if loop.time() - start > timeout:
+            return None
+        await asyncio.sleep(0.01)
+    return loop.time() - start
+
+
+def reported_since(supervisor, names, since):
+    return lambda: all(
+        name in supervisor.results and supervisor.results[name].checked_at >= since for name in names
+    )
+
+
+async def run_case(args, gateway_url, webhook_url, workers, kill):
+    config = validate({
+        'api_url': gateway_url,
+        'tokens': [{'name': f"Token{i}", 'token': f"token{i}"} for i in range(args.tokens)],
+        'webhook_url': webhook_url,
+        'webhook_rate_per_minute': 60000,
+        'interval': args.interval, 'min_interval': args.interval, 'max_interval': args.interval,
+        'jitter': 0, 'requests_per_second': 0, 'max_concurrency': args.max_concurrency * workers,
+        'always_notify': False, 'state_db_path': '', 'history_dir': '',
+        'workers': workers, 'worker_restart_delay': args.restart_delay,
+    })
+    supervisor = Supervisor(config)
+    result = {}
+    with silence_stdout():
+        await supervisor.start(serve_metrics=False)
+        try:
+            # 预热：等每个 token 都完成一轮（worker 启动、导入和首轮解析不计入）
+            await wait_for(reported_since(supervisor, supervisor.items, 0), 120)
+            checks, start = supervisor.checks, time.perf_counter()
+            await asyncio.sleep(args.seconds)
+            result['rate'] = (supervisor.checks - checks) / (time.perf_counter() - start)
+
+            if kill:
+                moved = list(supervisor.shards[0])
+                killed_at = time.time()
+                os.kill(supervisor.processes[0].pid, signal.SIGKILL)
+                result['moved'] = len(moved)
+                result['failover'] = await wait_for(reported_since(supervisor, moved, killed_at), 60)
+                restarted = lambda: supervisor.restarts and supervisor.shards.get(0) == moved
+                await wait_for(restarted, args.restart_delay + 30)
+                restarted_at = time.time()
+                result['restore'] = await wait_for(reported_since(supervisor, moved, restarted_at), 60)
+        finally:
+            await supervisor.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=200)
+    parser.add_argument('--nodes', type=int, default=1000, help='每个 token 的节点数')
+    parser.add_argument('--workers', default=None, help='逗号分隔的 worker 数，默认 1、2、4… 直到 CPU 核数')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=1)
+    parser.add_argument('--max-concurrency', type=int, default=10, help='每个 worker 的并发请求数')
+    parser.add_argument('--restart-delay', type=float, default=2)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(',')]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    server = context.Process(target=serve_stubs, daemon=True,
+                             args=(child_conn, args.nodes, 2, 20, 0.01, 'zstd', 0))
+    server.start()
+    gateway_url, webhook_url, body_size = conn.recv()
+
+    print(f"{args.tokens} token × {args.nodes} 节点，周期 {args.interval:g}s（需求 {args.tokens / args.interval:.0f} 轮/秒），"
+          f"zstd 响应 {body_size / 1024:.0f} KB，CPU 核数 {cpus}")
+    print(f"{'worker数':>8} {'检查轮/秒':>10} {'相对1个':>8} {'线性效率':>8}")
+    base = None
+    try:
+        for index, workers in enumerate(counts):
+            kill = index == len(counts) - 1 and workers > 1
+            result = asyncio.run(run_case(args, gateway_url, webhook_url, workers, kill))
+            base = base or result['rate'] / counts[0]
+            speedup = result['rate'] / base
+            print(f"{workers:>8} {result['rate']:>10.1f} {speedup:>7.2f}x {speedup / workers:>8.0%}")
+            if kill:
+                failover, restore = result['failover'], result['restore']
+                print(f"\n杀掉 worker 0：{result['moved']} 个 token 转给其余 worker，"
+                      f"{'未能' if failover is None else f'{failover:.2f}s 内'}全部恢复检查；"
+                      f"{args.restart_delay:g}s 后重新拉起，token 回到 worker 0 后"
+                      f"{'未能恢复' if restore is None else f' {restore:.2f}s 内恢复检查'}")
+        if cpus < max(counts):
+            print(f"\n注意: 本机只有 {cpus} 个 CPU 核，worker 数超过核数后吞吐不会继续增长")
+    finally:
+        conn.send('stop')
+        conn.recv()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""每个 token 保存上一轮状态的内存占用：deepcopy 原始数据 vs NodeSnapshot 快照
+
+运行: bless-monitor bench snapshot [--nodes 50000] [--sessions 3]
+"""
+import argparse
+import copy
+import gc
+import tracemalloc
+
+from .synthetic import make_nodes
+from ..snapshot import take_snapshot
+
+
+def measure(func, payload):
+    """返回 func(payload) 结果本身占用的内存（字节）以及过程中的峰值"""
+    gc.collect()
+    tracemalloc.start()
+    result = func(payload)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=50000)
+    parser.add_argument('--sessions', type=int, default=3)
+    args = parser.parse_args()
+
+    payload = make_nodes(args.nodes, sessions=args.sessions)
+
+    rows = [
+        ('deepcopy(current_state)', copy.deepcopy),
+        ('take_snapshot(current_state)', take_snapshot),
+    ]
+    print(f"合成数据: {args.nodes} 个节点, 每节点 {args.sessions} 个 session")
+    print(f"{'方式':<30} {'保留(MiB)':>10} {'峰值(MiB)':>10}")
+    for label, func in rows:
+        retained, peak = measure(func, payload)
+        print(f"{label:<30} {retained / 2**20:>10.1f} {peak / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
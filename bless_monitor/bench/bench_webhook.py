@@ -0,0 +1,73 @@
+"""webhook 发送基准：每条消息新建 ClientSession vs 共享连接池
+
+模拟每轮按 token 并发发送告警，统计握手次数和发送延迟 p50/p99。
+运行: bless-monitor bench webhook [--tokens 20] [--cycles 10]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import aiohttp
+
+from .stubs import WebhookStub
+from ..notifiers import WeChatNotifier
+
+
+class LegacyNotifier:
+    """旧版实现：每条消息新建一个 ClientSession"""
+
+    def __init__(self, url):
+        self.url = url
+
+    async def send(self, content):
+        payload = {"msgtype": "text", "text": {"content": content}}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(self.url, json=payload) as response:
+                await response.text()
+
+    async def close(self):
+        pass
+
+
+async def timed_send(notifier, message, latencies):
+    start = time.perf_counter()
+    await notifier.send(message)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_case(notifier_class, tokens, cycles):
+    stub = await WebhookStub().start()
+    notifier = notifier_class(stub.url)
+    latencies = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for cycle in range(cycles):
+                await asyncio.gather(*(
+                    timed_send(notifier, f"【Token{i}】cycle {cycle}", latencies)
+                    for i in range(tokens)
+                ))
+    finally:
+        await notifier.close()
+        await stub.stop()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return stub.connections, len(stub.messages), p50, p99
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--cycles', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'方式':<24} {'消息数':>6} {'连接数':>6} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for label, notifier_class in (('每条消息新建会话', LegacyNotifier), ('共享连接池', WeChatNotifier)):
+        connections, messages, p50, p99 = await run_case(notifier_class, args.tokens, args.cycles)
+        print(f"{label:<24} {messages:>6} {connections:>6} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
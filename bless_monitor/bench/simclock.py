@@ -0,0 +1,42 @@
+"""虚拟时钟事件循环：没有就绪任务时直接把时间快进到下一个定时器，不真正等待
+
+仅适用于不做真实网络 I/O 的模拟场景。
+"""
+import asyncio
+
+
+class _FastForwardSelector:
+    def __init__(self, loop, selector):
+        self._loop = loop
+        self._selector = selector
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("模拟事件循环中没有待执行的定时器，任务可能死锁")
+        if timeout > 0:
+            self._loop.virtual_time += timeout
+        return self._selector.select(0)
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class SimulatedEventLoop(asyncio.SelectorEventLoop):
+    """loop.time() 返回虚拟时间的事件循环"""
+
+    def __init__(self):
+        super().__init__()
+        self.virtual_time = 0.0
+        self._selector = _FastForwardSelector(self, self._selector)
+
+    def time(self):
+        return self.virtual_time
+
+
+def run_simulated(coro):
+    """在虚拟时钟事件循环中运行协程"""
+    loop = SimulatedEventLoop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
@@ -0,0 +1,225 @@
+"""基准测试用的本地桩服务"""
+import asyncio
+import time
+
+from aiohttp import web
+
+
+class WebhookStub:
+    """模拟企业微信 webhook：记录收到的消息、到达时间和建立的 TCP 连接数
+
+    delay 为每个请求的响应延迟（秒），status 不为 200 时只记录请求并返回该状态码。
+    """
+
+    def __init__(self, delay=0, status=200):
+        self.delay = delay
+        self.status = status
+        self.messages = []
+        self.received_at = []
+        self.requests = 0
+        self._transports = set()
+        self._runner = None
+        self.url = None
+
+    @property
+    def connections(self):
+        """服务端累计接受的连接数（每个连接对应一次 TCP/TLS 握手）"""
+        return len(self._transports)
+
+    async def _handle(self, request):
+        self._transports.add(request.transport)
+        self.requests += 1
+        payload = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status, text="stub error")
+        self.messages.append(payload)
+        self.received_at.append(time.perf_counter())
+        return web.json_response({"errcode": 0, "errmsg": "ok"})
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_post('/cgi-bin/webhook/send', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}/cgi-bin/webhook/send?key=bench"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class GatewayStub:
+    """模拟 Bless 网关 /api/v1/nodes：返回按指定编码压缩的节点数组"""
+
+    def __init__(self, nodes, encoding='zstd', chunk_size=16 * 1024, etag=False):
+        self.nodes = nodes
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.etag = etag  # 是否返回 ETag 并支持 If-None-Match
+        self.requests = 0
+        self.not_modified = 0
+        self._transports = set()
+        self._version = 0
+        self._body = None
+        self._runner = None
+        self.url = None
+
+    @property
+    def connections(self):
+        """服务端累计接受的连接数"""
+        return len(self._transports)
+
+    def set_nodes(self, nodes):
+        """替换返回的节点列表"""
+        self.nodes = nodes
+        self._version += 1
+        self._body = None
+
+    def encode_body(self):
+        """将当前节点列表编码为响应体"""
+        import gzip
+        import json
+        import zstandard as zstd
+
+        raw = json.dumps(self.nodes).encode()
+        if self.encoding == 'zstd':
+            return zstd.ZstdCompressor().compress(raw)
+        if self.encoding == 'gzip':
+            return gzip.compress(raw)
+        return raw
+
+    def body_for(self, request):
+        """本次请求返回的响应体"""
+        if self._body is None:
+            self._body = self.encode_body()
+        return self._body
+
+    async def _handle(self, request):
+        self.requests += 1
+        self._transports.add(request.transport)
+        body = self.body_for(request)
+        headers = {'Content-Type': 'application/json'}
+        if self.etag:
+            headers['ETag'] = f'"v{self._version}"'
+            if request.headers.get('If-None-Match') == headers['ETag']:
+                self.not_modified += 1
+                return web.Response(status=304, headers=headers)
+        response = web.StreamResponse(headers=headers)
+        if self.encoding != 'identity':
+            response.headers['Content-Encoding'] = self.encoding
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(body), self.chunk_size):
+            await response.write(body[start:start + self.chunk_size])
+        await response.write_eof()
+        return response
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_get('/api/v1/nodes', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}/api/v1/nodes"
+        self._body = self.encode_body()
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FaultyGatewayStub(GatewayStub):
+    """按请求中的 token 注入故障的网关
+
+    faults 为 {token: 模式}，模式：
+    hang 不返回响应；stall 返回部分响应体后停住；reset 直接断开连接；
+    auth 始终 401；flaky 前 fail_times 次返回 503；ratelimit 前 fail_times 次返回 429（Retry-After: 1）。
+    其他 token 正常返回。requests_by_token 记录每个 token 的请求次数。
+    """
+
+    def __init__(self, nodes, faults, fail_times=2, **kwargs):
+        super().__init__(nodes, **kwargs)
+        self.faults = faults
+        self.fail_times = fail_times
+        self.requests_by_token = {}
+
+    async def _handle(self, request):
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        count = self.requests_by_token[token] = self.requests_by_token.get(token, 0) + 1
+        mode = self.faults.get(token)
+        if mode == 'hang':
+            await asyncio.sleep(3600)
+        elif mode == 'stall':
+            response = web.StreamResponse(headers={'Content-Type': 'application/json'})
+            await response.prepare(request)
+            await response.write(b'[{"_id": "')
+            await asyncio.sleep(3600)
+        elif mode == 'reset':
+            request.transport.close()
+            return web.Response()
+        elif mode == 'auth':
+            return web.Response(status=401, text='{"error": "invalid token"}')
+        elif mode == 'flaky' and count <= self.fail_times:
+            return web.Response(status=503, text='service unavailable')
+        elif mode == 'ratelimit' and count <= self.fail_times:
+            return web.Response(status=429, text='too many requests', headers={'Retry-After': '1'})
+        return await super()._handle(request)
+
+
+class ReplayGatewayStub(GatewayStub):
+    """按 token 回放一串快照版本的网关
+
+    预先生成 versions 个版本：每个版本在上一个的基础上按 change_rate 比例修改节点（见 synthetic.mutate_nodes），
+    并压缩好响应体。每个 token 第 n 次请求得到第 n 个版本，到末尾后从头循环。
+    """
+
+    def __init__(self, nodes, versions=20, change_rate=0.01, **kwargs):
+        from .synthetic import mutate_nodes
+
+        super().__init__(nodes, **kwargs)
+        self.bodies = []
+        for version in range(versions):
+            if version:
+                nodes = mutate_nodes(nodes, change_rate, seed=version)
+            self.nodes = nodes
+            self.bodies.append(self.encode_body())
+        self.requests_by_token = {}
+
+    def body_for(self, request):
+        token = request.headers.get('Authorization', '')
+        count = self.requests_by_token.get(token, 0)
+        self.requests_by_token[token] = count + 1
+        return self.bodies[count % len(self.bodies)]
+
+
+def serve_stubs(conn, nodes, sessions, versions, change_rate, encoding, webhook_delay):
+    """在子进程中运行 ReplayGatewayStub 和 WebhookStub，使桩服务的 CPU 和内存不计入被测进程
+
+    启动后通过 conn 发送 (网关地址, webhook 地址)；收到任意消息后停止，并回传统计信息。
+    """
+    from .synthetic import make_nodes
+
+    async def main():
+        gateway = await ReplayGatewayStub(make_nodes(nodes, sessions), versions, change_rate,
+                                          encoding=encoding).start()
+        webhook = await WebhookStub(delay=webhook_delay).start()
+        conn.send((gateway.url, webhook.url, len(gateway.bodies[0])))
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        await gateway.stop()
+        await webhook.stop()
+        conn.send({
+            'gateway_requests': gateway.requests,
+            'webhook_requests': webhook.requests,
+            'alerts': len(webhook.messages),
+        })
+
+    asyncio.run(main())
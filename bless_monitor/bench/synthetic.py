@@ -0,0 +1,41 @@
+"""基准测试用的合成节点数据"""
+import random
+
+
+def make_nodes(count, sessions=2, seed=0):
+    """生成 count 个与网关返回格式一致的节点"""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        node_id = f"{i:024x}"
+        nodes.append({
+            '_id': node_id,
+            'pubKey': f"12D3KooW{rng.getrandbits(160):040x}",
+            'isConnected': rng.random() > 0.05,
+            'totalReward': rng.randint(0, 100000),
+            'todayReward': rng.randint(0, 1000),
+            'sessions': [
+                {
+                    '_id': f"{node_id}-{j}",
+                    'nodeId': node_id,
+                    'startAt': f"2024-11-{1 + j % 28:02d}T00:00:00.000Z",
+                }
+                for j in range(sessions)
+            ],
+        })
+    return nodes
+
+
+def mutate_nodes(nodes, rate=0.01, seed=1):
+    """复制节点列表，并按 rate 比例随机修改奖励/在线状态"""
+    rng = random.Random(seed)
+    mutated = []
+    for node in nodes:
+        if rng.random() < rate:
+            node = dict(node)
+            node['todayReward'] += rng.randint(1, 10)
+            node['totalReward'] += rng.randint(1, 10)
+            if rng.random() < 0.2:
+                node['isConnected'] = not node['isConnected']
+        mutated.append(node)
+    return mutated
@@ -0,0 +1,82 @@
+"""命令行入口：bless-monitor run|once|bench
+
+重量级依赖（aiohttp、zstandard 等）只在实际执行命令时导入，--help 和配置校验错误能立即返回。
+"""
+import argparse
+import asyncio
+import os
+import pkgutil
+import runpy
+import sys
+
+DEFAULT_CONFIG = 'config.toml'
+BENCH_PREFIX = 'bench_'
+
+
+def _bench_names():
+    from . import bench
+    return sorted(
+        name[len(BENCH_PREFIX):]
+        for _, name, _ in pkgutil.iter_modules(bench.__path__)
+        if name.startswith(BENCH_PREFIX)
+    )
+
+
+def run_bench(name, args):
+    """以 __main__ 方式运行 bench 包中的 bench_<name> 脚本"""
+    names = _bench_names()
+    if name not in names:
+        if name:
+            print(f"未知的基准测试: {name}", file=sys.stderr)
+        print(f"可用的基准测试: {', '.join(names)}")
+        return 0 if name is None else 2
+    sys.argv = [f"bless-monitor bench {name}"] + list(args)
+    runpy.run_module(f"{__package__}.bench.{BENCH_PREFIX}{name}", run_name='__main__', alter_sys=True)
+    return 0
+
+
+def run(config_path, once):
+    from .config import ConfigError, load_config, logging_options
+    from .logs import start_logging, stop_logging
+
+    try:
+        config = load_config(config_path)
+    except ConfigError as e:
+        print(f"配置错误:\n{e}", file=sys.stderr)
+        return 2
+
+    if config.workers and not once:
+        # 多进程分片；once 只检查一轮，仍在单进程内完成
+        from .supervisor import run_supervisor
+        monitor = run_supervisor(config, config_path)
+    else:
+        from .engine import run_monitor
+        monitor = run_monitor(config, once=once, config_path=config_path)
+
+    start_logging(**logging_options(config))
+    try:
+        asyncio.run(monitor)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_logging()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bless-monitor', description='Bless 网络节点监控')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('run', '持续监控所有 token'), ('once', '所有 token 各检查一轮后退出')):
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument(
+            '-c', '--config', default=os.environ.get('BLESS_MONITOR_CONFIG', DEFAULT_CONFIG),
+            help=f'配置文件路径（.toml/.yaml），默认取环境变量 BLESS_MONITOR_CONFIG 或 {DEFAULT_CONFIG}'
+        )
+    bench_parser = commands.add_parser('bench', help='运行基准测试，不带名称时列出全部')
+    bench_parser.add_argument('name', nargs='?')
+    bench_parser.add_argument('args', nargs=argparse.REMAINDER, help='传给基准测试脚本的参数')
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        return run_bench(args.name, args.args)
+    return run(args.config, once=args.command == 'once')
@@ -0,0 +1,299 @@
+"""配置加载：读取 TOML/YAML 配置文件，校验字段类型和取值，返回带默认值的配置对象
+
+单 token 可直接写 api_token；多 token 写 [[tokens]] 列表。单 token 等价于一个名为 default 的 token。
+min_interval、max_interval 均等于 interval 时轮询周期固定（默认如此，两者都未配置时随 interval 取值）。
+"""
+import inspect
+import os
+from types import SimpleNamespace
+
+from .logs import FORMATS, LEVELS
+
+DEFAULT_API_URL = "https://gateway-run.bls.dev/api/v1/nodes"
+
+# 可在单个 token 中覆盖的周期字段
+TOKEN_INTERVAL_KEYS = ('interval', 'min_interval', 'max_interval')
+
+# 字段: (允许的类型, 默认值)
+SCHEMA = {
+    'api_url': (str, DEFAULT_API_URL),
+    'api_token': (str, ''),  # 单 token 写法
+    'tokens': (list, []),  # [{'name': ..., 'token': ...}, ...]，可单独设置 interval/min_interval/max_interval
+    'interval': ((int, float), 300),  # 每个 token 的基础检查周期（秒）
+    'min_interval': ((int, float), 300),  # 节点上下线/抖动时缩短到的周期，未配置时等于 interval
+    'max_interval': ((int, float), 300),  # 快照持续不变时逐步放宽到的周期，未配置时等于 interval
+    'interval_backoff': ((int, float), 1.5),  # 每轮放宽的倍数
+    'time_offset': ((int, float), 8),  # 消息中时间的时区偏移（小时）
+    'always_notify': (bool, True),  # 无变化时也发送状态报告
+    'show_detail': (bool, False),  # 状态报告中列出每个节点
+    'long_session_hours': ((int, float), 24),  # session 连续运行满该时长时通知一次，0 表示不检测
+    'reward_rate_halflife': ((int, float), 3600),  # 每小时奖励估计的半衰期（秒），越小越贴近最近的收益
+    'underperform_ratio': ((int, float), 0.5),  # 速率低于节点中位数的该比例时列为低收益节点，0 表示不判定
+    'offline_confirm_samples': (int, 2),  # 连续该次数采样离线才确认离线并告警，1 表示不做迟滞
+    'online_confirm_samples': (int, 2),  # 连续该次数采样在线才确认恢复
+    'flap_decay': ((int, float), 0.9),  # 抖动分数每次采样的衰减系数，每次上下线翻转加 1
+    'flap_start_score': ((int, float), 4),  # 抖动分数达到该值时进入抖动状态（暂停该节点的上下线变化通知），0 表示不检测
+    'flap_stop_score': ((int, float), 1),  # 抖动分数衰减到该值以下时退出抖动状态
+    'debug_output': (bool, False),  # 以 debug 级别记录响应头和每个节点的详情
+    'log_level': (str, 'info'),  # debug/info/warning/error
+    'log_format': (str, 'json'),  # json（每行一个 JSON 对象）或 text
+    'log_file': (str, ''),  # 空字符串表示写到 stdout
+    'log_max_bytes': (int, 0),  # 日志文件超过该字节数时轮转，0 表示不轮转
+    'log_backup_count': (int, 5),  # 轮转时保留的旧文件数
+    'webhook_url': (str, ''),  # 企业微信 webhook，作为第一个通知渠道
+    'webhook_rate_per_minute': ((int, float), 20),
+    'notifiers': (list, []),  # 额外的通知渠道，见 notifiers.NOTIFIER_TYPES
+    'use_proxy': (bool, False),
+    'proxy_url': (str, 'http://localhost:7890'),
+    'connect_timeout': ((int, float), 10),  # 连接网关的超时（秒）
+    'read_timeout': ((int, float), 30),  # 两次读到响应数据之间的最长间隔（秒）
+    'request_timeout': ((int, float), 120),  # 单次请求（含读完响应体）的总超时（秒）
+    'keepalive_timeout': ((int, float), 120),  # 与网关的空闲连接保持多久（秒），相邻两次请求间隔更短时复用连接
+    'fetch_retries': (int, 3),  # 429/5xx/网络错误/超时的重试次数
+    'retry_base_delay': ((int, float), 1),  # 首次重试前的等待（秒），之后指数翻倍并加随机抖动
+    'retry_max_delay': ((int, float), 30),
+    'breaker_threshold': (int, 5),  # 连续失败多少轮后暂停该 token
+    'breaker_reset_timeout': ((int, float), 300),  # 连续失败暂停的时长（秒），再次失败时翻倍
+    'auth_reset_timeout': ((int, float), 3600),  # 401/403 后暂停的时长（秒）
+    'max_concurrency': (int, 10),  # 同时进行的请求数上限（多进程分片时为各 worker 合计）
+    'requests_per_second': ((int, float), 2),  # 全局每秒请求数上限，0 表示不限制（多进程分片时为各 worker 合计）
+    'jitter': ((int, float), 0.1),  # 每轮执行时间的抖动范围（占 interval 的比例）
+    'process_pool_workers': (int, 0),  # 大于 0 时在子进程中解压、解析和比较
+    'state_db_path': (str, 'state.db'),  # 空字符串表示不持久化
+    'history_dir': (str, 'history'),  # 空字符串表示不记录历史
+    'workers': (int, 0),  # 大于 0 时按 token 分片到多个 worker 进程运行（见 supervisor.py）
+    'worker_restart_delay': ((int, float), 5),  # worker 退出后重新拉起前等待的秒数
+    'config_reload_interval': ((int, float), 5),  # 每隔多少秒检查配置文件是否变化（见 reload.py），0 表示只响应 SIGHUP
+    'metrics_host': (str, '127.0.0.1'),
+    'metrics_port': (int, 9108),  # 0 表示不启动指标服务
+    'api_host': (str, '127.0.0.1'),
+    'api_port': (int, 0),  # 查询接口（见 api.py）的端口，0 表示不启动
+    'node_metrics': (bool, False),  # 按节点输出 session 运行时长指标（节点多时序列数很大）
+}
+
+
+class ConfigError(ValueError):
+    """配置文件缺失、无法解析或校验失败"""
+
+
+def _read_file(path):
+    """按扩展名解析 TOML 或 YAML 文件，返回字典"""
+    if not os.path.exists(path):
+        raise ConfigError(f"配置文件不存在: {path}")
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as fp:
+            try:
+                return tomllib.load(fp)
+            except tomllib.TOMLDecodeError as e:
+                raise ConfigError(f"{path}: {e}") from e
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ConfigError("读取 YAML 配置需要先安装 PyYAML：pip install 'bless-network-monitor[yaml]'")
+        with open(path, encoding='utf-8') as fp:
+            try:
+                return yaml.safe_load(fp) or {}
+            except yaml.YAMLError as e:
+                raise ConfigError(f"{path}: {e}") from e
+    raise ConfigError(f"不支持的配置文件格式: {path}（应为 .toml、.yaml 或 .yml）")
+
+
+def _check_type(key, value, types, errors):
+    # bool 是 int 的子类，数值字段不接受 true/false
+    if isinstance(value, bool) and types is not bool:
+        errors.append(f"{key} 应为数值，实际为 {value!r}")
+        return False
+    if not isinstance(value, types):
+        expected = types.__name__ if isinstance(types, type) else '/'.join(t.__name__ for t in types)
+        errors.append(f"{key} 应为 {expected}，实际为 {value!r}")
+        return False
+    return True
+
+
+def _fit_bounds(intervals, given, fixed=False):
+    """补全未显式配置的上下限：fixed 为 True（未启用自适应）时等于 interval；
+    否则随 interval 放宽，例如只把 interval 改成 3600 时不必同时修改 max_interval
+    """
+    if 'min_interval' not in given:
+        intervals['min_interval'] = intervals['interval'] if fixed else min(intervals['min_interval'],
+                                                                            intervals['interval'])
+    if 'max_interval' not in given:
+        intervals['max_interval'] = intervals['interval'] if fixed else max(intervals['max_interval'],
+                                                                            intervals['interval'])
+    return intervals
+
+
+def _check_intervals(prefix, intervals, errors):
+    interval, min_interval, max_interval = (intervals[key] for key in TOKEN_INTERVAL_KEYS)
+    if min(intervals.values()) <= 0:
+        errors.append(f"{prefix}interval/min_interval/max_interval 必须大于 0")
+    elif not min_interval <= interval <= max_interval:
+        errors.append(f"{prefix}应满足 min_interval <= interval <= max_interval")
+
+
+def _validate_tokens(values, errors):
+    tokens = list(values['tokens'])
+    if values['api_token']:
+        tokens.insert(0, {'name': 'default', 'token': values['api_token']})
+    if not tokens:
+        errors.append("至少需要配置一个 token（api_token 或 [[tokens]]）")
+
+    result = []
+    names = set()
+    for i, item in enumerate(tokens):
+        if not isinstance(item, dict):
+            errors.append(f"tokens[{i}] 应为包含 name 和 token 的表")
+            continue
+        name, token = item.get('name'), item.get('token')
+        if not isinstance(name, str) or not name:
+            errors.append(f"tokens[{i}].name 不能为空")
+        elif name in names:
+            errors.append(f"tokens[{i}].name 重复: {name}")
+        if not isinstance(token, str) or not token:
+            errors.append(f"tokens[{i}].token 不能为空")
+        unknown = set(item) - {'name', 'token'} - set(TOKEN_INTERVAL_KEYS)
+        if unknown:
+            errors.append(f"tokens[{i}] 包含未知字段: {', '.join(sorted(unknown))}")
+        intervals = {}
+        for key in TOKEN_INTERVAL_KEYS:
+            value = item.get(key, values[key])
+            intervals[key] = value if _check_type(f"tokens[{i}].{key}", value, (int, float), errors) else values[key]
+        if any(key in item for key in TOKEN_INTERVAL_KEYS):
+            fixed = values['min_interval'] == values['max_interval']
+            _check_intervals(f"tokens[{i}] ", _fit_bounds(intervals, item, fixed), errors)
+        names.add(name)
+        result.append({'name': name, 'token': token, **intervals})
+    return result
+
+
+def _notifier_signature(cls):
+    """通知渠道的构造参数：子类的显式参数加上经 **kwargs 转交给 Notifier 的参数，不接受其他参数"""
+    from .notifiers import Notifier
+
+    params = [p for p in inspect.signature(cls).parameters.values() if p.kind is not p.VAR_KEYWORD]
+    names = {p.name for p in params}
+    params += [p.replace(kind=p.KEYWORD_ONLY) for p in inspect.signature(Notifier).parameters.values()
+               if p.name not in names]
+    return inspect.Signature(params)
+
+
+def _validate_notifiers(values, errors):
+    from .notifiers import NOTIFIER_TYPES
+
+    for i, item in enumerate(values['notifiers']):
+        if not isinstance(item, dict) or 'type' not in item:
+            errors.append(f"notifiers[{i}] 应为包含 type 的表")
+            continue
+        options = dict(item)
+        kind = options.pop('type')
+        options.pop('use_proxy', None)
+        if kind not in NOTIFIER_TYPES:
+            errors.append(f"notifiers[{i}].type 未知: {kind}（可选 {', '.join(NOTIFIER_TYPES)}）")
+            continue
+        try:
+            _notifier_signature(NOTIFIER_TYPES[kind]).bind(**options)
+        except TypeError as e:
+            errors.append(f"notifiers[{i}]（{kind}）参数错误: {e}")
+
+
+def validate(data):
+    """校验配置字典并补全默认值，返回配置对象；有错误时一次性列出全部问题"""
+    if not isinstance(data, dict):
+        raise ConfigError("配置文件顶层应为键值表")
+    errors = []
+    unknown = set(data) - set(SCHEMA)
+    if unknown:
+        errors.append(f"未知的配置项: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for key, (types, default) in SCHEMA.items():
+        value = data.get(key, default)
+        values[key] = value if _check_type(key, value, types, errors) else default
+
+    # 自适应轮询默认关闭：bench adaptive 中 60~900 秒的自适应比固定 300 秒请求更多，检测延迟的 p95 和最大值也更差
+    values.update(_fit_bounds({key: values[key] for key in TOKEN_INTERVAL_KEYS}, data, fixed=True))
+    _check_intervals('', {key: values[key] for key in TOKEN_INTERVAL_KEYS}, errors)
+    if values['interval_backoff'] < 1:
+        errors.append("interval_backoff 不能小于 1")
+    for key in ('max_concurrency', 'webhook_rate_per_minute', 'connect_timeout', 'read_timeout',
+                'request_timeout', 'keepalive_timeout', 'retry_base_delay', 'retry_max_delay', 'breaker_threshold',
+                'breaker_reset_timeout', 'auth_reset_timeout', 'reward_rate_halflife',
+                'worker_restart_delay', 'log_backup_count'):
+        if values[key] <= 0:
+            errors.append(f"{key} 必须大于 0")
+    for key in ('requests_per_second', 'process_pool_workers', 'fetch_retries', 'long_session_hours', 'workers',
+                'log_max_bytes', 'config_reload_interval'):
+        if values[key] < 0:
+            errors.append(f"{key} 不能为负数")
+    if not 0 <= values['underperform_ratio'] <= 1:
+        errors.append("underperform_ratio 应在 [0, 1] 范围内")
+    for key in ('offline_confirm_samples', 'online_confirm_samples'):
+        if not 1 <= values[key] <= 255:
+            errors.append(f"{key} 应在 1~255 范围内")
+    if not 0 < values['flap_decay'] < 1:
+        errors.append("flap_decay 应在 (0, 1) 范围内")
+    if values['flap_start_score'] and not 0 < values['flap_stop_score'] < values['flap_start_score']:
+        errors.append("flap_stop_score 应大于 0 且小于 flap_start_score")
+    if values['log_level'] not in LEVELS:
+        errors.append(f"log_level 应为 {'/'.join(LEVELS)} 之一")
+    if values['log_format'] not in FORMATS:
+        errors.append(f"log_format 应为 {'/'.join(FORMATS)} 之一")
+    if not 0 <= values['jitter'] < 1:
+        errors.append("jitter 应在 [0, 1) 范围内")
+    for key in ('metrics_port', 'api_port'):
+        if not 0 <= values[key] <= 65535:
+            errors.append(f"{key} 应在 0~65535 范围内")
+
+    values['tokens'] = _validate_tokens(values, errors)
+    _validate_notifiers(values, errors)
+    if errors:
+        raise ConfigError("\n".join(f"  - {error}" for error in errors))
+    return SimpleNamespace(**values)
+
+
+def load_config(path):
+    """读取并校验配置文件"""
+    return validate(_read_file(path))
+
+
+def diff_tokens(old, new):
+    """比较两份 tokens 配置（名称 -> 配置项），返回 (新增, 移除, 修改) 的名称列表；修改指凭据或周期不同"""
+    added = [name for name in new if name not in old]
+    removed = [name for name in old if name not in new]
+    changed = [name for name, item in new.items() if name in old and old[name] != item]
+    return added, removed, changed
+
+
+def changed_settings(old, new):
+    """两份配置中除 tokens 以外取值不同的配置项（热加载时不应用）"""
+    return [key for key in SCHEMA if key not in ('tokens', 'api_token') and getattr(old, key) != getattr(new, key)]
+
+
+def notifier_configs(config):
+    """通知渠道配置列表：webhook_url 对应的企业微信渠道排在最前"""
+    configs = []
+    if config.webhook_url:
+        configs.append({
+            'type': 'wechat',
+            'url': config.webhook_url,
+            'rate_per_minute': config.webhook_rate_per_minute,
+            'use_proxy': config.use_proxy,
+        })
+    return configs + list(config.notifiers)
+
+
+def logging_options(config):
+    """logs.start_logging 的参数：debug_output 时按 debug 级别记录"""
+    return {
+        'level': 'debug' if config.debug_output else config.log_level,
+        'path': config.log_file,
+        'fmt': config.log_format,
+        'max_bytes': config.log_max_bytes,
+        'backup_count': config.log_backup_count,
+    }
@@ -0,0 +1,119 @@
+"""收益速率：按日清零的 todayReward 增量累计、每节点指数加权的每小时奖励和当日收益预测
+
+每个节点只保存两个数：上次今日奖励变化的时间和当时的速率估计，今日奖励本身取自上一轮快照，不回看历史数据。
+两次变化之间的间隔不固定，按时间衰减的指数加权平均更新：
+    rate = rate * exp(-dt / tau) + (1 - exp(-dt / tau)) * 增量 / dt
+没有变化的这段时间视为奖励为 0，读取速率时同样按已过去的时间衰减，停止获得奖励的节点速率会逐渐降到 0。
+"""
+import heapq
+import math
+import statistics
+from collections import namedtuple
+
+# 一个 token 本轮的收益汇总
+# rate/projected 为全部节点合计的每小时奖励和预计今日奖励，median 为已知速率节点的中位数（没有时为 None，此时前两项不可信），
+# underperformers 为速率低于 median * underperform_ratio 的节点中最低的几个 (节点快照, 速率)，underperforming 为其总数，
+# resets 为本轮今日奖励清零的节点数
+Earnings = namedtuple('Earnings', ['rate', 'projected', 'median', 'underperformers', 'underperforming', 'resets'])
+
+DAY = 86400
+# 报告中列出的低收益节点数上限
+MAX_UNDERPERFORMERS = 10
+
+
+def is_daily_reset(old, new):
+    """今日奖励变小即视为跨过了日界（接口每天清零 todayReward）"""
+    return new < old
+
+
+class _NodeRate:
+    __slots__ = ('updated', 'rate')
+
+    def __init__(self, updated, rate=None):
+        self.updated = updated  # 上次今日奖励变化（或开始跟踪）的 Unix 时间
+        self.rate = rate  # updated 时的每小时奖励估计，None 表示尚无观测
+
+
+class EarningsTracker:
+    """单个 token 的收益速率跟踪
+
+    halflife 为速率估计的半衰期（秒），underperform_ratio 为低收益判定的中位数比例（0 表示不判定）。
+    日界取最近一次观测到清零的时间，尚未观测到时按 UTC 零点。
+    """
+    __slots__ = ('tau', 'underperform_ratio', 'day_start', '_nodes')
+
+    def __init__(self, halflife=3600, underperform_ratio=0.5):
+        self.tau = halflife / math.log(2)
+        self.underperform_ratio = underperform_ratio
+        self.day_start = None
+        self._nodes = {}
+
+    def day_end(self, now):
+        """当前这一天结束的 Unix 时间"""
+        start = self.day_start if self.day_start is not None else now - now % DAY
+        return start + DAY * (1 + int((now - start) // DAY))
+
+    def observe(self, previous, current, now):
+        """用本轮快照更新各节点速率并返回 Earnings；previous 为上一轮快照（首轮为空），整体一次遍历"""
+        nodes, tau = self._nodes, self.tau
+        decay = {}  # 同一轮更新的节点共用 updated，衰减系数按 updated 缓存，避免逐节点计算 exp
+        rates, rated = [], []  # 已知速率及对应的节点 _id
+        total_rate = today_total = 0.0
+        resets = 0
+        for node_id, node in current.items():
+            today = node.today_reward
+            today_total += today
+            state = nodes.get(node_id)
+            prev_node = previous.get(node_id)
+            if state is None or prev_node is None:
+                nodes[node_id] = _NodeRate(now)
+                continue
+            old = prev_node.today_reward
+            if today != old:
+                dt = now - state.updated
+                if is_daily_reset(old, today):
+                    # 清零前最后一段的奖励无法得知，只计日界之后获得的部分
+                    resets += 1
+                    gained = today
+                else:
+                    gained = today - old
+                if dt > 0:
+                    sample = gained * 3600 / dt
+                    if state.rate is None:
+                        state.rate = sample
+                    else:
+                        weight = math.exp(-dt / tau)
+                        state.rate = state.rate * weight + (1 - weight) * sample
+                    state.updated = now
+                rate = state.rate
+            elif state.rate is None:
+                # 跟踪满一个 tau 仍没有变化，按 0 计入
+                rate = 0.0 if now - state.updated >= tau else None
+            else:
+                weight = decay.get(state.updated)
+                if weight is None:
+                    weight = decay[state.updated] = math.exp(-(now - state.updated) / tau)
+                rate = state.rate * weight
+            if rate is not None:
+                total_rate += rate
+                rates.append(rate)
+                rated.append(node_id)
+
+        if len(nodes) > len(current):
+            self._nodes = {node_id: state for node_id, state in nodes.items() if node_id in current}
+        if resets and (self.day_start is None or now - self.day_start > DAY / 2):
+            self.day_start = now
+
+        median = None
+        underperformers, underperforming = [], 0
+        if rates:
+            median = statistics.median(rates)  # 只排序浮点数，比按 (速率, _id) 元组排序快约 3 倍
+            if self.underperform_ratio and median > 0:
+                threshold = median * self.underperform_ratio
+                low = [(rate, node_id) for rate, node_id in zip(rates, rated) if rate < threshold]
+                underperforming = len(low)
+                underperformers = [
+                    (current[node_id], rate) for rate, node_id in heapq.nsmallest(MAX_UNDERPERFORMERS, low)
+                ]
+        projected = today_total + total_rate * (self.day_end(now) - now) / 3600
+        return Earnings(total_rate, projected, median, underperformers, underperforming, resets)
@@ -0,0 +1,453 @@
+"""监控引擎：每个 token 按各自的周期独立调度 获取→比较→通知→持久化，单 token 即 N=1 的情况"""
+import asyncio
+import functools
+import signal
+import time
+
+from .adaptive import AdaptiveInterval
+from .api import get_query_api, start_api_server, stop_api_server
+from .config import TOKEN_INTERVAL_KEYS, diff_tokens, notifier_configs
+from .earnings import EarningsTracker
+from .fetch import FetchCache, create_fetch_session, fetch_nodes_data
+from .flaps import FlapDetector
+from .fleet import FleetStats
+from .history import close_history, get_history
+from .logs import logger, set_token
+from .messages import build_change_message, build_offline_status_message, build_status_message, summary_fields
+from .metrics import (
+    CIRCUIT_OPEN, DIFF_SECONDS, FETCH_ERRORS, FETCH_RETRIES, POLL_INTERVAL, observe_snapshot,
+    remove_token_series, start_metrics_server, stop_metrics_server
+)
+from .node_diff import diff_states, long_session_changes
+from .notifiers import build_notifiers
+from .notify_queue import get_notification_queue, start_notification_queue, stop_notification_queue
+from .offload import fetch_nodes_data_offloaded, shutdown_process_pool
+from .reload import start_config_watcher, stop_config_watcher
+from .resilience import CLOSED, CircuitBreaker, retry
+from .scheduler import TokenScheduler
+from .state_store import close_state_store, get_state_store
+
+
+class TokenState:
+    """单个 token 的运行状态：上一轮快照及其汇总和检查时间、条件请求缓存、自适应轮询周期、熔断器、收益速率和上下线确认"""
+    __slots__ = ('name', 'token', 'previous', 'stats', 'checked_at', 'cache', 'interval', 'breaker', 'earnings',
+                 'flaps')
+
+    def __init__(self, name, token, interval, breaker, earnings, flaps):
+        self.name = name
+        self.token = token
+        self.previous = {}
+        self.stats = None
+        self.checked_at = None  # 上一轮快照的 Unix 时间，重启后的第一轮为 None
+        self.cache = FetchCache()
+        self.interval = interval
+        self.breaker = breaker
+        self.earnings = earnings
+        self.flaps = flaps
+
+
+def compare_states(previous, current, **options):
+    """比较两个状态的差异，返回 NodeChange 变化记录列表（options 见 diff_states）"""
+    with DIFF_SECONDS.time():
+        return diff_states(previous, current, **options)
+
+
+class Monitor:
+    """持有配置、各 token 状态和共享的请求会话"""
+
+    def __init__(self, config):
+        self.config = config
+        self.items = {item['name']: item for item in config.tokens}  # 各 token 当前的配置项
+        self.tokens = {item['name']: self.token_state(item) for item in config.tokens}
+        self.session = None
+        self.scheduler = None
+
+    def token_state(self, item):
+        """按 tokens 配置中的一项创建 TokenState"""
+        config = self.config
+        return TokenState(
+            item['name'],
+            item['token'],
+            self.adaptive_interval(item),
+            self.circuit_breaker(),
+            EarningsTracker(config.reward_rate_halflife, config.underperform_ratio),
+            FlapDetector(config.offline_confirm_samples, config.online_confirm_samples, config.flap_decay,
+                         config.flap_start_score, config.flap_stop_score)
+        )
+
+    def adaptive_interval(self, item):
+        return AdaptiveInterval(item['interval'], item['min_interval'], item['max_interval'],
+                                backoff=self.config.interval_backoff)
+
+    def circuit_breaker(self):
+        config = self.config
+        return CircuitBreaker(config.breaker_threshold, config.breaker_reset_timeout, config.auth_reset_timeout)
+
+    def add_token(self, item):
+        """运行中加入一个 token：从持久化存储恢复上一轮快照，已在调度时立即按其周期开始检查"""
+        state = self.token_state(item)
+        store = get_state_store(self.config.state_db_path)
+        if store is not None:
+            state.previous = store.load(state.name)
+        history = get_history(self.config.history_dir)
+        if history is not None:
+            history.release(state.name)  # 按当前的节点列表重新分配槽位
+        self.items[state.name] = item
+        self.tokens[state.name] = state
+        if self.scheduler is not None:
+            POLL_INTERVAL.set(state.interval.current, token=state.name)
+            self.scheduler.add(state.name, functools.partial(self.check, state), interval=state.interval.current)
+        return state
+
+    def remove_token(self, name, forget=False):
+        """运行中移除一个 token，进行中的请求会继续完成，但结果不再记录
+
+        forget 为 True 时同时删除它在持久化存储中的快照（token 已从配置中删除，而不是转给其他 worker）。
+        """
+        self.items.pop(name, None)
+        self.tokens.pop(name, None)
+        if self.scheduler is not None:
+            self.scheduler.remove(name)
+        remove_token_series(name)
+        store = get_state_store(self.config.state_db_path) if forget else None
+        if store is not None:
+            store.forget(name)
+        history = get_history(self.config.history_dir)
+        if history is not None:
+            history.release(name)
+        api = get_query_api()
+        if api is not None:
+            api.drop(name)
+
+    def update_token(self, item):
+        """运行中修改 token 的凭据或周期，保留上一轮快照、session、收益速率和上下线状态
+
+        凭据变化时清空条件请求缓存并重置熔断器（旧凭据的 401 等失败与新凭据无关）；
+        周期变化时按新配置重新开始自适应，调度器从最近一轮的计划时间起按新周期排列。
+        """
+        state = self.tokens[item['name']]
+        old = self.items[state.name]
+        self.items[state.name] = item
+        if item['token'] != old['token']:
+            state.token = item['token']
+            state.cache = FetchCache()
+            if state.breaker.state != CLOSED:
+                CIRCUIT_OPEN.set(0, token=state.name)
+            state.breaker = self.circuit_breaker()
+        if any(item[key] != old[key] for key in TOKEN_INTERVAL_KEYS):
+            state.interval = self.adaptive_interval(item)
+            POLL_INTERVAL.set(state.interval.current, token=state.name)
+            if self.scheduler is not None:
+                self.scheduler.set_interval(state.name, state.interval.current)
+
+    def update_tokens(self, items, forget=True):
+        """按新的 tokens 配置列表增删改 token，未变化的 token 不受影响；返回 (新增, 移除, 修改) 的名称列表
+
+        forget 为 True 时删除被移除 token 的持久化快照，见 remove_token。
+        """
+        new = {item['name']: item for item in items}
+        added, removed, changed = diff_tokens(self.items, new)
+        for name in removed:
+            self.remove_token(name, forget)
+        for name in changed:
+            self.update_token(new[name])
+        for name in added:
+            self.add_token(new[name])
+        return added, removed, changed
+
+    async def start(self, serve_metrics=True):
+        """启动指标服务、查询接口（serve_metrics 为 False 时都不启动）和通知分发，从持久化存储恢复各 token 上一轮的快照"""
+        config = self.config
+        if serve_metrics:
+            await start_metrics_server(config.metrics_host, config.metrics_port)
+            await start_api_server(self, config.api_host, config.api_port)
+        # 所有消息并行分发到各通知渠道，每个渠道各自合并、限速后发送（多进程模式的 worker 已换成转发）
+        if get_notification_queue() is None:
+            start_notification_queue(build_notifiers(notifier_configs(config), config.proxy_url))
+
+        store = get_state_store(config.state_db_path)
+        if store is not None:
+            for state in self.tokens.values():
+                state.previous = store.load(state.name)
+            logger.info("已恢复 %d 个节点的历史状态", sum(len(state.previous) for state in self.tokens.values()))
+        self.session = create_fetch_session(
+            config.connect_timeout, config.read_timeout, config.request_timeout,
+            limit=config.max_concurrency, keepalive_timeout=config.keepalive_timeout
+        )
+
+    def diff_options(self, state, now):
+        """diff_states 的长时间 session 检测参数；未启用或没有上一轮时间时为空"""
+        if not self.config.long_session_hours or state.checked_at is None:
+            return {}
+        return {'since': state.checked_at, 'now': now, 'long_session': self.config.long_session_hours * 3600}
+
+    async def fetch(self, state, now):
+        """获取一个 token 的当前快照，返回 (快照, 变化列表)；now 为本轮检查的 Unix 时间"""
+        config = self.config
+        options = self.diff_options(state, now)
+        if config.process_pool_workers:
+            # 解压、解析和比较在子进程中完成
+            current_state, changes = await fetch_nodes_data_offloaded(
+                session=self.session,
+                api_url=config.api_url,
+                api_token=state.token,
+                previous=state.previous,
+                workers=config.process_pool_workers,
+                cache=state.cache,
+                verbose=config.debug_output,
+                diff_options=options
+            )
+        else:
+            current_state = await fetch_nodes_data(
+                session=self.session,
+                api_url=config.api_url,
+                api_token=state.token,
+                cache=state.cache,
+                verbose=config.debug_output
+            )
+            changes = []
+            if state.previous and not state.cache.unchanged:
+                changes = compare_states(state.previous, current_state, **options)
+        if state.previous and state.cache.unchanged and options:
+            # 响应未变化时跳过了比较，只检查是否有 session 运行满设定时长
+            changes = long_session_changes(current_state, **options)
+        return current_state, changes
+
+    def summarize(self, state, current_state, changes, now):
+        """汇总本轮快照；响应未变化时复用上一轮的汇总，收益速率每轮都更新（没有新奖励时速率随时间衰减）"""
+        if state.cache.unchanged and state.stats is not None and state.stats.snapshot is current_state:
+            stats = state.stats.unchanged()
+            stats.earnings = state.earnings.observe(state.previous, current_state, now)
+            return stats
+        long_session = self.config.long_session_hours * 3600
+        stats = FleetStats(current_state, changes, now - long_session if long_session else None)
+        stats.earnings = state.earnings.observe(state.previous, current_state, now)
+        logger.info("节点统计", **summary_fields(stats))
+        return stats
+
+    def observe(self, state, stats, changes, now):
+        """记录本轮汇总到运行指标"""
+        observe_snapshot(state.name, stats, now, self.config.node_metrics)
+
+    def confirm_changes(self, state, current_state, changes):
+        """把原始的上下线翻转换成迟滞确认后的上下线和抖动开始/结束，其余变化原样保留"""
+        events = state.flaps.observe(current_state, changes)
+        if not events and not any(change.field == 'is_connected' for change in changes):
+            return changes
+        return [change for change in changes if change.field != 'is_connected'] + events
+
+    def message_prefix(self, state):
+        """多个 token 时在消息前加上 token 名，以区分合并发送的各账户消息"""
+        return f"【{state.name}】\n" if len(self.tokens) > 1 else ''
+
+    def build_notification(self, state, stats, changes):
+        """按优先级选择要发送的消息：离线警告 > 状态变化 > 状态报告，返回 (消息, 去重指纹, 附带的变化消息)
+
+        离线警告列出全部确认离线的节点（抖动中的加上标注），抖动中的节点另外单独列出（抖动开始/结束都会改变指纹而重新告警），
+        changes 为 confirm_changes 处理后的变化。离线警告期间的其他变化（节点增减、session、奖励清零等）
+        作为附带的变化消息另行发送，不参与去重，离线警告被去重时也不会丢失。
+        """
+        config = self.config
+        offline = state.flaps.alerting_offline()
+        if offline:
+            nodes = [node for node in stats.offline if node.node_id in offline]
+            if len(nodes) < len(offline):
+                # 本轮已恢复在线、尚未确认的节点仍按离线列出
+                nodes += [stats.snapshot[node_id] for node_id in offline if stats.snapshot[node_id].is_connected]
+            flapping = [stats.snapshot[node_id] for node_id in sorted(state.flaps.flapping)]
+            # 离线节点和抖动节点集合都不变时不重复告警
+            message = build_offline_status_message(stats, config.time_offset, nodes, flapping)
+            # 上下线和抖动已体现在离线警告的节点列表中
+            others = [change for change in changes if change.field not in ('is_connected', 'flapping')]
+            return (message, (frozenset(offline), frozenset(state.flaps.flapping)),
+                    build_change_message(others, config.time_offset))
+        if changes:
+            return build_change_message(changes, config.time_offset), None, None
+        if config.always_notify or not state.previous:
+            # 首次运行也发送状态报告
+            message = build_status_message(stats, config.time_offset, config.show_detail, config.underperform_ratio)
+            return message, None, None
+        return None, None, None
+
+    def adjust_interval(self, state, stats, changes):
+        """按本轮观测结果调整该 token 的下一次检查时间"""
+        if state.interval.fixed:
+            return
+        previous = state.interval.current
+        interval = state.interval.update(changes, state.cache.unchanged, asyncio.get_running_loop().time(),
+                                         bool(stats.offline))
+        POLL_INTERVAL.set(interval, token=state.name)
+        if self.scheduler is not None and interval != previous:
+            logger.info("检查间隔调整为 %.0f 秒", interval, interval=interval)
+            self.scheduler.set_interval(state.name, interval)
+
+    async def fetch_with_retry(self, state, now):
+        """获取快照，瞬时错误按退避重试；返回 None 表示熔断中、重试后仍失败，或请求期间 token 已被移除
+        （或重新加入为新的状态），此时不再记录指标、发送通知和写入快照
+
+        now 为本轮检查的 Unix 时间（传给比较，与 checked_at 对应），熔断器使用事件循环的单调时间。
+        """
+        config = self.config
+        if not state.breaker.allow(asyncio.get_running_loop().time()):
+            return None
+
+        def on_retry(error, attempt, delay):
+            if self.tokens.get(state.name) is state:
+                FETCH_RETRIES.inc(token=state.name)
+            logger.warning("请求失败: %s，%.1f 秒后第 %d 次重试", error, delay, attempt)
+
+        try:
+            result = await retry(
+                lambda: self.fetch(state, now),
+                retries=config.fetch_retries,
+                base_delay=config.retry_base_delay,
+                max_delay=config.retry_max_delay,
+                on_retry=on_retry,
+                sleep=asyncio.sleep if self.scheduler is None else self.scheduler.pause
+            )
+        except Exception as e:
+            if self.tokens.get(state.name) is not state:
+                return None  # 请求期间 token 已被移除
+            FETCH_ERRORS.inc(token=state.name)
+            logger.error("获取数据出错: %s", e)
+            if state.breaker.record_failure(e, asyncio.get_running_loop().time()):
+                self.circuit_opened(state)
+            return None
+
+        if self.tokens.get(state.name) is not state:
+            return None
+        if state.breaker.state != CLOSED:
+            logger.info("已恢复，继续检查")
+            CIRCUIT_OPEN.set(0, token=state.name)
+            get_notification_queue().submit(f"✅ 【Token 已恢复】\nToken: {state.name}", key=f"{state.name}#circuit")
+        state.breaker.record_success()
+        return result
+
+    def circuit_opened(self, state):
+        breaker = state.breaker
+        CIRCUIT_OPEN.set(1, token=state.name)
+        logger.warning("已暂停请求 %.0f 秒: %s", breaker.cooldown, breaker.reason)
+        message = (f"⚠️ 【Token 请求暂停】\nToken: {state.name}\n原因: {breaker.reason}\n"
+                   f"{breaker.cooldown / 60:.0f} 分钟后自动重试")
+        # 同一原因反复熔断时只通知一次
+        get_notification_queue().submit(message, key=f"{state.name}#circuit", fingerprint=breaker.reason)
+
+    async def check(self, state):
+        """执行一个 token 的一轮检查（调度器为每轮检查创建独立任务，日志中的 token 只作用于本轮）"""
+        set_token(state.name)
+        now = time.time()
+        result = await self.fetch_with_retry(state, now)
+        if result is None:
+            return
+        current_state, changes = result
+        try:
+            if not current_state:
+                return
+            stats = self.summarize(state, current_state, changes, now)
+            self.observe(state, stats, changes, now)
+            logger.info("检测到 %d 个变化", len(changes), changes=len(changes))
+            if state.previous:
+                self.adjust_interval(state, stats, changes)
+
+            message, fingerprint, extra = self.build_notification(
+                state, stats, self.confirm_changes(state, current_state, changes)
+            )
+            prefix = self.message_prefix(state)
+            if message:
+                get_notification_queue().submit(prefix + message, key=state.name, fingerprint=fingerprint)
+            if extra:
+                # 不带 key：既不被离线警告的指纹去重，也不覆盖该指纹
+                get_notification_queue().submit(prefix + extra)
+
+            store = get_state_store(self.config.state_db_path)
+            if store is not None and not state.cache.unchanged:
+                store.save(state.name, state.previous, current_state)
+            state.previous = current_state
+            state.stats = stats
+            state.checked_at = now
+            history = get_history(self.config.history_dir)
+            if history is not None:
+                # 分段文件的写入不占用事件循环
+                await asyncio.to_thread(history.record, state.name, current_state)
+
+        except Exception as e:
+            logger.exception("处理数据时出错: %s", e)
+
+    async def run(self):
+        """按调度器持续运行"""
+        config = self.config
+        self.scheduler = TokenScheduler(
+            interval=config.interval,
+            max_concurrency=config.max_concurrency,
+            requests_per_second=config.requests_per_second or None,
+            jitter=config.jitter
+        )
+        for state in self.tokens.values():
+            POLL_INTERVAL.set(state.interval.current, token=state.name)
+            self.scheduler.add(state.name, functools.partial(self.check, state), interval=state.interval.current)
+        await self.scheduler.run()
+
+    async def run_once(self):
+        """对所有 token 各执行一轮检查（并发数受 max_concurrency 限制）"""
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+
+        async def check(state):
+            async with semaphore:
+                await self.check(state)
+
+        await asyncio.gather(*(check(state) for state in self.tokens.values()))
+
+    async def close(self):
+        """关闭各项资源：先写完状态存储和历史，再发送剩余通知（有时间上限，见 notify_queue.CLOSE_TIMEOUT）"""
+        close_state_store()
+        close_history()
+        await stop_notification_queue()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        shutdown_process_pool()
+        await stop_api_server()
+        await stop_metrics_server()
+
+
+def _install_stop_handler():
+    """收到 SIGTERM 时取消当前任务，使 run_monitor 走到 finally 正常关闭；返回是否已安装"""
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+
+    def stop():
+        logger.info("收到 SIGTERM，正在停止监控")
+        loop.remove_signal_handler(signal.SIGTERM)  # 关闭过程中再次收到时不重复取消
+        task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop)
+    except (NotImplementedError, RuntimeError):  # Windows 或不在主线程
+        return False
+    return True
+
+
+async def run_monitor(config, once=False, config_path=None):
+    """运行监控；once 为 True 时所有 token 各检查一轮后退出
+
+    持续运行且给出 config_path 时监视该配置文件，tokens 的变化增量应用到调度器（见 reload.py）。
+    收到 SIGTERM（以及 Ctrl+C）时停止调度、取消进行中的检查，写完状态存储和历史，
+    再发送已排队的通知（有时间上限），关闭请求会话、进程池和指标服务后返回。
+    """
+    monitor = Monitor(config)
+    handler_installed = _install_stop_handler()
+    try:
+        await monitor.start(serve_metrics=not once)
+        if once:
+            await monitor.run_once()
+        else:
+            if config_path:
+                start_config_watcher(config_path, config, monitor.update_tokens)
+            await monitor.run()
+    except asyncio.CancelledError:
+        logger.info("监控已停止")
+    finally:
+        if handler_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+        await stop_config_watcher()
+        await monitor.close()
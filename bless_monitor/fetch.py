@@ -0,0 +1,500 @@
+"""网关请求：按 Content-Encoding 流式解压响应体，并增量解析节点数组"""
+import asyncio
+import codecs
+import hashlib
+import json
+import random
+import re
+import time
+import zlib
+
+import aiohttp
+
+from .logs import logger
+from .metrics import (
+    DECOMPRESS_SECONDS, FETCH_SECONDS, FETCH_UNCHANGED, GATEWAY_CONNECTIONS, GATEWAY_CONNECTIONS_REUSED, PARSE_SECONDS
+)
+from .snapshot import NodeSnapshot
+
+CHUNK_SIZE = 64 * 1024  # 每次从响应流读取的字节数
+
+# 请求网关的默认超时（秒）
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+REQUEST_TIMEOUT = 120
+
+# 连接池配置
+GATEWAY_LIMIT = 10  # 与网关的最大并发连接数
+DNS_CACHE_TTL = 300  # DNS 缓存时间（秒）
+KEEPALIVE_TIMEOUT = 120  # 空闲连接保持时间（秒）
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def get_random_user_agent():
+    """获取随机User-Agent"""
+    user_agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 Edg/130.0.0.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0"
+    ]
+    return random.choice(user_agents)
+
+
+class FetchError(Exception):
+    """网关返回非 200 状态；retry_after 为服务端建议的等待秒数"""
+
+    def __init__(self, message, status, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def auth_failed(self):
+        return self.status in (401, 403)
+
+
+class DecodeError(ValueError):
+    """响应体解压失败（各解压库的异常统一转换为该异常）"""
+
+
+class _IdentityDecoder:
+    """未压缩的响应体"""
+
+    def decompress(self, data):
+        return data
+
+    def flush(self):
+        return b''
+
+
+class _ZlibDecoder:
+    """gzip / deflate"""
+
+    def __init__(self, wbits):
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data):
+        try:
+            return self._obj.decompress(data)
+        except zlib.error as e:
+            raise DecodeError(str(e)) from e
+
+    def flush(self):
+        try:
+            return self._obj.flush()
+        except zlib.error as e:
+            raise DecodeError(str(e)) from e
+
+
+# 空闲的 zstd 解压上下文；同时进行的解压各占一个，池的大小不超过并发请求数
+_zstd_pool = []
+
+
+class _ZstdDecoder:
+    """zstd：解压上下文（ZstdDecompressor）在 flush 时归还到池中，下一次响应复用其内部缓冲区
+
+    解压出错时不归还，出错的上下文随对象一起释放。
+    """
+
+    def __init__(self, zstd):
+        self._error = zstd.ZstdError
+        self._decompressor = _zstd_pool.pop() if _zstd_pool else zstd.ZstdDecompressor()
+        self._obj = self._decompressor.decompressobj()
+
+    def decompress(self, data):
+        try:
+            return self._obj.decompress(data)
+        except self._error as e:
+            self._decompressor = None
+            raise DecodeError(str(e)) from e
+
+    def flush(self):
+        if self._decompressor is not None:
+            _zstd_pool.append(self._decompressor)
+            self._decompressor = None
+        return b''
+
+
+class _BrotliDecoder:
+    def __init__(self, brotli):
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data):
+        # brotli 包使用 process()，brotlicffi 使用 decompress()
+        process = getattr(self._obj, 'process', None) or self._obj.decompress
+        try:
+            return process(data)
+        except Exception as e:
+            raise DecodeError(str(e)) from e
+
+    def flush(self):
+        return b''
+
+
+_zstd = None
+
+
+def _import_zstd():
+    """首次遇到 zstd 响应时才导入 zstandard，缩短启动时间"""
+    global _zstd
+    if _zstd is None:
+        import zstandard  # 需要先安装：pip install zstandard
+        _zstd = zstandard
+    return _zstd
+
+
+def _import_brotli():
+    """brotli 为可选依赖，未安装时返回 None"""
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            return None
+    return brotli
+
+
+def accept_encoding():
+    """根据已安装的解压库生成 accept-encoding 请求头"""
+    encodings = ["gzip", "deflate"]
+    if _import_brotli() is not None:
+        encodings.append("br")
+    encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def make_decoder(content_encoding):
+    """根据 Content-Encoding 创建流式解压器"""
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        return _IdentityDecoder()
+    if encoding in ('gzip', 'x-gzip'):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == 'zstd':
+        return _ZstdDecoder(_import_zstd())
+    if encoding == 'br':
+        brotli = _import_brotli()
+        if brotli is not None:
+            return _BrotliDecoder(brotli)
+    raise ValueError(f"不支持的 Content-Encoding: {content_encoding}")
+
+
+class NodeArrayParser:
+    """增量解析顶层 JSON 数组：每凑齐一个完整元素就产出，不必等待整个响应体"""
+
+    _START, _FIRST, _VALUE, _SEP, _DONE = range(5)
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._state = self._START
+        self.count = 0
+
+    def head(self, size=200):
+        """当前缓冲区内容片段，用于错误输出"""
+        return self._buf[self._pos:self._pos + size]
+
+    def feed(self, data, final=False):
+        """送入一段解压后的字节，产出其中已完整的数组元素"""
+        buf = self._buf[self._pos:] + self._text.decode(data, final)
+        self._buf, self._pos = buf, 0
+        pos = 0
+
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+
+            if self._state == self._START:
+                if char != '[':
+                    raise json.JSONDecodeError("响应不是JSON数组", buf, pos)
+                self._state = self._FIRST
+                pos += 1
+            elif self._state == self._SEP:
+                if char == ',':
+                    self._state = self._VALUE
+                elif char == ']':
+                    self._state = self._DONE
+                else:
+                    raise json.JSONDecodeError("数组元素之间缺少逗号", buf, pos)
+                pos += 1
+            elif self._state == self._FIRST and char == ']':
+                self._state = self._DONE
+                pos += 1
+            elif self._state in (self._FIRST, self._VALUE):
+                try:
+                    value, end = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # 元素尚未接收完整，等待下一段数据
+                if end >= len(buf) and not final:
+                    break  # 末尾的数字等标量可能还未结束
+                pos = end
+                self._state = self._SEP
+                self._pos = pos
+                self.count += 1
+                yield value
+            else:
+                raise json.JSONDecodeError("数组结束后存在多余数据", buf, pos)
+            self._pos = pos
+
+        self._pos = pos
+        if final and self._state != self._DONE:
+            raise json.JSONDecodeError("JSON数组不完整", buf, len(buf))
+
+
+async def _on_connection_create(session, context, params):
+    GATEWAY_CONNECTIONS.inc()
+
+
+async def _on_connection_reuse(session, context, params):
+    GATEWAY_CONNECTIONS_REUSED.inc()
+
+
+def create_fetch_session(connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                         request_timeout=REQUEST_TIMEOUT, limit=GATEWAY_LIMIT,
+                         keepalive_timeout=KEEPALIVE_TIMEOUT, **kwargs):
+    """创建请求网关用的会话，所有 token 共用、整个运行期间只创建一次（必须在事件循环内调用）
+
+    关闭 aiohttp 自动解压，由本模块按编码流式解压。连接池保持与网关的长连接，
+    空闲不超过 keepalive_timeout 的连接直接复用，省去 TCP/TLS 握手；新建和复用次数记录在指标中。
+    connect_timeout 限制建立连接，read_timeout 限制两次读到数据之间的间隔，
+    request_timeout 限制整个请求（含读完响应体），防止卡住的连接拖住整轮检查。
+    """
+    timeout = aiohttp.ClientTimeout(total=request_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+    connector = aiohttp.TCPConnector(limit=limit, ttl_dns_cache=DNS_CACHE_TTL, keepalive_timeout=keepalive_timeout)
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_end.append(_on_connection_create)
+    trace.on_connection_reuseconn.append(_on_connection_reuse)
+    return aiohttp.ClientSession(auto_decompress=False, timeout=timeout, connector=connector,
+                                 trace_configs=[trace], **kwargs)
+
+
+class FetchCache:
+    """单个 token 的条件请求缓存
+
+    记录网关返回的 ETag/Last-Modified 和上一次原始响应体的哈希。网关返回 304，
+    或响应体与上一次逐字节相同时，直接复用上一次的快照，跳过解压、解析和比较。
+    新响应的校验信息先暂存，快照建好后由 store 一并生效；解压、解析或建快照失败时仍保留上一次的，
+    下次相同的响应会重新解析，而不会被当作未变化返回旧快照。
+    """
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.body_hash = None
+        self.snapshot = None
+        self._pending = None  # 尚未建好快照的响应的 (etag, last_modified, body_hash)
+        self.unchanged = False  # 最近一次请求是否命中缓存
+        self.stats = {'fetches': 0, 'not_modified': 0, 'same_body': 0}
+
+    @property
+    def short_circuited(self):
+        """累计跳过解析的次数"""
+        return self.stats['not_modified'] + self.stats['same_body']
+
+    def request_headers(self):
+        """条件请求头（只有已有快照时才发送，否则 304 无法复用）"""
+        headers = {}
+        if self.snapshot is not None:
+            if self.etag:
+                headers['if-none-match'] = self.etag
+            if self.last_modified:
+                headers['if-modified-since'] = self.last_modified
+        return headers
+
+    def update_validators(self, response):
+        self.etag = response.headers.get('etag') or self.etag
+        self.last_modified = response.headers.get('last-modified') or self.last_modified
+
+    def stage(self, response, body_hash):
+        """暂存新响应的校验信息"""
+        self._pending = (response.headers.get('etag') or self.etag,
+                         response.headers.get('last-modified') or self.last_modified, body_hash)
+
+    def store(self, snapshot):
+        """保存由暂存的响应建好的快照，校验信息随之生效"""
+        self.snapshot = snapshot
+        if self._pending is not None:
+            self.etag, self.last_modified, self.body_hash = self._pending
+            self._pending = None
+
+    def hit(self, reason):
+        self.unchanged = True
+        self.stats[reason] += 1
+        FETCH_UNCHANGED.inc()
+        logger.info("响应未变化，跳过解析（累计跳过 %d/%d 次）", self.short_circuited, self.stats['fetches'])
+
+
+def build_headers(api_token, cache=None):
+    """请求网关用的请求头"""
+    headers = {
+        "authority": "gateway-run.bls.dev",
+        "accept": "*/*",
+        "accept-encoding": accept_encoding(),
+        "accept-language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "authorization": f"Bearer {api_token}",
+        "content-type": "application/json",
+        "origin": "https://bless.network",
+        "referer": "https://bless.network/",
+        "user-agent": get_random_user_agent()
+    }
+    if cache is not None:
+        headers.update(cache.request_headers())
+    return headers
+
+
+async def _check_response(response, cache=None, verbose=False):
+    """检查响应状态；返回 False 表示命中 304，非 200 时抛出异常"""
+    if verbose:
+        logger.debug("响应状态码: %d", response.status, content_type=response.headers.get('content-type'),
+                     server=response.headers.get('server'))
+
+    if cache is not None:
+        cache.stats['fetches'] += 1
+        cache.unchanged = False
+        if response.status == 304 and cache.snapshot is not None:
+            cache.update_validators(response)
+            cache.hit('not_modified')
+            return False
+
+    if response.status != 200:
+        response_text = await response.text()
+        logger.warning("错误响应: %s", response_text[:200], status=response.status)
+        retry_after = response.headers.get('Retry-After')
+        raise FetchError(
+            f"API请求失败: {response.status}",
+            response.status,
+            float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+    return True
+
+
+async def _read_if_changed(response, cache):
+    """读取完整的压缩响应体并计算哈希；与上一次相同时返回 None"""
+    digest = hashlib.blake2b(digest_size=16)
+    chunks = []
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        digest.update(chunk)
+        chunks.append(chunk)
+    body_hash = digest.digest()
+    if body_hash == cache.body_hash and cache.snapshot is not None:
+        cache.update_validators(response)
+        cache.hit('same_body')
+        return None
+    cache.stage(response, body_hash)
+    return chunks
+
+
+async def _replay(chunks):
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)
+
+
+async def fetch_raw_body(session, api_url, api_token, cache=None, verbose=False):
+    """请求节点列表，返回 (Content-Encoding, 未解压的响应体)；命中缓存时响应体为 None"""
+    async with session.get(api_url, headers=build_headers(api_token, cache)) as response:
+        content_encoding = response.headers.get('content-encoding')
+        if not await _check_response(response, cache, verbose):
+            return content_encoding, None
+        if cache is None:
+            return content_encoding, await response.read()
+        chunks = await _read_if_changed(response, cache)
+        return content_encoding, None if chunks is None else b''.join(chunks)
+
+
+async def stream_nodes(session, api_url, api_token, cache=None, verbose=False):
+    """请求节点列表，边接收边解压、边解析，逐个产出节点字典
+
+    传入 cache 时先读完压缩响应体比较哈希（压缩数据远小于解压后的数据），
+    未变化则不产出任何节点并置 cache.unchanged，调用方应复用 cache.snapshot。
+    """
+    async with session.get(api_url, headers=build_headers(api_token, cache)) as response:
+        if not await _check_response(response, cache, verbose):
+            return
+
+        content_encoding = response.headers.get('content-encoding')
+        if verbose:
+            logger.debug("Content-Encoding: %s", content_encoding)
+        if cache is None:
+            chunks = response.content.iter_chunked(CHUNK_SIZE)
+        else:
+            buffered = await _read_if_changed(response, cache)
+            if buffered is None:
+                return
+            chunks = _replay(buffered)
+
+        decoder = make_decoder(content_encoding)
+        parser = NodeArrayParser()
+        received = 0
+        decompress_time = parse_time = 0.0
+
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                start = time.perf_counter()
+                data = decoder.decompress(chunk)
+                decoded = time.perf_counter()
+                nodes = list(parser.feed(data))
+                decompress_time += decoded - start
+                parse_time += time.perf_counter() - decoded
+                for node in nodes:
+                    yield node
+            start = time.perf_counter()
+            nodes = list(parser.feed(decoder.flush(), final=True))
+            parse_time += time.perf_counter() - start
+            for node in nodes:
+                yield node
+            DECOMPRESS_SECONDS.observe(decompress_time)
+            PARSE_SECONDS.observe(parse_time)
+        except DecodeError as e:
+            logger.error("解压错误(%s): %s", content_encoding, e, received=received)
+            raise
+        except json.JSONDecodeError as e:
+            logger.error("JSON解析错误: %s", e, head=repr(parser.head()))
+            raise
+
+
+async def fetch_nodes_data(session, api_url, api_token, cache=None, verbose=False):
+    """获取节点数据，返回按 _id 索引的 NodeSnapshot 字典
+
+    节点逐个从响应流中解析出来后立即转换为快照，原始字典（含 sessions）不会整体驻留内存。
+    传入 FetchCache 且响应未变化时直接返回上一次的快照对象（cache.unchanged 为 True）。
+    verbose 为 True 时以 debug 级别记录响应头和每个节点的详情（调试用，节点多时开销明显）。
+    """
+    snapshot = {}
+    start = time.perf_counter()
+
+    try:
+        async for node in stream_nodes(session, api_url, api_token, cache, verbose):
+            item = NodeSnapshot.from_node(node)
+            snapshot[item.node_id] = item
+
+            if verbose:
+                logger.debug("节点详情", node=item.pub_key, connected=item.is_connected,
+                             total_reward=item.total_reward, today_reward=item.today_reward,
+                             sessions=item.session_count)
+
+    except aiohttp.ClientError as e:
+        logger.error("网络请求错误: %s", e)
+        raise
+    except Exception as e:
+        logger.error("其他异常: %s", e)
+        raise
+
+    FETCH_SECONDS.observe(time.perf_counter() - start)
+    if cache is not None:
+        if cache.unchanged:
+            return cache.snapshot
+        cache.store(snapshot)
+    return snapshot
@@ -0,0 +1,168 @@
+"""节点上下线的迟滞确认和抖动检测：单次采样的 isConnected 翻转不再直接告警
+
+每个节点一个状态机：
+- 确认状态（在线/离线）只在连续 offline_samples 次采样离线（或连续 online_samples 次在线）后才切换，切换时告警一次；
+- 抖动分数：每次原始翻转加 1，每经过一次采样乘以 decay。分数达到 start_score 时进入抖动状态并告警一次，
+  此后该节点的确认需要加倍的连续采样，上下线只更新确认状态、不单独告警（确认离线的仍列入离线告警，
+  见 alerting_offline）；分数衰减到 stop_score 以下时退出抖动并告警一次，
+  若确认状态与进入抖动时不同，同时补发一条上线/离线。
+
+各节点的状态存放在按槽位索引的紧凑数组中（状态位、连续计数、抖动分数、分数对应的采样序号，共 10 字节），
+分数按采样序号惰性衰减。每次采样只处理本轮的连通性变化、确认中的节点和抖动中的节点，快照未变时不遍历全部节点。
+"""
+import array
+
+from .node_diff import ADDED, CHANGED, REMOVED, NodeChange
+
+_ONLINE = 1  # 确认状态为在线
+_FLAPPING = 2  # 处于抖动状态
+_ANNOUNCED = 4  # 进入抖动时最后告警过的状态（在线为 1）
+_MAX_STREAK = 255
+
+
+class FlapDetector:
+    """单个 token 的节点上下线状态机
+
+    offline_samples/online_samples 为确认离线/上线所需的连续采样数（1 即不做迟滞），
+    start_score 为 0 时不检测抖动。
+    """
+    __slots__ = ('offline_samples', 'online_samples', 'decay', 'start_score', 'stop_score', 'sample',
+                 'pending', 'flapping', 'offline', '_slots', '_free', '_flags', '_streak', '_score', '_scored')
+
+    def __init__(self, offline_samples=2, online_samples=2, decay=0.9, start_score=4, stop_score=1):
+        self.offline_samples = offline_samples
+        self.online_samples = online_samples
+        self.decay = decay
+        self.start_score = start_score
+        self.stop_score = stop_score
+        self.sample = 0  # 已记录的采样数
+        self.pending = set()  # 原始状态与确认状态不同、尚在确认中的节点
+        self.flapping = set()  # 抖动中的节点
+        self.offline = set()  # 确认离线的节点（含抖动中的）
+        self._slots = {}
+        self._free = []
+        self._flags = array.array('B')
+        self._streak = array.array('B')
+        self._score = array.array('f')
+        self._scored = array.array('I')
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _allocate(self, node_id, connected):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._flags)
+            self._flags.append(0)
+            self._streak.append(0)
+            self._score.append(0.0)
+            self._scored.append(0)
+        self._flags[slot] = _ONLINE if connected else 0
+        self._streak[slot] = 0
+        self._score[slot] = 0.0
+        self._scored[slot] = self.sample
+        self._slots[node_id] = slot
+        if not connected:
+            self.offline.add(node_id)
+
+    def _release(self, node_id):
+        slot = self._slots.pop(node_id, None)
+        if slot is not None:
+            self._free.append(slot)
+        self.pending.discard(node_id)
+        self.flapping.discard(node_id)
+        self.offline.discard(node_id)
+
+    def _current_score(self, slot):
+        return self._score[slot] * self.decay ** (self.sample - self._scored[slot])
+
+    def score(self, node_id):
+        """节点当前的抖动分数"""
+        return self._current_score(self._slots[node_id])
+
+    def reset(self, snapshot):
+        """按快照重新初始化（首轮或重启后），当前状态直接视为已确认"""
+        self.__init__(self.offline_samples, self.online_samples, self.decay, self.start_score, self.stop_score)
+        for node_id, node in snapshot.items():
+            self._allocate(node_id, node.is_connected)
+
+    def alerting_offline(self):
+        """应列入离线告警的节点：全部确认离线的节点，抖动中的也列入（由消息标注），以免抖动期间的真实离线漏报"""
+        return self.offline
+
+    def observe(self, current, changes):
+        """记录一次采样，返回需要告警的变化：确认的上线/离线（is_connected）和抖动开始/结束（flapping）
+
+        current 为本轮快照，changes 为 diff_states 的原始变化（快照未变化时为空）。
+        """
+        self.sample += 1
+        if not self._slots:
+            self.reset(current)
+            return []
+        flags, streak = self._flags, self._streak
+        events = []
+        flipped = set()
+
+        for change in changes:
+            node_id = change.node_id
+            if change.kind == ADDED:
+                self._allocate(node_id, current[node_id].is_connected)
+                continue
+            if change.kind == REMOVED:
+                self._release(node_id)
+                continue
+            if change.field != 'is_connected':
+                continue
+            slot = self._slots.get(node_id)
+            if slot is None:
+                self._allocate(node_id, change.new)
+                continue
+            flipped.add(node_id)
+            score = self._score[slot] = self._current_score(slot) + 1
+            self._scored[slot] = self.sample
+            if bool(flags[slot] & _ONLINE) == change.new:
+                # 回到确认状态，确认中断
+                streak[slot] = 0
+                self.pending.discard(node_id)
+            else:
+                streak[slot] = 1
+                self.pending.add(node_id)
+            if self.start_score and score >= self.start_score and not flags[slot] & _FLAPPING:
+                flags[slot] = (flags[slot] | _FLAPPING) & ~_ANNOUNCED | (_ANNOUNCED if flags[slot] & _ONLINE else 0)
+                self.flapping.add(node_id)
+                events.append(NodeChange(CHANGED, node_id, change.pub_key, 'flapping', False, True))
+
+        for node_id in list(self.pending):
+            slot = self._slots[node_id]
+            if node_id not in flipped and streak[slot] < _MAX_STREAK:
+                streak[slot] += 1
+            connected = not flags[slot] & _ONLINE  # 确认中的节点原始状态与确认状态相反
+            required = self.online_samples if connected else self.offline_samples
+            if flags[slot] & _FLAPPING:
+                required = min(required * 2, _MAX_STREAK)  # 抖动中的节点加倍确认，减少离线告警随抖动反复变化
+            if streak[slot] < required:
+                continue
+            flags[slot] ^= _ONLINE
+            streak[slot] = 0
+            self.pending.discard(node_id)
+            if connected:
+                self.offline.discard(node_id)
+            else:
+                self.offline.add(node_id)
+            if not flags[slot] & _FLAPPING:
+                events.append(NodeChange(CHANGED, node_id, current[node_id].pub_key, 'is_connected',
+                                         not connected, connected))
+
+        for node_id in list(self.flapping):
+            slot = self._slots[node_id]
+            if node_id in flipped or self._current_score(slot) >= self.stop_score:
+                continue
+            flags[slot] &= ~_FLAPPING
+            self.flapping.discard(node_id)
+            pub_key = current[node_id].pub_key
+            events.append(NodeChange(CHANGED, node_id, pub_key, 'flapping', True, False))
+            connected = bool(flags[slot] & _ONLINE)
+            if connected != bool(flags[slot] & _ANNOUNCED):
+                events.append(NodeChange(CHANGED, node_id, pub_key, 'is_connected', not connected, connected))
+        return events
@@ -0,0 +1,75 @@
+"""节点汇总：每个快照只遍历一次，算出统计、离线节点和奖励增量，供日志、指标和各类消息共用"""
+import heapq
+
+
+class FleetStats:
+    """一个 token 当前快照的汇总结果
+
+    nodes/online 为节点数和在线数，offline 为离线节点列表（保持快照中的顺序），
+    deltas 为本轮总奖励有变化的节点 {node_id: 增量}，取自 diff_states 的变化记录而不必再查上一轮快照，
+    reward_delta 为其合计。session_start 为所有节点中最早的进行中 session 的开始时间（Unix 秒），
+    long_sessions 为最早的 session 在 long_before 之前开始的节点数（未传入 long_before 时为 0）。
+    earnings 为 earnings.EarningsTracker 给出的收益速率汇总，由调用方在汇总后填入（未跟踪时为 None，
+    median 为 None 表示还没有节点观测到速率，消息和指标中不输出）。
+    """
+    __slots__ = ('snapshot', 'nodes', 'online', 'offline', 'total_reward', 'today_reward',
+                 'deltas', 'reward_delta', 'session_start', 'long_sessions', 'earnings', '_ranked')
+
+    def __init__(self, snapshot, changes=(), long_before=None):
+        offline = []
+        total_reward = today_reward = long_sessions = 0
+        earliest = None
+        for node in snapshot.values():
+            total_reward += node.total_reward
+            today_reward += node.today_reward
+            if not node.is_connected:
+                offline.append(node)
+            if node.sessions:
+                start = node.session_start
+                if start is not None:
+                    if earliest is None or start < earliest:
+                        earliest = start
+                    if long_before is not None and start <= long_before:
+                        long_sessions += 1
+        deltas = {
+            change.node_id: change.new - change.old for change in changes if change.field == 'total_reward'
+        }
+
+        self.snapshot = snapshot
+        self.nodes = len(snapshot)
+        self.online = self.nodes - len(offline)
+        self.offline = offline
+        self.total_reward = total_reward
+        self.today_reward = today_reward
+        self.deltas = deltas
+        self.reward_delta = sum(deltas.values())
+        self.session_start = earliest
+        self.long_sessions = long_sessions
+        self.earnings = None
+        self._ranked = None
+
+    def unchanged(self):
+        """快照与上一轮相同时复用统计结果，只把奖励增量清零"""
+        stats = FleetStats.__new__(FleetStats)
+        for name in FleetStats.__slots__:
+            setattr(stats, name, getattr(self, name))
+        stats.deltas = {}
+        stats.reward_delta = 0
+        return stats
+
+    def earners(self, count=3):
+        """按今日奖励排序的 (最高 count 个, 最低 count 个) 节点；节点不足 2*count 个时返回两个空列表"""
+        if self.nodes < 2 * count:
+            return [], []
+        if self._ranked is None or len(self._ranked[0]) < count:
+            nodes = self.snapshot.values()
+            self._ranked = (
+                heapq.nlargest(count, nodes, key=_today_reward),
+                heapq.nsmallest(count, nodes, key=_today_reward),
+            )
+        top, bottom = self._ranked
+        return top[:count], bottom[:count]
+
+
+def _today_reward(node):
+    return node.today_reward
@@ -0,0 +1,323 @@
+"""节点奖励/在线历史：原始→小时→天 三级降采样的列式时序存储
+
+每个 token 一个目录，各层级按时间分段写入二进制文件，每个时间桶内按节点槽位存放定长数组。
+原始采样也视为只含一个采样的桶，三个层级在写入时同步增量聚合，无需事后重算；
+过期数据在开始写新的分段时按整个分段文件删除。查询时按时间范围选择合适的层级，只读取相关分段。
+"""
+import array
+import os
+import re
+import struct
+import threading
+import time
+
+# 层级: (名称, 桶宽度秒, 分段跨度秒, 保留时长秒)，桶宽度为 0 表示每次采样单独成桶
+LEVELS = (
+    ('raw', 0, 86400, 2 * 86400),
+    ('1h', 3600, 7 * 86400, 30 * 86400),
+    ('1d', 86400, 90 * 86400, 730 * 86400),
+)
+
+# 查询时希望覆盖范围内至少有这么多个桶，据此选择尽量粗的层级
+MIN_BUCKETS_PER_QUERY = 24
+
+_HEADER = struct.Struct('<dI')  # 桶起始时间, 槽位数
+_COLUMNS = (
+    ('samples', 'I'),  # 采样次数
+    ('online', 'I'),  # 在线采样次数
+    ('session_sum', 'd'),  # session 数量累计（除以 samples 得平均值）
+    ('first_ts', 'd'),
+    ('last_ts', 'd'),
+    ('first_total', 'd'),
+    ('last_total', 'd'),
+    ('last_today', 'd'),
+)
+
+
+class Bucket:
+    """一个时间桶内各节点的聚合值"""
+    __slots__ = ('start',) + tuple(name for name, _ in _COLUMNS)
+
+    def __init__(self, start, size=0):
+        self.start = start
+        for name, code in _COLUMNS:
+            setattr(self, name, array.array(code, bytes(array.array(code).itemsize * size)))
+
+    def __len__(self):
+        return len(self.samples)
+
+    def grow(self, size):
+        """扩展到 size 个槽位（新节点）"""
+        extra = size - len(self.samples)
+        if extra > 0:
+            for name, code in _COLUMNS:
+                getattr(self, name).extend(array.array(code, bytes(array.array(code).itemsize * extra)))
+
+    def add(self, ts, rows):
+        """累加一次采样，rows 为 (槽位, 总奖励, 今日奖励, 是否在线, session数) 序列"""
+        samples, online, session_sum = self.samples, self.online, self.session_sum
+        first_ts, last_ts = self.first_ts, self.last_ts
+        first_total, last_total, last_today = self.first_total, self.last_total, self.last_today
+        for slot, total, today, connected, sessions in rows:
+            if not samples[slot]:
+                first_ts[slot] = ts
+                first_total[slot] = total
+            samples[slot] += 1
+            online[slot] += connected
+            session_sum[slot] += sessions
+            last_ts[slot] = ts
+            last_total[slot] = total
+            last_today[slot] = today
+
+    def write(self, fp):
+        fp.write(_HEADER.pack(self.start, len(self)))
+        for name, _ in _COLUMNS:
+            getattr(self, name).tofile(fp)
+
+    @classmethod
+    def read(cls, fp):
+        """从文件读取一个桶，到达文件末尾时返回 None"""
+        header = fp.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        start, size = _HEADER.unpack(header)
+        bucket = cls(start)
+        for name, _ in _COLUMNS:
+            getattr(bucket, name).fromfile(fp, size)
+        return bucket
+
+
+class TokenHistory:
+    """单个 token 的时序数据"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._nodes_path = os.path.join(directory, 'nodes.txt')
+        self._node_ids = []
+        self._slots = {}
+        if os.path.exists(self._nodes_path):
+            with open(self._nodes_path, encoding='utf-8') as fp:
+                for line in fp:
+                    self._add_slot(line.rstrip('\n'))
+        self._open = {}
+        self._segment = {}  # 层级 -> 最近写入的分段文件
+
+    def _add_slot(self, node_id):
+        self._slots[node_id] = len(self._node_ids)
+        self._node_ids.append(node_id)
+
+    def _slots_for(self, node_ids):
+        """为新节点分配槽位，追加写入节点列表"""
+        new_ids = [node_id for node_id in node_ids if node_id not in self._slots]
+        if new_ids:
+            with open(self._nodes_path, 'a', encoding='utf-8') as fp:
+                for node_id in new_ids:
+                    self._add_slot(node_id)
+                    fp.write(node_id + '\n')
+        return self._slots
+
+    def _segment_path(self, level, bucket_start):
+        name, _, span, _ = level
+        return os.path.join(self.directory, f"{name}-{int(bucket_start - bucket_start % span)}.bin")
+
+    def _flush(self, level, bucket):
+        path = self._segment_path(level, bucket.start)
+        with open(path, 'ab') as fp:
+            bucket.write(fp)
+        if self._segment.get(level[0]) != path:
+            # 只在开始写新的分段（以及启动后首次写入）时检查过期分段，而不是每次采样都列目录
+            self._segment[level[0]] = path
+            self.prune(bucket.start)
+
+    def record(self, snapshot, ts=None):
+        """写入一次采样（NodeSnapshot 字典），同步更新各层级的当前桶"""
+        ts = time.time() if ts is None else ts
+        slots = self._slots_for(snapshot)
+        rows = [
+            (slots[node_id], node.total_reward, node.today_reward, int(node.is_connected), node.session_count)
+            for node_id, node in snapshot.items()
+        ]
+        size = len(self._node_ids)
+
+        for level in LEVELS:
+            name, width, _, _ = level
+            start = ts if width == 0 else ts - ts % width
+            bucket = self._open.get(name)
+            if bucket is not None and bucket.start != start:
+                self._flush(level, bucket)
+                bucket = None
+            if bucket is None:
+                bucket = self._open[name] = Bucket(start, size)
+            else:
+                bucket.grow(size)
+            bucket.add(ts, rows)
+            if width == 0:
+                self._flush(level, bucket)
+                self._open[name] = None
+
+    def close(self):
+        """写出未完成的桶（重启后同一时间段会出现两个桶，查询时自然合并）"""
+        for level in LEVELS:
+            bucket = self._open.get(level[0])
+            if bucket is not None:
+                self._flush(level, bucket)
+        self._open = {}
+
+    def _segments(self, level):
+        """返回该层级的 (分段起始时间, 文件路径) 列表，按时间排序"""
+        pattern = re.compile(rf"^{re.escape(level[0])}-(\d+)\.bin$")
+        segments = []
+        for filename in os.listdir(self.directory):
+            match = pattern.match(filename)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, filename)))
+        segments.sort()
+        return segments
+
+    def prune(self, now=None):
+        """删除超出保留时长的分段文件"""
+        now = time.time() if now is None else now
+        for level in LEVELS:
+            _, _, span, retention = level
+            for segment_start, path in self._segments(level):
+                if segment_start + span <= now - retention:
+                    os.remove(path)
+
+    def buckets(self, level, start, end):
+        """按时间顺序产出该层级中起始时间落在 [start, end) 的桶"""
+        _, _, span, _ = level
+        for segment_start, path in self._segments(level):
+            if segment_start + span <= start or segment_start >= end:
+                continue
+            with open(path, 'rb') as fp:
+                while True:
+                    bucket = Bucket.read(fp)
+                    if bucket is None:
+                        break
+                    if start <= bucket.start < end:
+                        yield bucket
+        bucket = self._open.get(level[0])
+        if bucket is not None and start <= bucket.start < end:
+            yield bucket
+
+    def select_level(self, start, end, now=None):
+        """在保留时长仍覆盖 start 的层级中，选择桶数量足够的最粗一级"""
+        now = time.time() if now is None else now
+        candidates = [level for level in LEVELS if start >= now - level[3]] or [LEVELS[-1]]
+        for level in reversed(candidates):
+            width = level[1]
+            if width == 0 or (end - start) / width >= MIN_BUCKETS_PER_QUERY:
+                return level
+        return candidates[0]
+
+    def uptime(self, start, end=None, now=None):
+        """各节点在 [start, end) 内的在线比例 {node_id: 0~1}"""
+        end = time.time() if end is None else end
+        size = len(self._node_ids)
+        samples = [0] * size
+        online = [0] * size
+        for bucket in self.buckets(self.select_level(start, end, now), start, end):
+            n = len(bucket)
+            samples[:n] = [a + b for a, b in zip(samples, bucket.samples)]
+            online[:n] = [a + b for a, b in zip(online, bucket.online)]
+        return {
+            self._node_ids[slot]: online[slot] / count
+            for slot, count in enumerate(samples) if count
+        }
+
+    def reward_rate(self, start, end=None, now=None):
+        """各节点在 [start, end) 内的总奖励增长速率 {node_id: 每小时奖励}"""
+        end = time.time() if end is None else end
+        size = len(self._node_ids)
+        first_ts = [None] * size
+        first_total = [0.0] * size
+        last_ts = [0.0] * size
+        last_total = [0.0] * size
+        for bucket in self.buckets(self.select_level(start, end, now), start, end):
+            for slot, count in enumerate(bucket.samples):
+                if not count:
+                    continue
+                if first_ts[slot] is None:
+                    first_ts[slot] = bucket.first_ts[slot]
+                    first_total[slot] = bucket.first_total[slot]
+                last_ts[slot] = bucket.last_ts[slot]
+                last_total[slot] = bucket.last_total[slot]
+
+        rates = {}
+        for slot, begin in enumerate(first_ts):
+            if begin is None:
+                continue
+            hours = (last_ts[slot] - begin) / 3600
+            rates[self._node_ids[slot]] = (last_total[slot] - first_total[slot]) / hours if hours > 0 else 0.0
+        return rates
+
+
+class HistoryStore:
+    """按 token 管理时序数据，每个 token 一个子目录
+
+    record 在线程中执行（见 Monitor.check），各方法由一把锁串行化；关闭后仍在途的 record 直接丢弃。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def token(self, name):
+        history = self._tokens.get(name)
+        if history is None:
+            safe_name = re.sub(r'[^\w.-]', '_', name)
+            history = self._tokens[name] = TokenHistory(os.path.join(self.directory, safe_name))
+        return history
+
+    def record(self, name, snapshot, ts=None):
+        with self._lock:
+            if not self._closed:
+                self.token(name).record(snapshot, ts)
+
+    def release(self, name):
+        """写出 token 未完成的桶并丢弃其内存状态（token 被移除或分给其他 worker 时）
+
+        之后再记录该 token 时重新读取节点列表：多进程分片模式下 token 可能在其他 worker 中新增过节点槽位。
+        """
+        with self._lock:
+            history = self._tokens.pop(name, None)
+            if history is not None:
+                history.close()
+
+    def uptime(self, name, start, end=None, now=None):
+        with self._lock:
+            return self.token(name).uptime(start, end, now)
+
+    def reward_rate(self, name, start, end=None, now=None):
+        with self._lock:
+            return self.token(name).reward_rate(start, end, now)
+
+    def close(self):
+        with self._lock:
+            for history in self._tokens.values():
+                history.close()
+            self._tokens = {}
+            self._closed = True
+
+
+_history = None
+
+
+def get_history(directory):
+    """获取共享的时序存储，directory 为空时返回 None（不记录历史）"""
+    global _history
+    if not directory:
+        return None
+    if _history is None:
+        _history = HistoryStore(directory)
+    return _history
+
+
+def close_history():
+    global _history
+    if _history is not None:
+        _history.close()
+    _history = None
@@ -0,0 +1,241 @@
+"""结构化日志：JSON Lines（或单行文本）经队列交给后台线程写出，事件循环中的日志调用不做任何 I/O
+
+- 记录方法只取时间、当前 token，把 (时间, 级别, token, 消息, 参数, 字段, 异常文本) 放入无界队列（约 1 微秒）；
+  消息的 % 格式化、序列化和写入都在后台线程中完成，已到达的记录合并成一批写入。
+  stdout 被重定向到慢速磁盘或管道时，阻塞的只是后台线程。
+- 输出到 stdout 或日志文件，文件超过 max_bytes 时轮转为 .1 .. .N（与 logging.handlers.RotatingFileHandler 的命名相同）。
+- 每条记录带当前 token：engine 每轮检查开始时调用 set_token，调度器为每轮检查创建独立任务，
+  contextvars 的值随任务隔离；也可以用 token=... 显式指定。其他关键字参数作为结构化字段输出，
+  例如 logger.info("检测到 %d 个变化", 3, changes=3)。
+- 多进程分片模式下 worker 的后台线程把记录经各自的 Pipe 发给 supervisor，由 supervisor 的后台线程统一写出，
+  多个进程不会同时写同一个文件或在轮转时互相覆盖。
+
+标准库 logging 每条记录要创建 LogRecord、查找调用位置、加锁，逐节点记录时比原来的 print 还慢，因此不使用。
+未调用 start_logging 时（基准测试、直接调用 run_monitor）日志被丢弃。
+"""
+import contextvars
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = ('debug', 'info', 'warning', 'error')
+FORMATS = ('json', 'text')
+_LEVEL_VALUES = dict(zip(LEVELS, (DEBUG, INFO, WARNING, ERROR)))
+_LEVEL_NAMES = {value: name for name, value in _LEVEL_VALUES.items()}
+_DISABLED = ERROR + 1
+
+# 每次写入最多合并的记录数
+MAX_BATCH = 1000
+
+_token = contextvars.ContextVar('bless_monitor_token', default=None)
+# json.dumps 带非默认参数时每次都新建编码器，复用同一个
+_encode_json = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def set_token(name):
+    """设置当前任务（及其之后创建的子任务）日志记录中的 token"""
+    _token.set(name)
+
+
+class Logger:
+    """日志入口，未启动时丢弃全部记录"""
+    __slots__ = ('level', 'records')
+
+    def __init__(self):
+        self.level = _DISABLED
+        self.records = None
+
+    def _put(self, level, msg, args, fields, exc=None):
+        token = fields.pop('token', None) or _token.get()
+        self.records.put((time.time(), level, token, msg, args, fields, exc))
+
+    def debug(self, msg, *args, **fields):
+        if self.level <= DEBUG:
+            self._put(DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        if self.level <= INFO:
+            self._put(INFO, msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        if self.level <= WARNING:
+            self._put(WARNING, msg, args, fields)
+
+    def error(self, msg, *args, **fields):
+        if self.level <= ERROR:
+            self._put(ERROR, msg, args, fields)
+
+    def exception(self, msg, *args, **fields):
+        """在 except 块中调用：按 error 级别记录，附带当前异常的堆栈"""
+        if self.level <= ERROR:
+            self._put(ERROR, msg, args, fields, traceback.format_exc())
+
+
+logger = Logger()
+
+
+def _message(msg, args):
+    if not args:
+        return msg
+    try:
+        return msg % args
+    except (TypeError, ValueError):
+        return f"{msg} {args!r}"
+
+
+def format_json(record):
+    """每条记录一行 JSON：时间、级别、token、消息、字段和异常堆栈"""
+    ts, level, token, msg, args, fields, exc = record
+    entry = {'ts': round(ts, 3), 'level': _LEVEL_NAMES[level]}
+    if token is not None:
+        entry['token'] = token
+    entry['msg'] = _message(msg, args)
+    entry.update(fields)
+    if exc:
+        entry['exc'] = exc
+    return _encode_json(entry)
+
+
+def format_text(record):
+    """单行文本：时间 级别 [token] 消息 key=value ...，异常堆栈另起几行"""
+    ts, level, token, msg, args, fields, exc = record
+    text = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))} {_LEVEL_NAMES[level].upper()}"
+    if token is not None:
+        text += f" [{token}]"
+    text += f" {_message(msg, args)}"
+    if fields:
+        text += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+    if exc:
+        text += '\n' + exc.rstrip('\n')
+    return text
+
+
+class LogWriter:
+    """后台线程：从队列取出记录，格式化后写入 stdout 或文件，文件超过 max_bytes 时轮转
+
+    conn 不为空时（worker 进程）不格式化，把消息格式化后的记录成批发到该 Pipe。
+    """
+    __slots__ = ('records', 'path', 'max_bytes', 'backup_count', 'conn', '_format', '_stream', '_size', '_thread')
+
+    def __init__(self, records, path='', fmt='json', max_bytes=0, backup_count=5, conn=None):
+        self.records = records
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.conn = conn
+        self._format = format_json if fmt == 'json' else format_text
+        self._stream = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name='bless-log-writer', daemon=True)
+
+    def start(self):
+        if self.path:
+            self._open()
+        self._thread.start()
+
+    def _open(self):
+        self._stream = open(self.path, 'ab')
+        self._size = self._stream.tell()
+
+    def _rotate(self):
+        self._stream.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def _run(self):
+        records = self.records
+        running = True
+        while running:
+            batch = [records.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(records.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:  # 写日志失败不能让线程退出，之后的记录照常尝试写出
+                    sys.stderr.write(f"日志写入失败: {str(e)}\n")
+
+    def _write(self, batch):
+        if self.conn is not None:
+            self.conn.send([
+                (ts, level, token, _message(msg, args), (), fields, exc)
+                for ts, level, token, msg, args, fields, exc in batch
+            ])
+            return
+        text = '\n'.join([self._format(record) for record in batch]) + '\n'
+        if self._stream is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        data = text.encode()
+        if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._stream.write(data)
+        self._stream.flush()
+        self._size += len(data)
+
+    def stop(self):
+        """写完队列中剩余的记录后停止线程"""
+        self.records.put(None)
+        self._thread.join()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+_writer = None
+
+
+def start_logging(level='info', path='', fmt='json', max_bytes=0, backup_count=5, conn=None):
+    """启动后台写日志线程；path 为空时写到 stdout，max_bytes 大于 0 时按大小轮转，保留 backup_count 个旧文件
+
+    conn 不为空时（worker 进程）不写出，而是把记录发到该 Pipe，由 supervisor 的 forward_log_records 写出。
+    """
+    global _writer
+    if _writer is not None:
+        return
+    records = queue.SimpleQueue()
+    _writer = LogWriter(records, path, fmt, max_bytes, backup_count, conn)
+    _writer.start()
+    logger.records = records
+    logger.level = _LEVEL_VALUES[level]
+
+
+def forward_log_records(conn, **fields):
+    """supervisor 中：读出 worker 经 Pipe 发来的全部记录，加上 fields 后交给本进程的日志线程
+
+    Pipe 已关闭时抛出 EOFError。
+    """
+    while conn.poll():
+        batch = conn.recv()
+        if logger.records is None:
+            continue
+        for record in batch:
+            record[5].update(fields)
+            logger.records.put(record)
+
+
+def stop_logging():
+    """写完队列中剩余的记录后停止后台线程，之后的记录被丢弃"""
+    global _writer
+    if _writer is None:
+        return
+    logger.level = _DISABLED
+    _writer.stop()
+    logger.records = None
+    _writer = None
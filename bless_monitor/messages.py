@@ -0,0 +1,188 @@
+"""通知消息内容：状态变化、离线警告和状态报告
+
+统计数字统一取自 fleet.FleetStats，消息按下面的模板渲染。
+"""
+from datetime import datetime, timedelta
+
+from .node_diff import format_change, is_reward_reset
+
+CHANGE_TEMPLATE = """【节点状态变化监控】
+时间: {time}
+
+变化详情:
+{changes}"""
+
+STATS_TEMPLATE = """节点总数: {stats.nodes}
+  • 在线节点: {stats.online}"""
+
+REWARD_TEMPLATE = """
+💰 奖励统计:
+  • 总奖励: {stats.total_reward}
+  • 今日奖励: {stats.today_reward}"""
+
+OFFLINE_TEMPLATE = """⚠️ 【节点离线警告】⚠️
+时间: {time}
+
+📊 节点统计:
+  • {counts}
+  • 离线节点: {offline}
+{rewards}
+
+❌ 离线节点详情:
+{nodes}"""
+
+FLAPPING_TEMPLATE = """
+
+〰️ 频繁上下线（暂停上下线变化通知，确认离线的仍在上方列出）: {count}
+  • {nodes}"""
+
+STATUS_TEMPLATE = """📊 【节点状态报告】
+时间: {time}
+
+📈 节点统计:
+  • {counts}
+{rewards}{extra}"""
+
+EARNERS_TEMPLATE = """
+
+🏆 今日奖励排行:
+  • 最高: {top}
+  • 最低: {bottom}"""
+
+EARNINGS_TEMPLATE = """
+
+⏱ 收益速率:
+  • 每小时: {earnings.rate:.4g}
+  • 预计今日: {earnings.projected:.6g}
+  • 节点中位数: {earnings.median:.4g}/小时"""
+
+UNDERPERFORMERS_TEMPLATE = """
+  • 低收益节点 {earnings.underperforming} 个（低于中位数的 {ratio:.0%}）: {nodes}"""
+
+
+def format_timestamp(time_offset):
+    adjusted_time = datetime.now() + timedelta(hours=time_offset)
+    return adjusted_time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _render_nodes(nodes, marked=False):
+    """节点明细，每个节点两行，pubKey 只显示最后 6 位
+
+    明细可能有上万行，逐节点的这一行直接用 f-string（比 str.format 模板快约一倍），其余部分用上面的模板。
+    """
+    if marked:
+        return "\n".join([
+            f"  • 节点: ...{node.pub_key[-6:]} {'✅' if node.is_connected else '❌'}\n"
+            f"    奖励: {node.total_reward} / 今日: {node.today_reward}"
+            for node in nodes
+        ])
+    return "\n".join([
+        f"  • 节点: ...{node.pub_key[-6:]}\n    奖励: {node.total_reward} / 今日: {node.today_reward}"
+        for node in nodes
+    ])
+
+
+def _render_offline_nodes(nodes, flapping):
+    """离线节点明细，抖动中的节点加上标注"""
+    if not flapping:
+        return _render_nodes(nodes)
+    return "\n".join([
+        f"  • 节点: ...{node.pub_key[-6:]}{' 〰️抖动中' if node.node_id in flapping else ''}\n"
+        f"    奖励: {node.total_reward} / 今日: {node.today_reward}"
+        for node in nodes
+    ])
+
+
+def _render_earners(stats):
+    top, bottom = stats.earners()
+    if not top:
+        return ''
+    return EARNERS_TEMPLATE.format(top=_short_names(top), bottom=_short_names(bottom))
+
+
+def _short_names(nodes):
+    return '、'.join(f"...{node.pub_key[-6:]}({node.today_reward})" for node in nodes)
+
+
+def _render_earnings(stats, underperform_ratio):
+    earnings = stats.earnings
+    if earnings is None or earnings.median is None:
+        return ''
+    text = EARNINGS_TEMPLATE.format(earnings=earnings)
+    if earnings.underperforming:
+        nodes = '、'.join(f"...{node.pub_key[-6:]}({rate:.3g}/小时)" for node, rate in earnings.underperformers)
+        if earnings.underperforming > len(earnings.underperformers):
+            nodes += " 等"
+        text += UNDERPERFORMERS_TEMPLATE.format(earnings=earnings, ratio=underperform_ratio, nodes=nodes)
+    return text
+
+
+def summary_fields(stats):
+    """每轮获取数据后记录到日志的统计字段"""
+    fields = {
+        'nodes': stats.nodes,
+        'online': stats.online,
+        'total_reward': stats.total_reward,
+        'today_reward': stats.today_reward,
+    }
+    earnings = stats.earnings
+    if earnings is not None and earnings.median is not None:
+        fields.update(reward_rate=round(earnings.rate, 4), projected_today_reward=round(earnings.projected, 4),
+                      underperforming=earnings.underperforming)
+    return fields
+
+
+def build_change_message(changes, time_offset):
+    """构建状态变化消息"""
+    if not changes:
+        return None
+    resets = sum(1 for change in changes if is_reward_reset(change))
+    if resets > 1:
+        # 跨日时每个节点都会清零，合并为一行
+        lines = [f"- {resets} 个节点今日奖励已按日清零"]
+        lines.extend(f"- {format_change(change)}" for change in changes if not is_reward_reset(change))
+    else:
+        lines = [f"- {format_change(change)}" for change in changes]
+    return CHANGE_TEMPLATE.format(time=format_timestamp(time_offset), changes="\n".join(lines))
+
+
+def build_offline_status_message(stats, time_offset, offline=None, flapping=()):
+    """构建离线节点状态消息，offline 为要列出的离线节点，默认为本轮全部离线节点；flapping 为抖动中的节点，
+    其中列在 offline 里的加上标注
+    """
+    if offline is None:
+        offline = stats.offline
+    message = OFFLINE_TEMPLATE.format(
+        time=format_timestamp(time_offset),
+        counts=STATS_TEMPLATE.format(stats=stats),
+        offline=len(offline),
+        rewards=REWARD_TEMPLATE.format(stats=stats),
+        nodes=_render_offline_nodes(offline, {node.node_id for node in flapping})
+    )
+    if flapping:
+        nodes = '、'.join(f"...{node.pub_key[-6:]}" for node in flapping)
+        message += FLAPPING_TEMPLATE.format(count=len(flapping), nodes=nodes)
+    return message
+
+
+def build_status_message(stats, time_offset, show_detail=False, underperform_ratio=0.5):
+    """构建状态报告，show_detail 为 True 时列出每个节点，否则列出今日奖励最高和最低的节点
+
+    有收益速率汇总时附上每小时奖励、当日预测和低收益节点（underperform_ratio 仅用于显示判定比例）。
+    """
+    rewards = REWARD_TEMPLATE.format(stats=stats)
+    if stats.reward_delta:
+        rewards += f"\n  • 本轮新增: {stats.reward_delta:+}"
+    if show_detail:
+        extra = "\n\n📝 节点详情:"
+        if stats.nodes:
+            extra += "\n" + _render_nodes(stats.snapshot.values(), marked=True)
+    else:
+        extra = _render_earners(stats)
+    extra = _render_earnings(stats, underperform_ratio) + extra
+    return STATUS_TEMPLATE.format(
+        time=format_timestamp(time_offset),
+        counts=STATS_TEMPLATE.format(stats=stats),
+        rewards=rewards,
+        extra=extra
+    )
@@ -0,0 +1,243 @@
+"""运行指标：热点路径耗时直方图和各 token 的节点/奖励数值，以 Prometheus 文本格式在 /metrics 暴露"""
+import time
+from contextlib import contextmanager
+
+from .logs import logger
+
+# 默认直方图分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def remove(self, **labels):
+        """删除一组标签对应的序列（例如 token 被移除）"""
+        self._values.pop(self._key(labels), None)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self._values.items():
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def summary(self, **labels):
+        """返回 (观测次数, 平均值, p50, p95)，分位数取所在分桶的上界；没有观测值时返回 None"""
+        series = self._values.get(self._key(labels))
+        if series is None or not series[2]:
+            return None
+        counts, total, count = series
+        quantiles = []
+        for q in (0.5, 0.95):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                if cumulative >= q * count:
+                    quantiles.append(bound)
+                    break
+        return (count, total / count, *quantiles)
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文，退出时记录耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# 热点路径耗时
+FETCH_SECONDS = Histogram('bless_fetch_seconds', '获取一个 token 节点数据的总耗时（请求+解压+解析）')
+DECOMPRESS_SECONDS = Histogram('bless_decompress_seconds', '一次响应的解压耗时')
+PARSE_SECONDS = Histogram('bless_parse_seconds', '一次响应的 JSON 解析耗时')
+DIFF_SECONDS = Histogram('bless_diff_seconds', '一次前后状态比较的耗时')
+WEBHOOK_SEND_SECONDS = Histogram('bless_webhook_send_seconds', '一次通知发送的耗时', ('backend',))
+FETCH_UNCHANGED = Counter('bless_fetch_unchanged_total', '响应未变化而跳过解析的次数')
+FETCH_ERRORS = Counter('bless_fetch_errors_total', '获取节点数据失败的次数（重试后仍失败）', ('token',))
+FETCH_RETRIES = Counter('bless_fetch_retries_total', '获取节点数据的重试次数', ('token',))
+GATEWAY_CONNECTIONS = Counter('bless_gateway_connections_total', '与网关新建的连接数（每次对应一次 TCP/TLS 握手）')
+GATEWAY_CONNECTIONS_REUSED = Counter('bless_gateway_connections_reused_total', '复用连接池中已有连接的请求数')
+CIRCUIT_OPEN = Gauge('bless_circuit_open', '熔断器是否处于断开状态（暂停请求该 token）', ('token',))
+
+# 各 token 的节点状态
+NODES = Gauge('bless_nodes', '节点总数', ('token',))
+NODES_ONLINE = Gauge('bless_nodes_online', '在线节点数', ('token',))
+TOTAL_REWARD = Gauge('bless_total_reward', '总奖励', ('token',))
+TODAY_REWARD = Gauge('bless_today_reward', '今日奖励', ('token',))
+REWARD_RATE = Gauge('bless_reward_rate_per_hour', '每小时奖励（指数加权）', ('token',))
+PROJECTED_TODAY_REWARD = Gauge('bless_projected_today_reward', '按当前速率预计的今日奖励', ('token',))
+UNDERPERFORMING_NODES = Gauge('bless_underperforming_nodes', '速率低于节点中位数 underperform_ratio 倍的节点数', ('token',))
+POLL_INTERVAL = Gauge('bless_poll_interval_seconds', '当前的轮询周期', ('token',))
+SESSION_UPTIME_MAX = Gauge('bless_session_uptime_max_seconds', '运行时间最长的进行中 session 已运行的秒数', ('token',))
+LONG_SESSIONS = Gauge('bless_long_sessions', '最早的 session 已运行满 long_session_hours 的节点数', ('token',))
+NODE_SESSION_UPTIME = Gauge(
+    'bless_node_session_uptime_seconds', '节点最早的进行中 session 已运行的秒数（node_metrics 开启时输出）',
+    ('token', 'node')
+)
+
+# 各 token 已输出 NODE_SESSION_UPTIME 的节点，用于清理已消失或没有 session 的节点
+_node_series = {}
+
+
+def observe_snapshot(token, stats, now=None, per_node=False):
+    """按 fleet.FleetStats 更新 token 的节点/奖励/session 指标；per_node 为 True 时输出每个节点的 session 运行时长"""
+    NODES.set(stats.nodes, token=token)
+    NODES_ONLINE.set(stats.online, token=token)
+    TOTAL_REWARD.set(stats.total_reward, token=token)
+    TODAY_REWARD.set(stats.today_reward, token=token)
+    if stats.earnings is not None and stats.earnings.median is not None:
+        REWARD_RATE.set(stats.earnings.rate, token=token)
+        PROJECTED_TODAY_REWARD.set(stats.earnings.projected, token=token)
+        UNDERPERFORMING_NODES.set(stats.earnings.underperforming, token=token)
+    if now is None:
+        return
+    if stats.session_start is not None:
+        SESSION_UPTIME_MAX.set(now - stats.session_start, token=token)
+    else:
+        SESSION_UPTIME_MAX.remove(token=token)
+    LONG_SESSIONS.set(stats.long_sessions, token=token)
+    if per_node:
+        observed = set()
+        for node_id, node in stats.snapshot.items():
+            start = node.session_start
+            if start is not None:
+                NODE_SESSION_UPTIME.set(now - start, token=token, node=node_id)
+                observed.add(node_id)
+        for node_id in _node_series.get(token, set()) - observed:
+            NODE_SESSION_UPTIME.remove(token=token, node=node_id)
+        _node_series[token] = observed
+
+
+def remove_token_series(token):
+    """删除 token 的全部指标序列（token 被移除后不再输出过时的值）"""
+    for metric in REGISTRY:
+        if 'token' in metric.labelnames:
+            index = metric.labelnames.index('token')
+            for key in [key for key in metric._values if key[index] == token]:
+                del metric._values[key]
+    _node_series.pop(token, None)
+
+
+def render():
+    """生成 Prometheus 文本格式的全部指标"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+async def _handle_metrics(request):
+    from aiohttp import web
+    return web.Response(body=render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+_runner = None
+
+
+async def start_metrics_server(host, port):
+    """在 host:port 上启动 /metrics 服务，port 为空时不启动"""
+    global _runner
+    if not port or _runner is not None:
+        return
+    from aiohttp import web  # 只在启用指标服务时导入
+
+    app = web.Application()
+    app.router.add_get('/metrics', _handle_metrics)
+    _runner = web.AppRunner(app, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    logger.info("指标服务已启动: http://%s:%d/metrics", host, port)
+
+
+async def stop_metrics_server():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+    _runner = None
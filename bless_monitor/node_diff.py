@@ -0,0 +1,113 @@
+"""节点状态差异计算：按 _id 索引的快照之间线性时间比较"""
+from collections import namedtuple
+
+from .earnings import is_daily_reset
+from .snapshot import unpack_fingerprints
+
+# 变化类型
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+# 单条变化记录，新增/移除节点时 field/old/new 为 None
+# field 为 sessions 时 old/new 为本轮结束/开始的 session 数；为 session_uptime 时 new 为已运行秒数
+NodeChange = namedtuple('NodeChange', ['kind', 'node_id', 'pub_key', 'field', 'old', 'new'])
+
+# 参与比较的快照字段
+DIFF_FIELDS = ('is_connected', 'total_reward', 'today_reward')
+
+
+def session_changes(old, new):
+    """两轮压缩 session 之间 (结束的数量, 开始的数量)，复杂度 O(session 数)"""
+    old, new = unpack_fingerprints(old), unpack_fingerprints(new)
+    return len(old - new), len(new - old)
+
+
+def _long_session(node, low, high):
+    start = node.session_start
+    return start is not None and low < start <= high
+
+
+def diff_states(previous, current, since=None, now=None, long_session=None):
+    """比较前后两次快照（snapshot.take_snapshot 的返回值），返回 NodeChange 列表
+
+    两侧均按 _id 索引，整体复杂度 O(n)。session 逐个按指纹比较，一个 session 被另一个替换时数量不变也能发现。
+    传入 since/now（上一轮和本轮的 Unix 时间）和 long_session（秒）时，
+    最早的 session 在这两轮之间运行满 long_session 的节点记一条 session_uptime 变化。
+    """
+    changes = []
+    check_long = since is not None and now is not None and long_session
+    if check_long:
+        low, high = since - long_session, now - long_session
+
+    for node_id, node in current.items():
+        prev_node = previous.get(node_id)
+
+        if prev_node is None:
+            changes.append(NodeChange(ADDED, node_id, node.pub_key, None, None, None))
+            continue
+
+        for field in DIFF_FIELDS:
+            old, new = getattr(prev_node, field), getattr(node, field)
+            if old != new:
+                changes.append(NodeChange(CHANGED, node_id, node.pub_key, field, old, new))
+        if node.sessions != prev_node.sessions and prev_node.sessions is not None:
+            ended, started = session_changes(prev_node.sessions, node.sessions)
+            if ended or started:
+                changes.append(NodeChange(CHANGED, node_id, node.pub_key, 'sessions', ended, started))
+        if check_long and _long_session(node, low, high):
+            changes.append(NodeChange(CHANGED, node_id, node.pub_key, 'session_uptime', None,
+                                      now - node.session_start))
+
+    # 上一次存在、本次消失的节点
+    for node_id, prev_node in previous.items():
+        if node_id not in current:
+            changes.append(NodeChange(REMOVED, node_id, prev_node.pub_key, None, None, None))
+
+    return changes
+
+
+def long_session_changes(current, since, now, long_session):
+    """响应未变化、没有做完整比较时，单独找出在 since~now 之间运行满 long_session 秒的 session"""
+    low, high = since - long_session, now - long_session
+    return [
+        NodeChange(CHANGED, node_id, node.pub_key, 'session_uptime', None, now - node.session_start)
+        for node_id, node in current.items() if _long_session(node, low, high)
+    ]
+
+
+def is_reward_reset(change):
+    """今日奖励按日清零产生的变化记录"""
+    return change.field == 'today_reward' and is_daily_reset(change.old, change.new)
+
+
+def format_change(change):
+    """将变化记录格式化为消息文本"""
+    if change.kind == ADDED:
+        return f"新增节点: {change.pub_key}"
+    if change.kind == REMOVED:
+        return f"移除节点: {change.pub_key}"
+
+    if change.field == 'is_connected':
+        status = "上线" if change.new else "离线"
+        return f"节点 {change.pub_key} {status}"
+    if change.field == 'flapping':
+        if change.new:
+            return f"节点 {change.pub_key} 频繁上下线，暂停该节点的上下线告警"
+        return f"节点 {change.pub_key} 已恢复稳定"
+    if change.field == 'total_reward':
+        return f"节点 {change.pub_key} 总奖励变化: +{change.new - change.old}"
+    if change.field == 'today_reward':
+        if is_daily_reset(change.old, change.new):
+            return f"节点 {change.pub_key} 今日奖励已按日清零（昨日 {change.old}，现为 {change.new}）"
+        return f"节点 {change.pub_key} 今日奖励变化: +{change.new - change.old}"
+    if change.field == 'sessions':
+        parts = []
+        if change.new:
+            parts.append(f"开始 {change.new} 个")
+        if change.old:
+            parts.append(f"结束 {change.old} 个")
+        return f"节点 {change.pub_key} session变化: {'，'.join(parts)}"
+    if change.field == 'session_uptime':
+        return f"节点 {change.pub_key} 的 session 已连续运行 {change.new / 3600:.1f} 小时"
+    return f"节点 {change.pub_key} {change.field}变化: {change.old} -> {change.new}"
@@ -0,0 +1,191 @@
+"""通知渠道：企业微信、Telegram、Slack、通用 JSON webhook 和本地文件/标准输出
+
+每个渠道持有自己的连接池、超时和限速参数，send() 成功返回 True，不可重试的失败返回 False，
+可重试的失败抛出 RetryableSendError。渠道内部的意外异常只记为该渠道发送失败，不会影响其他渠道。
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from .logs import logger
+from .metrics import WEBHOOK_SEND_SECONDS
+from .webhook import SEND_TIMEOUT, RetryableSendError, create_webhook_session, post_json
+
+# 企业微信接口频率超限的错误码（HTTP 状态仍为 200）
+WECHAT_ERRCODE_RATE_LIMITED = 45009
+
+
+class Notifier:
+    """通知渠道基类，子类实现 _send(content)"""
+    kind = None
+    max_bytes = 2048  # 单条消息最大字节数（UTF-8），超出由通知队列按行拆分；None 表示不拆分
+    rate_per_minute = 20  # 默认限速
+
+    def __init__(self, name=None, timeout=SEND_TIMEOUT, rate_per_minute=None, proxy=None):
+        self.name = name or self.kind
+        self.timeout = timeout
+        self.proxy = proxy
+        if rate_per_minute is not None:
+            self.rate_per_minute = rate_per_minute
+        self._session = None
+
+    @property
+    def session(self):
+        """本渠道独占的连接池，首次使用时创建"""
+        if self._session is None or self._session.closed:
+            self._session = create_webhook_session(self.timeout)
+        return self._session
+
+    async def send(self, content):
+        start = time.perf_counter()
+        try:
+            return await self._send(content)
+        except RetryableSendError:
+            raise
+        except Exception as e:
+            logger.error("[%s] 发送出错: %s", self.name, e)
+            return False
+        finally:
+            WEBHOOK_SEND_SECONDS.observe(time.perf_counter() - start, backend=self.name)
+
+    async def _send(self, content):
+        raise NotImplementedError
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class WeChatNotifier(Notifier):
+    """企业微信群机器人文本消息"""
+    kind = 'wechat'
+
+    def __init__(self, url, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    async def _send(self, content):
+        payload = {
+            "msgtype": "text",
+            "text": {
+                "content": content
+            }
+        }
+        result = await post_json(self.session, self.url, payload, self.proxy)
+        if result is None:
+            return False
+        errcode = result.get('errcode', 0) if isinstance(result, dict) else 0
+        if errcode == WECHAT_ERRCODE_RATE_LIMITED:
+            raise RetryableSendError(f"Failed to send message: {result}")
+        if errcode:
+            logger.error("[%s] Failed to send message: %s", self.name, result)
+            return False
+        logger.info("[%s] Message sent successfully!", self.name)
+        return True
+
+
+class TelegramNotifier(Notifier):
+    """Telegram Bot sendMessage"""
+    kind = 'telegram'
+    max_bytes = 4096
+
+    def __init__(self, bot_token, chat_id, api_base='https://api.telegram.org', **kwargs):
+        super().__init__(**kwargs)
+        self.url = f"{api_base.rstrip('/')}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+
+    async def _send(self, content):
+        payload = {"chat_id": self.chat_id, "text": content, "disable_web_page_preview": True}
+        result = await post_json(self.session, self.url, payload, self.proxy)
+        if not isinstance(result, dict) or not result.get('ok'):
+            if result is not None:
+                logger.error("[%s] Failed to send message: %s", self.name, result)
+            return False
+        return True
+
+
+class SlackNotifier(Notifier):
+    """Slack Incoming Webhook"""
+    kind = 'slack'
+    max_bytes = 4000
+    rate_per_minute = 60
+
+    def __init__(self, url, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    async def _send(self, content):
+        # Slack 成功时返回纯文本 "ok"
+        return await post_json(self.session, self.url, {"text": content}, self.proxy) is not None
+
+
+class JsonWebhookNotifier(Notifier):
+    """通用 JSON webhook：POST {"source", "time", "text"}，HTTP 200 即视为成功"""
+    kind = 'json'
+    max_bytes = None
+    rate_per_minute = 60
+
+    def __init__(self, url, headers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.headers = headers
+
+    async def _send(self, content):
+        payload = {"source": "bless-network-monitor", "time": time.time(), "text": content}
+        return await post_json(self.session, self.url, payload, self.proxy, self.headers) is not None
+
+
+class FileNotifier(Notifier):
+    """追加写入本地文件，path 为 '-' 时输出到标准输出；写文件在线程池中执行，不阻塞事件循环"""
+    kind = 'file'
+    max_bytes = None
+    rate_per_minute = 600
+
+    def __init__(self, path='-', **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def _write(self, text):
+        if self.path == '-':
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        with open(self.path, 'a', encoding='utf-8') as fp:
+            fp.write(text)
+
+    async def _send(self, content):
+        text = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n{content}\n\n"
+        await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, self._write, text), self.timeout)
+        return True
+
+
+NOTIFIER_TYPES = {
+    cls.kind: cls
+    for cls in (WeChatNotifier, TelegramNotifier, SlackNotifier, JsonWebhookNotifier, FileNotifier)
+}
+
+
+def build_notifiers(configs, proxy=None):
+    """按配置列表创建通知渠道
+
+    每项为字典，'type' 取 NOTIFIER_TYPES 中的键，其余键作为构造参数（如 url、timeout、rate_per_minute）；
+    'use_proxy' 为 True 的渠道通过 proxy 发送。
+    """
+    notifiers = []
+    names = set()
+    for config in configs:
+        options = dict(config)
+        kind = options.pop('type')
+        if kind not in NOTIFIER_TYPES:
+            raise ValueError(f"未知的通知渠道类型: {kind}")
+        if options.pop('use_proxy', False):
+            options['proxy'] = proxy
+        notifier = NOTIFIER_TYPES[kind](**options)
+        # 同类型的多个渠道按序号区分，便于日志和指标
+        if notifier.name in names:
+            notifier.name = f"{notifier.name}-{len(notifiers)}"
+        names.add(notifier.name)
+        notifiers.append(notifier)
+    return notifiers
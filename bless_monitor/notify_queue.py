@@ -0,0 +1,247 @@
+"""通知队列：合并多个 token 的待发消息为摘要，按令牌桶限速发送，超长拆分，失败退避重试
+
+NotificationDispatcher 为每个通知渠道各建一个队列，同一条消息并行分发到所有渠道。
+"""
+import asyncio
+import random
+
+from .logs import logger
+from .webhook import RetryableSendError
+
+WECHAT_MAX_CONTENT_BYTES = 2048  # 企业微信文本消息 content 的最大字节数
+DIGEST_SEPARATOR = "\n\n--------\n\n"
+CLOSE_TIMEOUT = 10  # 关闭时等待发送剩余消息的最长秒数，超时后丢弃
+
+
+class TokenBucket:
+    """令牌桶：容量 capacity，每秒补充 rate 个令牌"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = None
+
+    async def acquire(self):
+        """取走一个令牌，不足时等待"""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._updated is not None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 容忍浮点误差，避免等待时长小到时钟无法推进
+            if self._tokens >= 1 - 1e-9:
+                self._tokens = max(0.0, self._tokens - 1)
+                return
+            await asyncio.sleep(max((1 - self._tokens) / self.rate, 0.001))
+
+
+def split_message(content, max_bytes=WECHAT_MAX_CONTENT_BYTES):
+    """按行把消息拆成不超过 max_bytes 字节（UTF-8）的若干段，单行过长时按字符截断"""
+    chunks = []
+    lines = []
+    size = 0
+    for line in content.split("\n"):
+        line_size = len(line.encode()) + 1
+        if line_size > max_bytes:
+            # 单行超长，按字符切开后逐段处理
+            pieces, piece, piece_size = [], [], 1
+            for char in line:
+                char_size = len(char.encode())
+                if piece_size + char_size > max_bytes:
+                    pieces.append("".join(piece))
+                    piece, piece_size = [], 1
+                piece.append(char)
+                piece_size += char_size
+            pieces.append("".join(piece))
+        else:
+            pieces = [line]
+
+        for piece in pieces:
+            piece_size = len(piece.encode()) + 1
+            if lines and size + piece_size > max_bytes:
+                chunks.append("\n".join(lines))
+                lines, size = [], 0
+            lines.append(piece)
+            size += piece_size
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+class NotificationQueue:
+    """合并、限速、去重的通知队列
+
+    submit() 只把消息放入待发列表；后台任务在一小段聚合窗口后把所有待发消息拼成摘要，
+    按企业微信的长度上限拆分，每段发送前从令牌桶取令牌，429/5xx/频率超限时指数退避重试。
+    同一 key 提交的 fingerprint 与上一次相同时视为重复告警，直接丢弃。
+    """
+
+    def __init__(self, send, rate_per_minute=20, burst=5, max_bytes=WECHAT_MAX_CONTENT_BYTES,
+                 linger=1.0, max_retries=5, backoff_base=2.0, backoff_max=60.0, name=None):
+        self._send = send
+        self._prefix = f"[{name}] " if name else ""
+        self._bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pending = []
+        self._fingerprints = {}
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._closed = asyncio.Event()  # 关闭时打断重试前的等待
+        self._task = None
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'sent': 0, 'retried': 0, 'dropped': 0}
+
+    def submit(self, message, key=None, fingerprint=None):
+        """提交一条消息；返回 False 表示与该 key 上次的告警重复而被丢弃"""
+        if key is not None:
+            if fingerprint is not None and self._fingerprints.get(key) == fingerprint:
+                self.stats['deduplicated'] += 1
+                return False
+            self._fingerprints[key] = fingerprint
+        self._pending.append(message)
+        self.stats['submitted'] += 1
+        self._wakeup.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def close(self, timeout=CLOSE_TIMEOUT):
+        """发送完剩余消息后停止：关闭期间失败的消息不再重试，最多等待 timeout 秒，超时后丢弃未发送的消息"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._closed.set()
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self.stats['dropped'] += len(self._pending)  # 尚未开始发送的消息
+            logger.error("%s关闭时 %.0f 秒内未能发送完消息，已丢弃剩余消息", self._prefix, timeout)
+        self._task = None
+
+    async def _run(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            if not self._closing:
+                # 聚合窗口：同一批触发的多个 token 的消息合并发送
+                await asyncio.sleep(self.linger)
+            self._wakeup.clear()
+            await self._flush()
+
+    async def _flush(self):
+        while self._pending:
+            messages, self._pending = self._pending, []
+            content = DIGEST_SEPARATOR.join(messages)
+            chunks = split_message(content, self.max_bytes) if self.max_bytes else [content]
+            for index, chunk in enumerate(chunks):
+                try:
+                    await self._bucket.acquire()
+                    await self._deliver(chunk)
+                except asyncio.CancelledError:  # 关闭超时
+                    self.stats['dropped'] += len(chunks) - index
+                    raise
+
+    async def _deliver(self, content):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if await self._send(content) is False:
+                    break
+                self.stats['sent'] += 1
+                return
+            except RetryableSendError as e:
+                if attempt == self.max_retries or self._closing:
+                    break
+                delay = min(self.backoff_max, e.retry_after or self.backoff_base * 2 ** attempt)
+                delay *= random.uniform(1.0, 1.5)
+                self.stats['retried'] += 1
+                logger.warning("%s%s，%.1f 秒后重试（第 %d 次）", self._prefix, e, delay, attempt + 1)
+                try:
+                    await asyncio.wait_for(self._closed.wait(), delay)
+                    break  # 等待期间开始关闭，不再重试
+                except asyncio.TimeoutError:
+                    pass
+                await self._bucket.acquire()
+        self.stats['dropped'] += 1
+        logger.error("%s消息发送失败，已丢弃", self._prefix)
+
+
+class NotificationDispatcher:
+    """把每条消息分发到所有通知渠道
+
+    每个渠道一个独立的 NotificationQueue 和后台任务，按该渠道的长度上限和频率限制各自合并、
+    拆分、重试；某个渠道变慢、限流或故障只会积压它自己的队列。去重在分发前统一进行一次。
+    """
+
+    def __init__(self, notifiers, linger=1.0):
+        self.notifiers = list(notifiers)
+        self.queues = [
+            NotificationQueue(notifier.send, rate_per_minute=notifier.rate_per_minute,
+                              max_bytes=notifier.max_bytes, linger=linger, name=notifier.name)
+            for notifier in self.notifiers
+        ]
+        self._fingerprints = {}
+        self.deduplicated = 0
+
+    @property
+    def stats(self):
+        """各渠道的发送统计 {渠道名: stats}"""
+        return {notifier.name: queue.stats for notifier, queue in zip(self.notifiers, self.queues)}
+
+    def submit(self, message, key=None, fingerprint=None):
+        """提交一条消息到所有渠道；返回 False 表示与该 key 上次的告警重复而被丢弃"""
+        if key is not None:
+            if fingerprint is not None and self._fingerprints.get(key) == fingerprint:
+                self.deduplicated += 1
+                return False
+            self._fingerprints[key] = fingerprint
+        for queue in self.queues:
+            queue.submit(message)
+        return True
+
+    def start(self):
+        for queue in self.queues:
+            queue.start()
+        return self
+
+    async def close(self):
+        """各渠道发送完剩余消息后停止，并关闭各自的连接池"""
+        await asyncio.gather(*(queue.close() for queue in self.queues))
+        await asyncio.gather(*(notifier.close() for notifier in self.notifiers))
+
+
+_queue = None
+
+
+def start_notification_queue(notifiers):
+    """创建并启动共享的通知分发器（必须在事件循环内调用）"""
+    global _queue
+    if _queue is None:
+        _queue = NotificationDispatcher(notifiers).start()
+    return _queue
+
+
+def install_notification_queue(queue):
+    """以自定义对象（需提供 submit() 和异步 close()）作为共享的通知分发器，例如多进程模式下转发消息的 worker"""
+    global _queue
+    _queue = queue
+    return _queue
+
+
+def get_notification_queue():
+    return _queue
+
+
+async def stop_notification_queue():
+    """发送完剩余消息并停止共享的通知分发器"""
+    global _queue
+    if _queue is not None:
+        await _queue.close()
+    _queue = None
@@ -0,0 +1,87 @@
+"""可选的进程池模式：解压、解析和状态比较放到子进程执行，事件循环只负责网络请求
+
+子进程只返回精简结果（NodeSnapshot 字典和 NodeChange 列表），不返回原始节点数据。
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+
+from .fetch import NodeArrayParser, fetch_raw_body, make_decoder
+from .logs import logger
+from .metrics import DECOMPRESS_SECONDS, DIFF_SECONDS, FETCH_SECONDS, PARSE_SECONDS
+from .node_diff import diff_states
+from .snapshot import take_snapshot
+
+_executor = None
+
+
+def get_process_pool(workers):
+    """获取共享进程池，首次调用时创建"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def shutdown_process_pool():
+    """关闭进程池，程序退出前调用"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+
+
+def process_payload(body, content_encoding, previous, diff_options=None):
+    """在子进程中执行：解压、解析、建快照，并与上一轮快照比较（diff_options 为 diff_states 的关键字参数）
+
+    返回 (快照, 变化列表, 各阶段耗时)，耗时由主进程记录到指标中。
+    """
+    start = time.perf_counter()
+    decoder = make_decoder(content_encoding)
+    data = decoder.decompress(body) + decoder.flush()
+    decoded = time.perf_counter()
+    snapshot = take_snapshot(NodeArrayParser().feed(data, final=True))
+    parsed = time.perf_counter()
+    changes = diff_states(previous, snapshot, **(diff_options or {})) if previous else []
+    timings = {
+        'decompress': decoded - start,
+        'parse': parsed - decoded,
+        'diff': time.perf_counter() - parsed,
+    }
+    return snapshot, changes, timings
+
+
+async def fetch_nodes_data_offloaded(session, api_url, api_token, previous, workers, cache=None,
+                                     verbose=False, diff_options=None):
+    """获取节点数据并在进程池中处理，返回 (快照, 变化列表)
+
+    传入 FetchCache 且响应未变化时不提交进程池，直接返回上一次的快照和空变化列表。
+    """
+    start = time.perf_counter()
+    try:
+        content_encoding, body = await fetch_raw_body(session, api_url, api_token, cache, verbose)
+        if body is None:
+            return cache.snapshot, []
+        if verbose:
+            logger.debug("Content-Encoding: %s, 压缩数据大小: %d 字节", content_encoding, len(body))
+        loop = asyncio.get_running_loop()
+        snapshot, changes, timings = await loop.run_in_executor(
+            get_process_pool(workers), process_payload, body, content_encoding, previous, diff_options
+        )
+    except aiohttp.ClientError as e:
+        logger.error("网络请求错误: %s", e)
+        raise
+    except Exception as e:
+        logger.error("其他异常: %s", e)
+        raise
+
+    FETCH_SECONDS.observe(time.perf_counter() - start)
+    DECOMPRESS_SECONDS.observe(timings['decompress'])
+    PARSE_SECONDS.observe(timings['parse'])
+    if previous:
+        DIFF_SECONDS.observe(timings['diff'])
+    if cache is not None:
+        cache.store(snapshot)
+    return snapshot, changes
@@ -0,0 +1,114 @@
+"""配置热加载：配置文件变化（或收到 SIGHUP）时重新读取，把 token 的增删改增量应用到运行中的监控，不重启调度循环
+
+- 每 config_reload_interval 秒比较一次配置文件的 (inode, 修改时间, 大小)，只 stat 不读文件；设为 0 时只响应 SIGHUP。
+  编辑器先写临时文件再改名替换时 inode 会变化，同样能发现。
+- 读取和校验在线程中进行；文件有误（例如保存到一半）时记录错误并继续使用原配置，下次变化时再试。
+- 只有 tokens（以及 api_token）热加载：新增的 token 从持久化存储恢复上一轮快照后按自己的相位开始调度，
+  移除的 token 停止调度并删除其持久化快照，凭据或周期变化的 token 保留快照、session、收益速率和上下线状态；
+  未变化的 token 完全不受影响。其他配置项有变化时记录一条警告，重启后生效。
+"""
+import asyncio
+import os
+import signal
+
+from .config import ConfigError, changed_settings, load_config
+from .logs import logger
+
+
+class ConfigWatcher:
+    """监视配置文件，变化时调用 apply(tokens 配置列表)，apply 返回 (新增, 移除, 修改) 的 token 名称列表"""
+    __slots__ = ('path', 'config', 'apply', 'interval', 'reloads', '_loaded', '_stamp', '_trigger')
+
+    def __init__(self, path, config, apply, interval=5):
+        self.path = path
+        self.config = config
+        self.apply = apply
+        self.interval = interval
+        self.reloads = 0  # 已应用的重新加载次数
+        self._loaded = config  # 上一次读到的配置，需要重启的配置项只在修改后提示一次
+        self._stamp = self._stat()
+        self._trigger = asyncio.Event()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def trigger(self):
+        """立即重新加载（SIGHUP），不论文件是否变化"""
+        self._trigger.set()
+
+    async def run(self):
+        """持续监视，直到被取消"""
+        while True:
+            try:
+                await asyncio.wait_for(self._trigger.wait(), self.interval or None)
+            except asyncio.TimeoutError:
+                pass
+            forced = self._trigger.is_set()
+            self._trigger.clear()
+            stamp = self._stat()
+            if stamp is None or (stamp == self._stamp and not forced):
+                continue
+            self._stamp = stamp
+            try:
+                config = await asyncio.to_thread(load_config, self.path)
+            except ConfigError as e:
+                logger.error("重新加载配置失败，继续使用原配置:\n%s", e)
+                continue
+            try:
+                self.reload(config)
+            except Exception as e:  # 应用出错不能让监视停止
+                logger.exception("应用新配置时出错: %s", e)
+
+    def reload(self, config):
+        """应用新配置中的 tokens，返回 (新增, 移除, 修改) 的 token 名称列表"""
+        ignored = changed_settings(self._loaded, config)
+        self._loaded = config
+        if ignored:
+            logger.warning("以下配置项的修改需要重启后生效: %s", ', '.join(ignored), keys=ignored)
+        added, removed, changed = self.apply(config.tokens)
+        self.config.tokens = config.tokens
+        self.reloads += 1
+        logger.info("已重新加载配置：新增 %d 个、移除 %d 个、修改 %d 个 token", len(added), len(removed), len(changed),
+                    added=added, removed=removed, changed=changed)
+        return added, removed, changed
+
+
+_watcher = None
+_task = None
+
+
+def get_config_watcher():
+    return _watcher
+
+
+def start_config_watcher(path, config, apply):
+    """在当前事件循环中开始监视配置文件，并在收到 SIGHUP 时立即重新加载（仅 Unix）"""
+    global _watcher, _task
+    if _watcher is not None:
+        return _watcher
+    loop = asyncio.get_running_loop()
+    _watcher = ConfigWatcher(path, config, apply, config.config_reload_interval)
+    _task = loop.create_task(_watcher.run())
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _watcher.trigger)
+    except (AttributeError, NotImplementedError, RuntimeError):  # Windows 没有 SIGHUP，或不在主线程
+        pass
+    return _watcher
+
+
+async def stop_config_watcher():
+    global _watcher, _task
+    if _watcher is None:
+        return
+    try:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _watcher = None
+    _task = None
@@ -0,0 +1,99 @@
+"""网关请求的容错：瞬时错误按抖动指数退避重试，认证失败或连续失败的 token 由熔断器暂停请求"""
+import asyncio
+import random
+
+import aiohttp
+
+from .fetch import DecodeError, FetchError
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_retryable(error):
+    """429/5xx、网络错误、超时和响应体被截断导致的解压失败可以重试；401/403 等其他状态不重试"""
+    if isinstance(error, FetchError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, DecodeError))
+
+
+def backoff_delay(attempt, base_delay, max_delay, retry_after=None):
+    """第 attempt 次重试前的等待时间：服务端指定了 Retry-After 时以其为准，否则指数退避，都不超过 max_delay，
+    再乘 1~1.5 的随机抖动
+    """
+    delay = min(max_delay, retry_after or base_delay * 2 ** attempt)
+    return delay * random.uniform(1.0, 1.5)
+
+
+async def retry(call, retries=3, base_delay=1.0, max_delay=30.0, on_retry=None, sleep=asyncio.sleep):
+    """执行协程函数 call，可重试的错误最多重试 retries 次；on_retry(错误, 第几次, 等待秒数) 在每次等待前调用
+
+    sleep 为等待用的协程函数，调度器中运行时传入 TokenScheduler.pause，等待期间不占用并发名额。
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, getattr(e, 'retry_after', None))
+            if on_retry is not None:
+                on_retry(e, attempt + 1, delay)
+            await sleep(delay)
+
+
+class CircuitBreaker:
+    """单个 token 的熔断器
+
+    认证失败（401/403）立即断开，其他错误连续 failure_threshold 次后断开。断开期间 allow() 返回 False，
+    冷却时间到后进入半开状态放行一次试探请求：成功则恢复，失败则重新断开并把冷却时间翻倍（不超过 max_timeout）。
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=300, auth_reset_timeout=3600, max_timeout=86400):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.auth_reset_timeout = auth_reset_timeout
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        self._timeout = None
+        self.reason = None
+
+    def allow(self, now):
+        """是否允许发起请求"""
+        if self.state == OPEN:
+            if now < self.opened_until:
+                return False
+            self.state = HALF_OPEN
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._timeout = None
+        self.reason = None
+
+    def record_failure(self, error, now):
+        """记录一次失败（重试之后仍失败），返回 True 表示熔断器因此断开"""
+        self.failures += 1
+        auth_failed = isinstance(error, FetchError) and error.auth_failed
+        if self.state == HALF_OPEN:
+            self._timeout = min(self.max_timeout, 2 * self._timeout)
+        elif auth_failed:
+            self._timeout = self.auth_reset_timeout
+        elif self.failures >= self.failure_threshold:
+            self._timeout = self.reset_timeout
+        else:
+            return False
+        self.state = OPEN
+        self.opened_until = now + self._timeout
+        self.reason = str(error)
+        return True
+
+    @property
+    def cooldown(self):
+        """当前的冷却时间（秒）"""
+        return self._timeout or 0
@@ -0,0 +1,225 @@
+"""多 token 调度：每个 token 按各自的周期独立执行，限制并发数和全局请求速率"""
+import asyncio
+import contextvars
+import heapq
+import zlib
+
+from .logs import logger
+
+
+def token_jitter(name, salt, spread):
+    """按 token 名称计算确定性抖动，范围 [0, spread)，同一输入每次结果相同"""
+    digest = zlib.crc32(f"{name}:{salt}".encode())
+    return spread * digest / 2**32
+
+
+class _Slot:
+    """调度任务持有的并发名额"""
+    __slots__ = ('held',)
+
+    def __init__(self):
+        self.held = True
+
+
+# 当前调度任务的并发名额（_execute 在各自的任务中设置）
+_slot = contextvars.ContextVar('bless_scheduler_slot', default=None)
+
+
+class RateLimiter:
+    """全局请求速率限制：相邻两次放行至少间隔 1/rate 秒"""
+
+    def __init__(self, rate=None):
+        self.spacing = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        """预约下一个可用时隙，并等待到该时隙"""
+        if not self.spacing:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.spacing
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class TokenScheduler:
+    """为每个 token 维护独立的下次执行时间
+
+    第 k 轮的计划时间为 起点 + 相位 + k * interval + 抖动(k)，只由 token 名称和轮次决定，
+    与其他 token 的执行快慢无关，因此长期运行不会漂移。相位把各 token 均匀错开，
+    抖动替代了原来的 random_delay()。
+
+    每个 token 可以有自己的周期，并可在运行中用 set_interval() 修改：以最近一轮的计划时间为新的锚点，
+    之后的轮次按新周期继续排列，仍然不受执行耗时影响。
+    """
+
+    def __init__(self, interval, max_concurrency=10, requests_per_second=None, jitter=0.1):
+        self.interval = interval
+        self.jitter = jitter * interval
+        self._jitter_ratio = jitter
+        self.max_concurrency = max_concurrency
+        self._limiter = RateLimiter(requests_per_second)
+        self._semaphore = None
+        self._jobs = {}
+        self._generation = {}
+        self._intervals = {}  # 与默认周期不同的 token 周期
+        self._anchors = {}  # token -> (锚点轮次, 锚点时间, 周期)
+        self._last_cycle = {}
+        self._running = {}
+        self._queue = []
+        self._origin = None
+        self._wakeup = None
+        self.skipped = 0  # 上一轮仍未结束而跳过的次数
+
+    def interval_of(self, name):
+        return self._intervals.get(name, self.interval)
+
+    def phase(self, name):
+        """token 在周期内的固定相位"""
+        return token_jitter(name, 'phase', self.interval_of(name))
+
+    def _anchor(self, name):
+        anchor = self._anchors.get(name)
+        if anchor is None:
+            anchor = (0, self._origin + self.phase(name), self.interval_of(name))
+        return anchor
+
+    def due_time(self, name, cycle):
+        """token 第 cycle 轮的计划执行时间"""
+        anchor_cycle, anchor_time, interval = self._anchor(name)
+        return (anchor_time + (cycle - anchor_cycle) * interval
+                + token_jitter(name, cycle, self._jitter_ratio * interval))
+
+    def add(self, name, job, interval=None):
+        """注册 token 任务，job 为无参数的协程函数，interval 为空时使用默认周期"""
+        self._jobs[name] = job
+        self._generation[name] = self._generation.get(name, 0) + 1
+        self._anchors.pop(name, None)
+        self._last_cycle.pop(name, None)
+        if interval is None:
+            self._intervals.pop(name, None)
+        else:
+            self._intervals[name] = interval
+        if self._origin is not None:
+            self._schedule_next(name, self._origin_cycle(name))
+
+    def set_interval(self, name, interval):
+        """修改 token 的周期：下一轮在最近一轮的计划时间之后 interval 秒（加抖动）执行"""
+        if name not in self._jobs or interval == self.interval_of(name):
+            return
+        cycle = self._last_cycle.get(name)
+        # 以最近一轮（含抖动）的计划时间为锚点，保证新周期下的下一轮不早于本轮 + interval
+        anchor_time = None if self._origin is None or cycle is None else self.due_time(name, cycle)
+        self._intervals[name] = interval
+        if self._origin is None:
+            return
+
+        # 丢弃按旧周期排好的下一轮
+        self._generation[name] += 1
+        if anchor_time is None:
+            self._anchors.pop(name, None)
+            self._schedule_next(name, self._origin_cycle(name))
+        else:
+            self._anchors[name] = (cycle, anchor_time, interval)
+            self._schedule_next(name, cycle + 1)
+
+    def remove(self, name):
+        """移除 token，已在执行的任务会继续完成"""
+        self._jobs.pop(name, None)
+
+    def _origin_cycle(self, name):
+        """运行中加入的 token 从下一个尚未到期的轮次开始"""
+        now = asyncio.get_running_loop().time()
+        anchor_cycle, anchor_time, interval = self._anchor(name)
+        cycle = max(anchor_cycle, anchor_cycle + int((now - anchor_time) // interval))
+        while self.due_time(name, cycle) < now:
+            cycle += 1
+        return cycle
+
+    def _schedule_next(self, name, cycle):
+        entry = (self.due_time(name, cycle), name, cycle, self._generation[name])
+        heapq.heappush(self._queue, entry)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _execute(self, name, job):
+        await self._semaphore.acquire()
+        slot = _Slot()
+        _slot.set(slot)
+        try:
+            await self._limiter.wait()
+            await job()
+        except Exception as e:
+            logger.exception("调度任务 %s 出错: %s", name, e)
+        finally:
+            if slot.held:
+                self._semaphore.release()
+
+    async def pause(self, delay):
+        """在调度任务中等待 delay 秒（例如重试退避）：等待期间让出并发名额，结束后重新取得名额并按全局速率放行
+
+        网关整体限流返回较长的 Retry-After 时，等待重试的 token 不会占满名额而拖住其他 token 的检查。
+        """
+        slot = _slot.get()
+        if slot is None or not slot.held:
+            await asyncio.sleep(delay)
+            return
+        slot.held = False
+        self._semaphore.release()
+        await asyncio.sleep(delay)
+        await self._semaphore.acquire()
+        slot.held = True
+        await self._limiter.wait()
+
+    def _launch(self, name, cycle):
+        job = self._jobs.get(name)
+        if job is None:
+            return
+        # 下一轮的时间只取决于轮次，不受本轮执行耗时影响
+        self._last_cycle[name] = cycle
+        self._schedule_next(name, cycle + 1)
+
+        if name in self._running:
+            self.skipped += 1
+            logger.warning("上一轮尚未完成，跳过第 %d 轮", cycle, token=name)
+            return
+        task = asyncio.create_task(self._execute(name, job))
+        self._running[name] = task
+        task.add_done_callback(lambda _: self._running.pop(name, None))
+
+    async def run(self):
+        """按计划时间持续调度，直到被取消"""
+        loop = asyncio.get_running_loop()
+        self._origin = loop.time()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._wakeup = asyncio.Event()
+        for name in list(self._jobs):
+            self._schedule_next(name, 0)
+
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                due, name, cycle, generation = self._queue[0]
+                delay = due - loop.time()
+                if delay > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(self._queue)
+                # 已移除或重新注册过的 token，丢弃旧的计划
+                if name in self._jobs and self._generation[name] == generation:
+                    self._launch(name, cycle)
+        finally:
+            for task in list(self._running.values()):
+                task.cancel()
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
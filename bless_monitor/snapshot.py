@@ -0,0 +1,117 @@
+"""节点精简快照：只保留差异比较和报告需要的字段，替代 deepcopy 整个接口返回"""
+from zlib import crc32
+from datetime import datetime
+
+# session 压缩格式：低 40 位为最早的开始时间（Unix 秒，0 表示未知），其上按 32 位一段拼接各 session 的指纹
+_START_BITS = 40
+_START_MASK = (1 << _START_BITS) - 1
+_FINGERPRINT_BITS = 32
+_FINGERPRINT_MASK = (1 << _FINGERPRINT_BITS) - 1
+_FINGERPRINT_MARK = 1 << (_FINGERPRINT_BITS - 1)  # 最高位恒为 1，指纹段的位数即可算出 session 数
+
+# startAt 字符串 -> Unix 秒；同一个 session 每轮都会出现，缓存后每轮不必重复解析
+_start_cache = {}
+_START_CACHE_SIZE = 100000
+
+
+def _parse_start(value):
+    """ISO 8601 时间（如 2024-11-01T00:00:00.000Z）转为 Unix 秒，无法解析时返回 0"""
+    start = _start_cache.get(value)
+    if start is None:
+        try:
+            start = int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+        except (AttributeError, TypeError, ValueError):
+            start = 0
+        if len(_start_cache) >= _START_CACHE_SIZE:
+            _start_cache.clear()
+        _start_cache[value] = start
+    return start
+
+
+def pack_sessions(sessions):
+    """把仍在进行的 session 压缩为一个整数（带有 endAt 的视为已结束），没有 session 时为 0
+
+    每个 session 按 _id 和 startAt 计算 32 位指纹并排序拼接，比较两轮是否相同只需一次整数比较。
+    最早开始时间取字典序最小的 startAt（同为 UTC 的 ISO 时间字符串按字典序即时间顺序），每个节点只解析一次。
+    """
+    if not sessions:
+        return 0
+    fingerprints = []
+    earliest = None
+    for session in sessions:
+        if session.get('endAt'):
+            continue
+        start_at = session.get('startAt')
+        fingerprints.append(crc32(f"{session.get('_id')}|{start_at}".encode()) | _FINGERPRINT_MARK)
+        if start_at.__class__ is str and (earliest is None or start_at < earliest):
+            earliest = start_at
+    if not fingerprints:
+        return 0
+    fingerprints.sort()
+    packed = 0
+    for fingerprint in fingerprints:
+        packed = (packed << _FINGERPRINT_BITS) | fingerprint
+    return (packed << _START_BITS) | (_parse_start(earliest) if earliest else 0)
+
+
+def unpack_fingerprints(sessions):
+    """pack_sessions 结果中的指纹集合"""
+    fingerprints = set()
+    packed = sessions >> _START_BITS
+    while packed:
+        fingerprints.add(packed & _FINGERPRINT_MASK)
+        packed >>= _FINGERPRINT_BITS
+    return fingerprints
+
+
+class NodeSnapshot:
+    """单个节点的精简快照
+
+    sessions 为 pack_sessions 压缩后的进行中 session（None 表示未知，例如从旧版状态库恢复），
+    不保留 session 对象本身；session 数和最早开始时间由它计算。
+    """
+    __slots__ = ('node_id', 'pub_key', 'is_connected', 'total_reward', 'today_reward', 'sessions')
+
+    def __init__(self, node_id, pub_key, is_connected, total_reward, today_reward, sessions=None):
+        self.node_id = node_id
+        self.pub_key = pub_key
+        self.is_connected = is_connected
+        self.total_reward = total_reward
+        self.today_reward = today_reward
+        self.sessions = sessions
+
+    @classmethod
+    def from_node(cls, node):
+        """从接口返回的节点字典构建快照"""
+        return cls(
+            node['_id'],
+            node['pubKey'],
+            bool(node['isConnected']),
+            node['totalReward'],
+            node['todayReward'],
+            pack_sessions(node.get('sessions')),
+        )
+
+    @property
+    def session_count(self):
+        """进行中的 session 数"""
+        return (self.sessions >> _START_BITS).bit_length() // _FINGERPRINT_BITS if self.sessions else 0
+
+    @property
+    def session_start(self):
+        """最早的进行中 session 的开始时间（Unix 秒），没有或未知时为 None"""
+        return (self.sessions & _START_MASK) or None if self.sessions else None
+
+    def __reduce__(self):
+        # 按位置参数序列化，比默认的 __slots__ 状态字典更紧凑、更快（进程池传输用）
+        return (NodeSnapshot, (self.node_id, self.pub_key, self.is_connected,
+                               self.total_reward, self.today_reward, self.sessions))
+
+    def __repr__(self):
+        return (f"NodeSnapshot({self.pub_key[:20]}..., connected={self.is_connected}, "
+                f"total={self.total_reward}, today={self.today_reward}, sessions={self.session_count})")
+
+
+def take_snapshot(nodes):
+    """将节点列表（或任意可迭代对象）转换为按 _id 索引的快照字典"""
+    return {node['_id']: NodeSnapshot.from_node(node) for node in nodes}
@@ -0,0 +1,117 @@
+"""节点快照持久化：SQLite 按 (token, 节点 _id) 存储，重启后可直接继续比较"""
+import sqlite3
+
+from .snapshot import NodeSnapshot
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_state (
+    token TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    pub_key TEXT NOT NULL,
+    is_connected INTEGER NOT NULL,
+    total_reward NUMERIC NOT NULL,
+    today_reward NUMERIC NOT NULL,
+    session_count INTEGER NOT NULL,
+    sessions BLOB,
+    PRIMARY KEY (token, node_id)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO node_state (token, node_id, pub_key, is_connected, total_reward, today_reward, session_count, sessions)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (token, node_id) DO UPDATE SET
+    pub_key = excluded.pub_key,
+    is_connected = excluded.is_connected,
+    total_reward = excluded.total_reward,
+    today_reward = excluded.today_reward,
+    session_count = excluded.session_count,
+    sessions = excluded.sessions
+"""
+
+
+def _pack(sessions):
+    """压缩后的 session 整数存为小端字节串，None（未知）存为 NULL"""
+    if sessions is None:
+        return None
+    return sessions.to_bytes((sessions.bit_length() + 7) // 8, 'little')
+
+
+def _unpack(blob):
+    return None if blob is None else int.from_bytes(blob, 'little')
+
+
+def _values(node):
+    return (node.pub_key, int(node.is_connected), node.total_reward, node.today_reward, node.session_count,
+            _pack(node.sessions))
+
+
+class StateStore:
+    """持久化各 token 的上一轮快照，每轮只写入发生变化的行"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(node_state)")}
+        if 'sessions' not in columns:
+            # 旧版只保存 session 数，升级后第一轮不比较 session（值为 NULL 即未知）
+            self._conn.execute("ALTER TABLE node_state ADD COLUMN sessions BLOB")
+        self._conn.commit()
+
+    def load(self, token):
+        """读取 token 的快照，没有记录时返回空字典"""
+        rows = self._conn.execute(
+            "SELECT node_id, pub_key, is_connected, total_reward, today_reward, sessions "
+            "FROM node_state WHERE token = ?", (token,)
+        )
+        return {
+            node_id: NodeSnapshot(node_id, pub_key, bool(is_connected), total_reward, today_reward, _unpack(sessions))
+            for node_id, pub_key, is_connected, total_reward, today_reward, sessions in rows
+        }
+
+    def save(self, token, previous, current):
+        """对比上一轮快照，只写入新增/变化的节点并删除已消失的节点，返回写入行数"""
+        upserts = []
+        for node_id, node in current.items():
+            prev_node = previous.get(node_id)
+            values = _values(node)
+            if prev_node is None or _values(prev_node) != values:
+                upserts.append((token, node_id) + values)
+        deletes = [(token, node_id) for node_id in previous if node_id not in current]
+
+        if upserts or deletes:
+            with self._conn:
+                self._conn.executemany(_UPSERT, upserts)
+                self._conn.executemany("DELETE FROM node_state WHERE token = ? AND node_id = ?", deletes)
+        return len(upserts) + len(deletes)
+
+    def forget(self, token):
+        """删除 token 的全部记录"""
+        with self._conn:
+            self._conn.execute("DELETE FROM node_state WHERE token = ?", (token,))
+
+    def close(self):
+        self._conn.close()
+
+
+_store = None
+
+
+def get_state_store(path):
+    """获取共享的快照存储，path 为空时返回 None（不持久化）"""
+    global _store
+    if not path:
+        return None
+    if _store is None:
+        _store = StateStore(path)
+    return _store
+
+
+def close_state_store():
+    global _store
+    if _store is not None:
+        _store.close()
+    _store = None
@@ -0,0 +1,344 @@
+"""多进程分片：supervisor 把 token 分到 N 个 worker 进程，各 worker 运行自己的 Monitor 调度循环
+
+- 分片用 rendezvous 哈希：每个 token 分给 hash(worker 编号, token 名) 最大的存活 worker。
+  worker 退出时只有它的 token 移到其余 worker；同编号的 worker 重新拉起后这些 token 回到原处，其余 token 不动。
+- IPC 为每个 worker 一条 multiprocessing 双向 Pipe。supervisor 发送 ('assign', tokens 配置列表, 要删除快照的 token 名)
+  和 ('stop',)；  worker 回传 ('notify', 消息, key, 指纹) 和每轮检查的精简结果 ('result', CheckResult)，不传节点数据。
+- 通知在 supervisor 统一去重、合并、限速后发送（去重按 token 名记录，token 换 worker 后仍然有效），
+  各 token 的节点数/在线数/奖励指标也由 supervisor 汇总暴露；耗时直方图等进程内指标留在各 worker 中。
+- 两端都用 loop.add_reader 监听 Pipe 和进程 sentinel 的文件描述符，接收不占用线程（仅支持 Unix）。
+  supervisor 下发的 token 列表可能大于 Pipe 缓冲区，由单个发送线程按顺序写入，
+  避免事件循环阻塞在写入上、而 worker 又在等它读取结果时互相等待。
+- 配置热加载（见 reload.py）只在 supervisor 中监视配置文件：tokens 变化后重新分片，
+  只给分片变化或分到了被修改 token 的 worker 重新下发列表，worker 再按名称增量增删改，其余 token 的状态和调度不受影响。
+- worker 的日志记录经另一条单向 Pipe 发给 supervisor，由 supervisor 的日志线程统一写出（见 logs.py），
+  记录带上 worker 编号；某个 worker 被强制结束时只会损坏它自己的 Pipe。
+
+状态数据库和历史目录由各 worker 共用（SQLite WAL 支持多进程写入），同一时刻每个 token 只属于一个 worker。
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import signal
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from .config import diff_tokens, logging_options, notifier_configs
+from .engine import Monitor, _install_stop_handler
+from .logs import forward_log_records, logger, start_logging, stop_logging
+from .metrics import (
+    NODES, NODES_ONLINE, REWARD_RATE, TODAY_REWARD, TOTAL_REWARD, remove_token_series, start_metrics_server,
+    stop_metrics_server
+)
+from .notifiers import build_notifiers
+from .notify_queue import (
+    get_notification_queue, install_notification_queue, start_notification_queue, stop_notification_queue
+)
+from .reload import start_config_watcher, stop_config_watcher
+from .state_store import close_state_store, get_state_store
+
+# worker 每轮检查回传的精简结果，reward_rate 为 None 表示尚无速率
+CheckResult = namedtuple('CheckResult', ['token', 'nodes', 'online', 'total_reward', 'today_reward',
+                                         'reward_rate', 'changes', 'checked_at'])
+
+# 关闭时等待 worker 发送完剩余消息并退出的秒数，超时后强制结束
+STOP_TIMEOUT = 10
+
+
+def shard_weight(worker, name):
+    """rendezvous 哈希权重：token 属于权重最大的 worker（blake2b 混合充分，crc32 的线性会让分布不均）"""
+    return int.from_bytes(hashlib.blake2b(f"{worker}:{name}".encode(), digest_size=8).digest(), 'big')
+
+
+def assign_shards(names, workers):
+    """把 token 名称分配到 workers（worker 编号的集合），返回 {worker: [token 名称]}"""
+    shards = {worker: [] for worker in workers}
+    if shards:
+        for name in names:
+            shards[max(shards, key=lambda worker: shard_weight(worker, name))].append(name)
+    return shards
+
+
+class _NotificationForwarder:
+    """worker 中替代 NotificationDispatcher：消息原样转发给 supervisor"""
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def submit(self, message, key=None, fingerprint=None):
+        self._conn.send(('notify', message, key, fingerprint))
+        return True
+
+    async def close(self):
+        pass
+
+
+class WorkerMonitor(Monitor):
+    """worker 进程中的 Monitor：token 由 supervisor 分配，每轮结果回传而不是写入本进程的指标"""
+
+    def __init__(self, config, conn):
+        super().__init__(config)
+        self.conn = conn
+
+    def observe(self, state, stats, changes, now):
+        earnings = stats.earnings
+        rate = earnings.rate if earnings is not None and earnings.median is not None else None
+        self.conn.send(('result', CheckResult(state.name, stats.nodes, stats.online, stats.total_reward,
+                                              stats.today_reward, rate, len(changes), now)))
+
+    def message_prefix(self, state):
+        """总是加上 token 名：本进程只看到自己的分片，消息会和其他 worker 的合并发送"""
+        return f"【{state.name}】\n"
+
+    def assign(self, items, forget=()):
+        """按 supervisor 分配的 tokens 配置列表增删改 token
+
+        分片变化时移出的 token 只是转给其他 worker，快照要留给它恢复；
+        只有 forget 中已从配置删除的 token 才删除快照（由移除前的所属 worker 执行，它之后不会再写入）。
+        """
+        self.update_tokens(items, forget=False)
+        store = get_state_store(self.config.state_db_path)
+        if store is not None:
+            for name in forget:
+                store.forget(name)
+
+
+def worker_main(worker, config, conn, log_conn):
+    """worker 进程入口：运行 WorkerMonitor，直到收到 stop 或 supervisor 退出（Pipe 关闭）"""
+    # Ctrl+C 同时发给整个进程组，由 supervisor 统一通知 worker 停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    start_logging(logging_options(config)['level'], conn=log_conn)
+    try:
+        asyncio.run(_run_worker(worker, config, conn))
+    finally:
+        stop_logging()
+        log_conn.close()
+
+
+async def _run_worker(worker, config, conn):
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+    install_notification_queue(_NotificationForwarder(conn))
+    monitor = WorkerMonitor(config, conn)
+
+    def on_command():
+        try:
+            while conn.poll():
+                command = conn.recv()
+                if command[0] == 'assign':
+                    monitor.assign(*command[1:])
+                elif command[0] == 'stop':
+                    stopped.set()
+        except (EOFError, OSError):
+            stopped.set()
+        if stopped.is_set():
+            loop.remove_reader(conn.fileno())
+
+    try:
+        await monitor.start(serve_metrics=False)
+        loop.add_reader(conn.fileno(), on_command)
+        runner = asyncio.create_task(monitor.run())
+        await stopped.wait()
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+    finally:
+        await monitor.close()
+        conn.close()
+
+
+def _send(conn, message):
+    try:
+        conn.send(message)
+    except OSError:
+        pass  # worker 已退出（或 Pipe 已关闭），由 Supervisor._on_exit 处理
+
+
+class Supervisor:
+    """启动并看护 worker 进程，分配 token、汇总结果并统一发送通知"""
+
+    def __init__(self, config):
+        self.config = config
+        self.items = {item['name']: item for item in config.tokens}
+        # 传给 worker 的配置：token 由 assign 下发；全局的并发数和请求速率上限按 worker 数平分
+        self.worker_config = SimpleNamespace(**{
+            **vars(config), 'tokens': [], 'workers': 0,
+            'max_concurrency': max(1, config.max_concurrency // config.workers),
+            'requests_per_second': config.requests_per_second / config.workers,
+        })
+        self.processes = {}
+        self.conns = {}
+        self.log_conns = {}
+        self.shards = {}
+        self.results = {}  # token -> 最近一轮的 CheckResult
+        self.checks = 0  # 收到的检查结果总数
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._closing = False
+        self._restart_handles = {}
+        self._sender = ThreadPoolExecutor(1, thread_name_prefix='bless-supervisor-send')
+
+    async def start(self, serve_metrics=True):
+        config = self.config
+        if serve_metrics:
+            await start_metrics_server(config.metrics_host, config.metrics_port)
+        start_notification_queue(build_notifiers(notifier_configs(config), config.proxy_url))
+        for worker in range(config.workers):
+            self.spawn(worker)
+        self.rebalance()
+        logger.info("已启动 %d 个 worker 进程，共 %d 个 token", config.workers, len(self.items))
+
+    def spawn(self, worker):
+        """启动编号为 worker 的进程，并监听它的消息和退出"""
+        loop = asyncio.get_running_loop()
+        conn, child_conn = self._context.Pipe()
+        log_conn, child_log_conn = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=worker_main,
+                                        args=(worker, self.worker_config, child_conn, child_log_conn),
+                                        name=f"bless-monitor-worker-{worker}", daemon=True)
+        process.start()
+        child_conn.close()
+        child_log_conn.close()
+        self.processes[worker] = process
+        self.conns[worker] = conn
+        self.log_conns[worker] = log_conn
+        self.shards[worker] = []
+        loop.add_reader(conn.fileno(), self._on_message, worker)
+        loop.add_reader(log_conn.fileno(), self._on_log, worker)
+        loop.add_reader(process.sentinel, self._on_exit, worker)
+
+    def rebalance(self, changed=(), removed=()):
+        """按当前存活的 worker 重新分片，只给分片有变化（或含有 changed 中被修改的 token）的 worker 下发新的 token 列表
+
+        removed 为已从配置删除的 token，由原来所属的 worker 删除它们的快照；不属于任何存活 worker 的由 supervisor 删除。
+        """
+        shards = assign_shards(self.items, self.conns)
+        changed = set(changed)
+        orphaned = set(removed)
+        for worker, names in shards.items():
+            forget = [name for name in self.shards.get(worker, ()) if name in orphaned]
+            orphaned.difference_update(forget)
+            if names != self.shards.get(worker) or not changed.isdisjoint(names):
+                self.shards[worker] = names
+                self._send(worker, ('assign', [self.items[name] for name in names], forget))
+        store = get_state_store(self.config.state_db_path) if orphaned else None
+        if store is not None:
+            for name in orphaned:
+                store.forget(name)
+
+    def update_tokens(self, items):
+        """按新的 tokens 配置列表增删改 token，返回 (新增, 移除, 修改) 的名称列表"""
+        new = {item['name']: item for item in items}
+        added, removed, changed = diff_tokens(self.items, new)
+        self.items = new
+        for name in removed:
+            self.results.pop(name, None)
+            remove_token_series(name)
+        if added or removed or changed:
+            self.rebalance(changed, removed)
+        return added, removed, changed
+
+    def _send(self, worker, message):
+        self._sender.submit(_send, self.conns[worker], message)
+
+    def _on_message(self, worker):
+        conn = self.conns[worker]
+        try:
+            while conn.poll():
+                message = conn.recv()
+                if message[0] == 'result':
+                    self._observe(message[1])
+                elif message[0] == 'notify':
+                    get_notification_queue().submit(message[1], key=message[2], fingerprint=message[3])
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+
+    def _on_log(self, worker):
+        conn = self.log_conns[worker]
+        try:
+            forward_log_records(conn, worker=worker)
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+
+    def _observe(self, result):
+        self.checks += 1
+        if result.token not in self.items:
+            return  # 已移除的 token 在移除前开始的最后一轮
+        self.results[result.token] = result
+        NODES.set(result.nodes, token=result.token)
+        NODES_ONLINE.set(result.online, token=result.token)
+        TOTAL_REWARD.set(result.total_reward, token=result.token)
+        TODAY_REWARD.set(result.today_reward, token=result.token)
+        if result.reward_rate is not None:
+            REWARD_RATE.set(result.reward_rate, token=result.token)
+
+    def _on_exit(self, worker):
+        loop = asyncio.get_running_loop()
+        process = self.processes.pop(worker)
+        loop.remove_reader(process.sentinel)
+        process.join()
+        self._on_message(worker)  # 读完退出前已发出的消息和日志
+        self._on_log(worker)
+        conn = self.conns.pop(worker)
+        loop.remove_reader(conn.fileno())
+        self._sender.submit(conn.close)  # 排在尚未写完的消息之后关闭
+        log_conn = self.log_conns.pop(worker)
+        loop.remove_reader(log_conn.fileno())
+        log_conn.close()
+        moved = len(self.shards.pop(worker, ()))
+        if self._closing:
+            return
+        logger.warning("worker %d 已退出（exitcode=%s），%d 个 token 转给其余 worker", worker, process.exitcode, moved)
+        self.rebalance()
+        self._restart_handles[worker] = loop.call_later(self.config.worker_restart_delay, self._restart, worker)
+
+    def _restart(self, worker):
+        self._restart_handles.pop(worker, None)
+        if self._closing:
+            return
+        self.restarts += 1
+        logger.info("重新启动 worker %d", worker)
+        self.spawn(worker)
+        self.rebalance()
+
+    async def run(self):
+        """持续运行，直到被取消"""
+        await asyncio.Event().wait()
+
+    async def close(self):
+        """通知各 worker 停止并等待其退出（发送完已提交的消息），再发送完剩余通知、关闭指标服务"""
+        self._closing = True
+        for handle in self._restart_handles.values():
+            handle.cancel()
+        for worker in list(self.conns):
+            self._send(worker, ('stop',))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STOP_TIMEOUT
+        while self.processes and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        for process in self.processes.values():
+            process.terminate()
+            process.join(1)
+        self._sender.shutdown(wait=False, cancel_futures=True)
+        close_state_store()
+        await stop_notification_queue()
+        await stop_metrics_server()
+
+
+async def run_supervisor(config, config_path=None):
+    """以多进程分片模式运行监控，收到 SIGTERM 或 Ctrl+C 时停止全部 worker 后返回；给出 config_path 时热加载 tokens"""
+    supervisor = Supervisor(config)
+    handler_installed = _install_stop_handler()
+    try:
+        await supervisor.start()
+        if config_path:
+            start_config_watcher(config_path, config, supervisor.update_tokens)
+        await supervisor.run()
+    except asyncio.CancelledError:
+        logger.info("监控已停止")
+    finally:
+        if handler_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+        await stop_config_watcher()
+        await supervisor.close()
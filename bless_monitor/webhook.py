@@ -0,0 +1,61 @@
+"""Webhook HTTP 传输：带连接池的 aiohttp 会话和统一的 JSON POST 结果判断，供各通知渠道使用"""
+import asyncio
+
+import aiohttp
+
+from .logs import logger
+
+# 连接池配置
+WEBHOOK_LIMIT_PER_HOST = 10  # 同一 webhook 主机的最大并发连接数
+DNS_CACHE_TTL = 300  # DNS 缓存时间（秒）
+KEEPALIVE_TIMEOUT = 60  # 空闲连接保持时间（秒）
+SEND_TIMEOUT = 30  # 单条消息发送超时（秒）
+
+
+class RetryableSendError(Exception):
+    """可重试的发送失败（429、5xx、频率超限），retry_after 为服务端建议的等待秒数"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def create_webhook_session(timeout=SEND_TIMEOUT):
+    """创建带连接池的会话，每个通知渠道各持有一个（必须在事件循环内调用）"""
+    connector = aiohttp.TCPConnector(
+        limit_per_host=WEBHOOK_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+def _retry_after(value):
+    return float(value) if value and value.isdigit() else None
+
+
+async def post_json(session, url, payload, proxy=None, headers=None):
+    """POST JSON 请求，返回 HTTP 200 时的响应内容（能解析为 JSON 时返回对象，否则返回文本）
+
+    429/5xx、连接错误和超时抛出 RetryableSendError，其他非 200 状态记录日志后返回 None。
+    """
+    try:
+        async with session.post(url, json=payload, headers=headers, proxy=proxy) as response:
+            text = await response.text()
+            if response.status == 429 or response.status >= 500:
+                raise RetryableSendError(
+                    f"Failed to send message: {response.status}, {text}",
+                    _retry_after(response.headers.get('Retry-After'))
+                )
+            if response.status != 200:
+                logger.error("Failed to send message: %d, %s", response.status, text)
+                return None
+            try:
+                return await response.json(content_type=None)
+            except ValueError:
+                return text
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+        raise RetryableSendError(f"Failed to send message: {str(e)}")